@@ -0,0 +1,319 @@
+"""Benchmark encode, decode and save across image and payload sizes.
+
+Every case encodes a payload into a synthetic RGB cover of random noise, so
+compression can't shrink it, and runs in its own process, so the peak
+resident memory reported belongs to that case alone. Times are the best of
+--repeat runs.
+
+Run the benchmarks and save them as a baseline:
+
+    $ python benchmarks/benchmark.py run --output baseline.json
+
+Run them again after a change and compare, exiting with 1 if anything got
+slower or larger than --threshold allows:
+
+    $ python benchmarks/benchmark.py run --output current.json
+    $ python benchmarks/benchmark.py compare baseline.json current.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from steganography import Steganography
+
+MEGAPIXELS = (0.1, 1.0, 10.0, 100.0)
+PAYLOADS = (16, 1024, 64 * 1024, 1024 * 1024)
+STAGES = ("encode", "decode", "save")
+METRICS = STAGES + ("peak_rss",)
+THRESHOLD = 0.1
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs the benchmark command line.
+
+    Args:
+        argv (List[str], optional): Arguments without the program name.
+        Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 1 when compare finds regressions.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subcommands = parser.add_subparsers(dest="subcommand", required=True)
+
+    run = subcommands.add_parser("run", help="run every case and save the results")
+    run.add_argument(
+        "--megapixels",
+        type=float,
+        nargs="+",
+        default=MEGAPIXELS,
+        help="sizes of the covers, in millions of pixels",
+    )
+    run.add_argument(
+        "--payloads",
+        type=int,
+        nargs="+",
+        default=PAYLOADS,
+        help="sizes of the payloads, in bytes",
+    )
+    run.add_argument("--repeat", type=int, default=3, help="runs of each case")
+    run.add_argument("-o", "--output", help="JSON file to save the results to")
+    run.set_defaults(run=_run)
+
+    compare = subcommands.add_parser(
+        "compare", help="compare results against a baseline"
+    )
+    compare.add_argument("baseline", help="JSON results of the baseline")
+    compare.add_argument("current", help="JSON results to check")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="relative increase reported as a regression (default: 0.1)",
+    )
+    compare.set_defaults(run=_compare)
+
+    case = subcommands.add_parser("case", help=argparse.SUPPRESS)
+    case.add_argument("megapixels", type=float)
+    case.add_argument("payload", type=int)
+    case.add_argument("repeat", type=int)
+    case.set_defaults(run=_case)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+def run_case(megapixels: float, payload: int, repeat: int) -> dict:
+    """Times one case in the current process.
+
+    Args:
+        megapixels (float): Size of the cover, in millions of pixels.
+        payload (int): Size of the payload, in bytes.
+        repeat (int): Runs of each stage, the fastest is kept.
+
+    Returns:
+        dict: Seconds taken by each stage, payload and pixel throughput of
+        encode and decode, and peak resident memory in bytes. Only "skipped"
+        when the payload doesn't fit.
+    """
+    cover = synthetic_cover(megapixels)
+    data = np.random.default_rng(1).bytes(payload)
+    if not Steganography(cover).fits(data):
+        return {"skipped": "payload doesn't fit"}
+
+    steganography = Steganography(cover)
+    encode = best_of(repeat, lambda: steganography.encode_bytes(data))
+    decoded = []
+    decode = best_of(
+        repeat,
+        lambda: decoded.append(steganography.decode_bytes(steganography.encoded_image)),
+    )
+    if decoded[-1] != data:
+        raise RuntimeError(f"Decoded payload differs at {megapixels} MP")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "encoded.png")
+        save = best_of(repeat, lambda: steganography.save(path))
+
+    pixels = cover.width * cover.height
+    return {
+        "encode": encode,
+        "decode": decode,
+        "save": save,
+        "encode_payload_mb_s": payload / encode / 1e6,
+        "decode_payload_mb_s": payload / decode / 1e6,
+        "encode_mpixels_s": pixels / encode / 1e6,
+        "decode_mpixels_s": pixels / decode / 1e6,
+        "peak_rss": peak_rss(),
+    }
+
+
+def synthetic_cover(megapixels: float) -> Image.Image:
+    """Returns a square RGB image of random noise, the same on every run.
+
+    Args:
+        megapixels (float): Size, in millions of pixels.
+
+    Returns:
+        Image.Image: Cover image.
+    """
+    side = max(int((megapixels * 1e6) ** 0.5), 1)
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (side, side, 3), dtype=np.uint8))
+
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    """Returns the fastest of repeat runs of function.
+
+    Args:
+        repeat (int): Number of runs.
+        function (Callable[[], object]): Function to time.
+
+    Returns:
+        float: Seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def peak_rss() -> int:
+    """Returns the peak resident memory of the current process.
+
+    Returns:
+        int: Bytes.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> List[str]:
+    """Lists every metric of current that is worse than in baseline.
+
+    Args:
+        baseline (dict): Results of the baseline.
+        current (dict): Results to check.
+        threshold (float, optional): Relative increase of a time or of peak
+        memory reported as a regression. Defaults to THRESHOLD.
+
+    Returns:
+        List[str]: One line for each regression.
+    """
+    regressions = []
+    for name, case in current["cases"].items():
+        before = baseline["cases"].get(name, {})
+        for metric in METRICS:
+            if metric not in case or metric not in before:
+                continue
+
+            change = case[metric] / before[metric] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{name} {metric}: {before[metric]:.4g} -> {case[metric]:.4g} "
+                    + f"(+{change:.0%})"
+                )
+
+    return regressions
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Runs every case, each in its own process, and saves the results.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    cases = {}
+    for megapixels in args.megapixels:
+        for payload in args.payloads:
+            name = f"{megapixels:g}MP/{payload}B"
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "case",
+                    str(megapixels),
+                    str(payload),
+                    str(args.repeat),
+                ],
+                check=True,
+                stdout=subprocess.PIPE,
+            ).stdout
+            cases[name] = json.loads(output)
+            print(name, _summary(cases[name]), file=sys.stderr)
+
+    results = {"environment": _environment(), "cases": cases}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    """Prints the regressions of current against baseline.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: 1 if there are regressions, 0 otherwise.
+    """
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+
+    return 1 if regressions else 0
+
+
+def _case(args: argparse.Namespace) -> int:
+    """Runs a single case and prints its results as JSON.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    print(json.dumps(run_case(args.megapixels, args.payload, args.repeat)))
+    return 0
+
+
+def _summary(case: dict) -> str:
+    """Formats the results of a case in one line.
+
+    Args:
+        case (dict): Results of the case.
+
+    Returns:
+        str: Summary.
+    """
+    if "skipped" in case:
+        return f"skipped, {case['skipped']}"
+
+    times = ", ".join(f"{stage} {case[stage]:.4f}s" for stage in STAGES)
+    return f"{times}, peak RSS {case['peak_rss'] / 2 ** 20:.0f} MiB"
+
+
+def _environment() -> dict:
+    """Returns what the results depend on besides the code.
+
+    Returns:
+        dict: Versions of Python and of the dependencies, and the machine.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
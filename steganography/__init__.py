@@ -1,3 +1,12 @@
-from .steganography import Steganography
-
 __all__ = ["Steganography"]
+
+
+def __getattr__(name: str):
+    # Imported on first use so the command line interface starts without
+    # loading Pillow and NumPy.
+    if name == "Steganography":
+        from .steganography import Steganography
+
+        return Steganography
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,201 @@
+"""Encode and decode many images at once across a pool of processes."""
+import functools
+import glob
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .steganography import Steganography
+
+
+class EncodeJob(NamedTuple):
+    """Cover image to encode a payload into and where to save the result"""
+
+    cover: str
+    payload: Union[str, bytes]
+    output: str
+
+
+class EncodeResult(NamedTuple):
+    """Result of an EncodeJob"""
+
+    job: EncodeJob
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+
+class DecodeResult(NamedTuple):
+    """Result of decoding an image"""
+
+    path: str
+    message: Optional[Union[str, bytes]] = None
+    error: Optional[str] = None
+
+
+def encode_many(
+    jobs: Iterable[EncodeJob],
+    workers: int = None,
+    chunksize: int = 16,
+    progress: Callable[[int, int], None] = None,
+    **options,
+) -> List[EncodeResult]:
+    """Encodes and saves every job across a pool of processes.
+
+    A job that fails doesn't stop the others, its error is returned in its
+    result instead.
+
+    Args:
+        jobs (Iterable[EncodeJob]): Jobs to run. A str payload is encoded as
+        text and bytes as binary data.
+        workers (int, optional): Number of processes, 1 runs every job in the
+        current process. Defaults to the number of CPUs.
+        chunksize (int, optional): Jobs sent to a process at a time. Larger
+        chunks lower scheduling overhead. Defaults to 16.
+        progress (Callable[[int, int], None], optional): Called with
+        the number of finished jobs and the total after each job.
+        Defaults to None.
+        **options: Keyword arguments passed to Steganography, such as
+        bits_per_channel or compression.
+
+    Returns:
+        List[EncodeResult]: One result for each job, in the same order.
+    """
+    jobs = [EncodeJob(*job) for job in jobs]
+    encode = functools.partial(_encode, options=options)
+
+    if workers == 1:
+        return _collect(map(encode, jobs), len(jobs), progress)
+
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(encode, jobs, chunksize=chunksize)
+        return _collect(results, len(jobs), progress)
+
+
+def decode_many(
+    paths: Union[str, Iterable[str]],
+    workers: int = None,
+    chunksize: int = 16,
+    binary: bool = False,
+    **options,
+) -> Iterator[DecodeResult]:
+    """Decodes every image across a pool of processes as a stream of results.
+
+    Paths are consumed lazily and only a few chunks per process are in flight
+    at a time, so memory stays flat no matter how many images there are. An
+    image that fails doesn't stop the others, its error is yielded instead.
+
+    Args:
+        paths (Union[str, Iterable[str]]): Paths of the images or a glob
+        pattern, where ** matches any number of directories.
+        workers (int, optional): Number of processes, 1 decodes every image in
+        the current process. Defaults to the number of CPUs.
+        chunksize (int, optional): Images sent to a process at a time.
+        Defaults to 16.
+        binary (bool, optional): Decode bytes instead of text. Defaults to
+        False.
+        **options: Keyword arguments passed to Steganography, such as end.
+
+    Yields:
+        DecodeResult: One result for each image, in the order they finish.
+    """
+    if isinstance(paths, str):
+        paths = glob.iglob(paths, recursive=True)
+
+    paths = iter(paths)
+    chunks = iter(lambda: list(itertools.islice(paths, chunksize)), [])
+    decode = functools.partial(_decode, binary=binary, options=options)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from decode(chunk)
+        return
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(decode, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def _encode(job: EncodeJob, options: dict) -> EncodeResult:
+    """Encodes and saves a single job.
+
+    Args:
+        job (EncodeJob): Job to run.
+        options (dict): Keyword arguments passed to Steganography.
+
+    Returns:
+        EncodeResult: Path the image was saved to or the error that stopped it.
+    """
+    try:
+        steganography = Steganography(job.cover, **options)
+        if isinstance(job.payload, str):
+            steganography.encode(job.payload)
+        else:
+            steganography.encode_bytes(job.payload)
+
+        return EncodeResult(job, output=steganography.save(job.output))
+    except Exception as error:
+        return EncodeResult(job, error=f"{type(error).__name__}: {error}")
+
+
+def _decode(paths: List[str], binary: bool, options: dict) -> List[DecodeResult]:
+    """Decodes a chunk of images.
+
+    Args:
+        paths (List[str]): Paths of the images.
+        binary (bool): Decode bytes instead of text.
+        options (dict): Keyword arguments passed to Steganography.
+
+    Returns:
+        List[DecodeResult]: Message or error of each image.
+    """
+    results = []
+    for path in paths:
+        try:
+            steganography = Steganography(path, **options)
+            if binary:
+                message = steganography.decode_bytes()
+            else:
+                message = steganography.decode()
+
+            results.append(DecodeResult(path, message=message))
+        except Exception as error:
+            results.append(DecodeResult(path, error=f"{type(error).__name__}: {error}"))
+
+    return results
+
+
+def _collect(
+    results: Iterable[EncodeResult],
+    total: int,
+    progress: Callable[[int, int], None] = None,
+) -> List[EncodeResult]:
+    """Collects results, reporting progress after each one.
+
+    Args:
+        results (Iterable[EncodeResult]): Results in the order of their jobs.
+        total (int): Number of jobs.
+        progress (Callable[[int, int], None], optional): Progress
+        callback. Defaults to None.
+
+    Returns:
+        List[EncodeResult]: Collected results.
+    """
+    collected = []
+    for result in results:
+        collected.append(result)
+        if progress:
+            progress(len(collected), total)
+
+    return collected
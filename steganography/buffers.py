@@ -0,0 +1,233 @@
+"""Encode and decode raw pixel buffers in place, without going through Pillow.
+
+Any NumPy array or object supporting the buffer protocol (bytearray, mmap,
+memoryview...) laid out as height x width x channels unsigned samples, such as
+uint8 or uint16, can be used.
+Arrays are used as views, so pixels are written where they are instead of
+being copied.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import compression as compression_module
+from . import engine, instrumentation, parallel, payload, traversal
+from .layout import END, capacity, check_fits, check_options  # noqa: F401
+
+
+def as_pixels(
+    buffer, shape: Tuple[int, ...] = None, dtype: np.dtype = np.uint8
+) -> np.ndarray:
+    """Returns a view of buffer as an array with shape (height, width, channels).
+
+    Args:
+        buffer: NumPy array or object supporting the buffer protocol.
+        shape (Tuple[int, ...], optional): Shape of the pixels, as (height,
+        width, channels) or (height, width) for one channel. Required for
+        buffers that aren't NumPy arrays. Defaults to the array's shape.
+        dtype (np.dtype, optional): Type of the samples of buffers that aren't
+        NumPy arrays. Defaults to np.uint8.
+
+    Raises:
+        ValueError: When the samples aren't unsigned integers or the shape is
+        invalid.
+
+    Returns:
+        np.ndarray: View of buffer, no data is copied.
+    """
+    if isinstance(buffer, np.ndarray):
+        pixels = buffer
+    else:
+        pixels = np.frombuffer(buffer, dtype=dtype)
+
+    if not np.issubdtype(pixels.dtype, np.unsignedinteger):
+        raise ValueError(f"Pixels must be unsigned integers, got {pixels.dtype}")
+    if shape is not None:
+        pixels = pixels.reshape(shape)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    if pixels.ndim != 3:
+        raise ValueError(
+            f"Pixels must have shape (height, width, channels), got {pixels.shape}"
+        )
+
+    return pixels
+
+
+def embed(
+    buffer,
+    data: bytes,
+    shape: Tuple[int, ...] = None,
+    copy: bool = False,
+    **options,
+) -> np.ndarray:
+    """Encodes data into a pixel buffer.
+
+    Args:
+        buffer: NumPy array or writable object supporting the buffer protocol.
+        data (bytes): Data to encode.
+        shape (Tuple[int, ...], optional): Shape of the pixels, see as_pixels.
+        Defaults to the array's shape.
+        copy (bool, optional): Leave buffer untouched and encode a copy of it.
+        Defaults to False, which writes to buffer in place.
+        **options: end, legacy, bits_per_channel, compression,
+        compression_level, order and key, as in write.
+
+    Raises:
+        ValueError: When buffer is read-only and copy is False, the options
+        are not supported or data doesn't fit.
+
+    Returns:
+        np.ndarray: Encoded pixels, a view of buffer unless copy is True.
+    """
+    pixels = as_pixels(buffer, shape)
+    if copy:
+        pixels = pixels.copy()
+    elif not pixels.flags.writeable:
+        raise ValueError("Buffer is read-only, use copy=True to encode a copy of it")
+
+    write(pixels, data, **options)
+    return pixels
+
+
+def extract(
+    buffer,
+    shape: Tuple[int, ...] = None,
+    end: str = END,
+    workers: int = 1,
+    key: traversal.Key = None,
+) -> bytes:
+    """Decodes data from a pixel buffer.
+
+    Args:
+        buffer: NumPy array or object supporting the buffer protocol.
+        shape (Tuple[int, ...], optional): Shape of the pixels, see as_pixels.
+        Defaults to the array's shape.
+        end (str, optional): End characters of data encoded in legacy mode.
+        Defaults to END.
+        workers (int, optional): Processes reading large payloads, see
+        parallel.extract. None uses every CPU. Defaults to 1.
+        key (traversal.Key, optional): Key of data encoded in the "scatter"
+        order. Defaults to None.
+
+    Returns:
+        bytes: Decoded data.
+    """
+    _, data = read(as_pixels(buffer, shape), end, workers, key)
+    return data
+
+
+def write(
+    pixels: np.ndarray,
+    data: bytes,
+    end: str = END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+    compression: str = None,
+    compression_level: int = None,
+    order: str = "column",
+    key: traversal.Key = None,
+) -> None:
+    """Writes data to pixels in place, after a header or followed by end.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        data (bytes): Data to encode.
+        end (str, optional): End characters written after data in legacy mode.
+        Defaults to END.
+        legacy (bool, optional): Write data followed by end instead of after a
+        header. Defaults to False.
+        bits_per_channel (int, optional): Least significant bits of each
+        channel used, from 1 to 4. Defaults to 1.
+        compression (str, optional): "zlib", "lzma", "auto" or None.
+        Defaults to None.
+        compression_level (int, optional): Compression level from 0 to 9.
+        Defaults to the method's default.
+        order (str, optional): Order the pixels holding data are visited in,
+        one of traversal.ORDERS. Defaults to "column".
+        key (traversal.Key, optional): Key of the "scatter" order, needed to
+        read data back. Defaults to None.
+
+    Raises:
+        ValueError: When the options are not supported or data doesn't fit.
+    """
+    check_options(legacy, bits_per_channel, compression, order, key, compression_level)
+
+    data, flags = compression_module.compress(data, compression, compression_level)
+    place(pixels, data, flags, end, legacy, bits_per_channel, order, key)
+
+
+def place(
+    pixels: np.ndarray,
+    data: bytes,
+    flags: int = 0,
+    end: str = END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+    order: str = "column",
+    key: traversal.Key = None,
+) -> None:
+    """Writes data that is already compressed to pixels in place.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        data (bytes): Data as returned by compression.compress.
+        flags (int, optional): Flags returned by compression.compress.
+        Defaults to 0.
+        end, legacy, bits_per_channel, order, key: Same as in write.
+
+    Raises:
+        ValueError: When data doesn't fit inside pixels.
+    """
+    check_fits(len(data), pixels.shape, end, legacy, bits_per_channel)
+
+    if legacy:
+        data += end.encode("latin-1")
+        engine.embed(pixels, engine.unpack_bits(data))
+    else:
+        payload.embed(pixels, data, flags, bits_per_channel, order, key)
+
+
+def read(
+    pixels: np.ndarray, end: str = END, workers: int = 1, key: traversal.Key = None
+) -> Tuple[Optional[payload.Header], bytes]:
+    """Reads the header, if any, and the data hidden in pixels.
+
+    Data without a header is read until end, as written in legacy mode.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        end (str, optional): End characters of data encoded in legacy mode.
+        Defaults to END.
+        workers (int, optional): Processes reading large payloads, see
+        parallel.extract. None uses every CPU. Defaults to 1.
+        key (traversal.Key, optional): Key of data encoded in the "scatter"
+        order. Defaults to None.
+
+    Raises:
+        ValueError: When the data is corrupted, is a shard of a larger
+        payload or is in the "scatter" order and key is missing.
+
+    Returns:
+        Tuple[Optional[payload.Header], bytes]: Header, or None for data
+        encoded in legacy mode, and the decoded data.
+    """
+    with instrumentation.measure("header"):
+        header = payload.read_header(pixels)
+    if header and header.flags & payload.FLAG_SHARD:
+        raise ValueError("Image holds a shard of a payload, decode it with shards")
+    if header:
+        with instrumentation.measure("extract", bytes=header.length):
+            if header.order == traversal.COLUMN:
+                data = parallel.extract(pixels, header, workers)
+            else:
+                data = payload.extract(pixels, header, key)
+        with instrumentation.measure("decompress", bytes=len(data)) as measurement:
+            data = compression_module.decompress(data, header.flags)
+            measurement.bytes = len(data)
+        return header, data
+
+    with instrumentation.measure("read_until") as measurement:
+        data = engine.read_until(pixels, end.encode("latin-1"))
+        measurement.bytes = len(data)
+    return None, data
@@ -0,0 +1,184 @@
+"""Process-wide cache of decoded cover images.
+
+Covers are cached as read-only pixel arrays, keyed by path, modification time
+and size, or by a hash of their contents when they are given as bytes or file
+objects. Encoding then starts from a copy of the cached pixels instead of
+opening and decoding the file again. The least recently used covers are
+evicted once the cache holds more than max_bytes of pixels.
+"""
+import hashlib
+import io
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, List, NamedTuple, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from . import modes
+
+MAX_BYTES = 512 * 1024 * 1024
+
+CoverSource = Union[str, pathlib.Path, bytes, BinaryIO]
+
+
+class Cover(NamedTuple):
+    """Decoded cover image"""
+
+    pixels: np.ndarray
+    mode: str
+    palette: Optional[List[int]] = None
+
+
+class CacheStats(NamedTuple):
+    """Statistics of a CoverCache"""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+
+class CoverCache:
+    """LRU cache of decoded cover images, bounded by the bytes of their pixels"""
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        """Initialize the class
+
+        Args:
+            max_bytes (int, optional): Most bytes of pixels held at a time.
+            Covers larger than that are decoded but never cached. Defaults to
+            MAX_BYTES.
+        """
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, source: CoverSource) -> np.ndarray:
+        """Returns the pixels of a cover, decoding it only if it isn't cached.
+
+        Args:
+            source (CoverSource): Path, bytes or binary file object of the
+            cover.
+
+        Returns:
+            np.ndarray: Read-only array with the cover's pixels. Copy it before
+            writing to it.
+        """
+        return self.get_cover(source).pixels
+
+    def get_cover(self, source: CoverSource) -> Cover:
+        """Returns a cover, decoding it only if it isn't cached.
+
+        Args:
+            source (CoverSource): Path, bytes or binary file object of the
+            cover.
+
+        Raises:
+            ValueError: When the cover is in mode "I" and isn't 16 bit, see
+            modes.normalize.
+
+        Returns:
+            Cover: Read-only pixels, mode and palette of the cover.
+        """
+        key, source = self._key(source)
+
+        with self._lock:
+            cover = self._entries.get(key)
+            if cover is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cover
+
+            self._misses += 1
+
+        image = modes.normalize(Image.open(source))
+        pixels = np.array(image)
+        pixels.setflags(write=False)
+        cover = Cover(pixels, image.mode, image.getpalette())
+        if pixels.nbytes > self.max_bytes:
+            return cover
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = cover
+                self._size += pixels.nbytes
+                self._evict()
+
+        return cover
+
+    def stats(self) -> CacheStats:
+        """Returns the cache statistics.
+
+        Returns:
+            CacheStats: Hits, misses, evictions, number of cached covers and
+            bytes of pixels held.
+        """
+        with self._lock:
+            return CacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self._size,
+            )
+
+    def clear(self) -> None:
+        """Removes every cover and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._size = self._hits = self._misses = self._evictions = 0
+
+    def _evict(self) -> None:
+        """Removes the least recently used covers until size fits max_bytes."""
+        while self._size > self.max_bytes:
+            _, cover = self._entries.popitem(last=False)
+            self._size -= cover.pixels.nbytes
+            self._evictions += 1
+
+    @staticmethod
+    def _key(source: CoverSource) -> tuple:
+        """Returns the cache key of a cover and where to decode it from.
+
+        Args:
+            source (CoverSource): Path, bytes or binary file object.
+
+        Returns:
+            tuple: Key, and the path or a file object to decode the cover from.
+        """
+        if isinstance(source, (str, pathlib.Path)):
+            stat = os.stat(source)
+            key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+            return key, source
+
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            source = source.read()
+
+        return hashlib.blake2b(source, digest_size=16).digest(), io.BytesIO(source)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> CoverCache:
+    """Returns the process-wide cache, creating it the first time.
+
+    Returns:
+        CoverCache: Cache shared by every Steganography created with cache=True.
+    """
+    global _default
+
+    with _default_lock:
+        if _default is None:
+            _default = CoverCache()
+
+        return _default
@@ -0,0 +1,488 @@
+"""Command line interface, installed as the steganography command.
+
+Images and payloads can be read from stdin and images written to stdout, so
+the commands can be chained in shell pipelines without temporary files.
+Pillow and NumPy are only imported by the subcommands that need them.
+"""
+import argparse
+import base64
+import glob
+import itertools
+import json
+import sys
+from typing import Iterator, List, Union
+
+# formats only imports Pillow when checking WebP support
+from .formats import DEFAULT_PRESET, FORMATS, PRESETS
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs the command line interface.
+
+    Args:
+        argv (List[str], optional): Arguments without the program name.
+        Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as error:
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return 1
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Builds the argument parser with every subcommand.
+
+    Returns:
+        argparse.ArgumentParser: Argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="steganography", description="Hide text and data inside images."
+    )
+    subcommands = parser.add_subparsers(dest="subcommand", required=True)
+
+    encode = subcommands.add_parser(
+        "encode",
+        help="hide a message inside an image",
+        description="Hide a message inside an image and write it as PNG, or as "
+        + "another lossless format. The payload is read from stdin when neither "
+        + "--message nor --file is given.",
+    )
+    encode.add_argument("cover", help="image that will hide the message, - for stdin")
+    payload = encode.add_mutually_exclusive_group()
+    payload.add_argument("-m", "--message", help="text to hide")
+    payload.add_argument("-f", "--file", help="file to hide, - for stdin")
+    encode.add_argument(
+        "-o", "--output", default="-", help="where to save the image, - for stdout"
+    )
+    encode.add_argument(
+        "--format",
+        type=str.upper,
+        choices=FORMATS,
+        default="PNG",
+        help="lossless format of the image (default: PNG)",
+    )
+    encode.add_argument(
+        "--preset",
+        choices=PRESETS,
+        default=DEFAULT_PRESET,
+        help="trade saving time for file size (default: default)",
+    )
+    _add_encoding_arguments(encode)
+    encode.set_defaults(run=_encode)
+
+    decode = subcommands.add_parser(
+        "decode",
+        help="reveal the message hidden inside an image",
+        description="Reveal the message hidden inside an image.",
+    )
+    decode.add_argument(
+        "image", nargs="?", default="-", help="encoded image, - for stdin (default)"
+    )
+    decode.add_argument(
+        "--binary", action="store_true", help="write the hidden bytes as they are"
+    )
+    decode.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="processes reading large payloads, 0 for every CPU (default: 1)",
+    )
+    _add_key_argument(decode)
+    decode.set_defaults(run=_decode)
+
+    capacity = subcommands.add_parser(
+        "capacity",
+        help="print how many bytes fit inside an image",
+        description="Print how many bytes fit inside an image, before compression. "
+        + "Only the image header is read.",
+    )
+    capacity.add_argument("image", help="cover image, - for stdin")
+    capacity.add_argument(
+        "-b",
+        "--bits-per-channel",
+        type=int,
+        default=1,
+        help="least significant bits of each channel to use, from 1 to 4",
+    )
+    capacity.add_argument(
+        "--legacy",
+        action="store_true",
+        help="end the message with a marker instead of writing a header",
+    )
+    capacity.set_defaults(run=_capacity)
+
+    batch = subcommands.add_parser(
+        "batch",
+        help="encode many images across a pool of processes",
+        description="Encode many images across a pool of processes. Each line of "
+        + 'JOBS is a JSON object with "cover", "output" and either "message" (text) '
+        + 'or "payload" (path to a file to hide). One JSON result is printed for '
+        + "each job, in the same order.",
+    )
+    batch.add_argument("jobs", help="JSON Lines file with the jobs, - for stdin")
+    batch.add_argument(
+        "-w", "--workers", type=int, help="number of processes (default: CPUs)"
+    )
+    batch.add_argument(
+        "--chunksize", type=int, default=16, help="jobs sent to a process at a time"
+    )
+    batch.add_argument(
+        "-q", "--quiet", action="store_true", help="don't report progress"
+    )
+    _add_encoding_arguments(batch)
+    batch.set_defaults(run=_batch)
+
+    decode_many = subcommands.add_parser(
+        "decode-many",
+        help="decode many images across a pool of processes",
+        description="Decode many images across a pool of processes. One JSON "
+        + "result is printed for each image as soon as it is decoded.",
+    )
+    decode_many.add_argument(
+        "paths",
+        nargs="+",
+        help="paths or glob patterns of the images, - to read paths from stdin",
+    )
+    decode_many.add_argument(
+        "-w", "--workers", type=int, help="number of processes (default: CPUs)"
+    )
+    decode_many.add_argument(
+        "--chunksize", type=int, default=16, help="images sent to a process at a time"
+    )
+    decode_many.add_argument(
+        "--binary",
+        action="store_true",
+        help='decode bytes, printed base64 encoded as "payload", instead of text',
+    )
+    _add_key_argument(decode_many)
+    decode_many.set_defaults(run=_decode_many)
+
+    probe = subcommands.add_parser(
+        "probe",
+        help="tell which images hold a payload, reading only their header",
+        description="Tell which images hold a payload by reading only the first "
+        + "pixels, where the header is. One JSON result is printed for each "
+        + "image. Images encoded in legacy mode have no header and are reported "
+        + "as not holding a payload.",
+    )
+    probe.add_argument(
+        "paths",
+        nargs="+",
+        help="paths or glob patterns of the images, - to read paths from stdin",
+    )
+    probe.add_argument(
+        "--index",
+        help="SQLite file keeping the results, images are only probed again "
+        + "when their modification time or size change",
+    )
+    probe.add_argument(
+        "-w", "--workers", type=int, default=1, help="threads probing images"
+    )
+    probe.set_defaults(run=_probe)
+
+    return parser
+
+
+def _add_encoding_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments that configure how images are encoded.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of an encoding subcommand.
+    """
+    parser.add_argument(
+        "-b",
+        "--bits-per-channel",
+        type=int,
+        default=1,
+        help="least significant bits of each channel to use, from 1 to 4",
+    )
+    parser.add_argument(
+        "-c",
+        "--compression",
+        choices=("zlib", "lzma", "auto"),
+        help="compress the payload before encoding it",
+    )
+    parser.add_argument(
+        "--compression-level", type=int, help="compression level from 0 to 9"
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="end the message with a marker instead of writing a header",
+    )
+    parser.add_argument(
+        "--order",
+        choices=("column", "row", "scatter"),
+        default="column",
+        help="order the pixels holding the payload are visited in, scatter "
+        + "spreads it across the image and needs --key (default: column)",
+    )
+    _add_key_argument(parser)
+
+
+def _add_key_argument(parser: argparse.ArgumentParser) -> None:
+    """Adds the key of the scatter order.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of a subcommand.
+    """
+    parser.add_argument("-k", "--key", help="key of the scatter order")
+
+
+def _encoding_options(args: argparse.Namespace) -> dict:
+    """Returns the Steganography keyword arguments set by the encoding arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        dict: Keyword arguments.
+    """
+    return {
+        "bits_per_channel": args.bits_per_channel,
+        "compression": args.compression,
+        "compression_level": args.compression_level,
+        "legacy": args.legacy,
+        "order": args.order,
+        "key": args.key,
+    }
+
+
+def _encode(args: argparse.Namespace) -> int:
+    """Runs the encode subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Raises:
+        ValueError: When both the cover and the payload are read from stdin.
+
+    Returns:
+        int: Exit code.
+    """
+    from .steganography import Steganography
+
+    if args.message is None and args.cover == "-" and args.file in (None, "-"):
+        raise ValueError("cover and payload can't both be read from stdin")
+
+    steganography = Steganography(_input(args.cover), **_encoding_options(args))
+    if args.message is not None:
+        steganography.encode(args.message)
+    else:
+        steganography.encode_bytes(_read(args.file or "-"))
+
+    if args.output == "-":
+        steganography.save(sys.stdout.buffer, args.format, args.preset)
+        sys.stdout.flush()
+    else:
+        path = steganography.save(args.output, args.format, args.preset)
+        print(path, file=sys.stderr)
+
+    return 0
+
+
+def _decode(args: argparse.Namespace) -> int:
+    """Runs the decode subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    from .steganography import Steganography
+
+    steganography = Steganography(_input(args.image), key=args.key)
+    workers = args.workers or None
+    if args.binary:
+        sys.stdout.buffer.write(steganography.decode_bytes(workers=workers))
+        sys.stdout.flush()
+    else:
+        print(steganography.decode(workers=workers))
+
+    return 0
+
+
+def _capacity(args: argparse.Namespace) -> int:
+    """Runs the capacity subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    from .steganography import Steganography
+
+    steganography = Steganography(
+        _input(args.image), legacy=args.legacy, bits_per_channel=args.bits_per_channel
+    )
+    print(steganography.capacity())
+
+    return 0
+
+
+def _input(path: str) -> Union[str, bytes]:
+    """Returns path or, if path is -, everything read from stdin.
+
+    Args:
+        path (str): Path of a file or - for stdin.
+
+    Returns:
+        Union[str, bytes]: path or stdin's contents.
+    """
+    if path == "-":
+        return _read(path)
+
+    return path
+
+
+def _read(path: str) -> bytes:
+    """Reads a file or, if path is -, stdin.
+
+    Args:
+        path (str): Path of a file or - for stdin.
+
+    Returns:
+        bytes: Contents.
+    """
+    if path == "-":
+        return sys.stdin.buffer.read()
+
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _batch(args: argparse.Namespace) -> int:
+    """Runs the batch subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: 0 if every job succeeded, 1 otherwise.
+    """
+    from .batch import EncodeJob, encode_many
+
+    if args.jobs == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(args.jobs) as file:
+            lines = file.readlines()
+
+    jobs = []
+    for line in filter(str.strip, lines):
+        job = json.loads(line)
+        if "message" in job:
+            payload = job["message"]
+        else:
+            with open(job["payload"], "rb") as file:
+                payload = file.read()
+
+        jobs.append(EncodeJob(job["cover"], payload, job["output"]))
+
+    def progress(done: int, total: int) -> None:
+        end = "\n" if done == total else ""
+        print(f"\r{done}/{total}", end=end, file=sys.stderr, flush=True)
+
+    results = encode_many(
+        jobs,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        progress=None if args.quiet else progress,
+        **_encoding_options(args),
+    )
+
+    for result in results:
+        line = {"cover": result.job.cover, "output": result.output}
+        line["error"] = result.error
+        print(json.dumps(line))
+
+    return 0 if all(result.error is None for result in results) else 1
+
+
+def _decode_many(args: argparse.Namespace) -> int:
+    """Runs the decode-many subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: 0 if every image was decoded, 1 otherwise.
+    """
+    from .batch import decode_many
+
+    paths = itertools.chain.from_iterable(map(_expand, args.paths))
+    results = decode_many(
+        paths,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        binary=args.binary,
+        key=args.key,
+    )
+
+    exit_code = 0
+    for result in results:
+        line = {"path": result.path}
+        if args.binary and result.message is not None:
+            line["payload"] = base64.b64encode(result.message).decode()
+        else:
+            line["message"] = result.message
+        line["error"] = result.error
+
+        print(json.dumps(line), flush=True)
+        if result.error:
+            exit_code = 1
+
+    return exit_code
+
+
+def _probe(args: argparse.Namespace) -> int:
+    """Runs the probe subcommand.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        int: 0 if every image was probed, 1 otherwise.
+    """
+    from .corpus import CorpusIndex
+
+    paths = itertools.chain.from_iterable(map(_expand, args.paths))
+    exit_code = 0
+    with CorpusIndex(args.index or ":memory:", args.workers) as index:
+        for entry in index.probe(paths):
+            line = {"path": entry.path, "payload": entry.has_payload}
+            line["length"] = entry.header.length if entry.header else None
+            line["error"] = entry.error
+
+            print(json.dumps(line), flush=True)
+            if entry.error:
+                exit_code = 1
+
+    return exit_code
+
+
+def _expand(path: str) -> Iterator[str]:
+    """Expands a path argument lazily.
+
+    Args:
+        path (str): A path, a glob pattern or - to read paths from stdin.
+
+    Returns:
+        Iterator[str]: Paths.
+    """
+    if path == "-":
+        return (line.rstrip("\n") for line in sys.stdin if line.strip())
+    if not glob.has_magic(path):
+        return iter([path])
+
+    return glob.iglob(path, recursive=True)
@@ -0,0 +1,114 @@
+"""Compression applied to the payload before it is embedded.
+
+The method used is stored in the header flags so decoding knows how to
+inflate the payload.
+"""
+import lzma
+import zlib
+from typing import Optional, Tuple
+
+from . import payload
+
+METHODS = ("zlib", "lzma")
+AUTO = "auto"
+
+_FLAGS = {"zlib": payload.FLAG_ZLIB, "lzma": payload.FLAG_LZMA}
+
+
+def check_method(method: Optional[str]) -> None:
+    """Checks if method is supported.
+
+    Args:
+        method (Optional[str]): Compression method.
+
+    Raises:
+        ValueError: When method is not None, AUTO or one of METHODS.
+    """
+    if method is not None and method != AUTO and method not in METHODS:
+        raise ValueError(
+            f"Unknown compression {method!r}, expected one of {METHODS + (AUTO,)}"
+        )
+
+
+def check_level(level: Optional[int]) -> None:
+    """Checks if level is a valid compression level.
+
+    Args:
+        level (Optional[int]): Compression level.
+
+    Raises:
+        ValueError: When level is not None or an integer from 0 to 9.
+    """
+    if level is not None and (
+        isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9
+    ):
+        raise ValueError(f"Compression level must be from 0 to 9, got {level!r}")
+
+
+def compress(
+    data: bytes, method: Optional[str] = AUTO, level: int = None
+) -> Tuple[bytes, int]:
+    """Compresses data if that makes it smaller.
+
+    Args:
+        data (bytes): Data to be compressed.
+        method (Optional[str], optional): One of METHODS, AUTO to use the
+        method that compresses the most or None to not compress. Defaults to
+        AUTO.
+        level (int, optional): Compression level from 0 to 9, higher is smaller
+        but slower. Defaults to each method's default.
+
+    Raises:
+        ValueError: When method or level is not supported.
+
+    Returns:
+        Tuple[bytes, int]: Data, compressed or not, and the header flags that
+        say how it was compressed.
+    """
+    check_method(method)
+    check_level(level)
+    methods = METHODS if method == AUTO else (method,) if method else ()
+
+    best, flags = data, 0
+    for name in methods:
+        compressed = _compress(data, name, level)
+        if len(compressed) < len(best):
+            best, flags = compressed, _FLAGS[name]
+
+    return best, flags
+
+
+def decompress(data: bytes, flags: int) -> bytes:
+    """Decompresses data compressed by compress.
+
+    Args:
+        data (bytes): Data to be decompressed.
+        flags (int): Header flags returned by compress.
+
+    Returns:
+        bytes: Decompressed data, or data itself if flags say it wasn't
+        compressed.
+    """
+    if flags & payload.FLAG_ZLIB:
+        return zlib.decompress(data)
+    if flags & payload.FLAG_LZMA:
+        return lzma.decompress(data, format=lzma.FORMAT_ALONE)
+
+    return data
+
+
+def _compress(data: bytes, method: str, level: int = None) -> bytes:
+    """Compresses data with method.
+
+    Args:
+        data (bytes): Data to be compressed.
+        method (str): One of METHODS.
+        level (int, optional): Compression level. Defaults to method's default.
+
+    Returns:
+        bytes: Compressed data.
+    """
+    if method == "zlib":
+        return zlib.compress(data, -1 if level is None else level)
+
+    return lzma.compress(data, format=lzma.FORMAT_ALONE, preset=level)
@@ -0,0 +1,302 @@
+"""Persistent index of which images of a corpus hold a payload.
+
+Results of probe.probe are kept in a SQLite database keyed by absolute path,
+modification time and size, so indexing a corpus again only probes the files
+that were added or changed since. Files that can't be opened are indexed with
+their error, and probed again once they change.
+"""
+import itertools
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import payload
+from .probe import probe
+
+SCHEMA_VERSION = 1
+BATCH_SIZE = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER,
+    flags INTEGER,
+    bits_per_channel INTEGER,
+    version INTEGER,
+    error TEXT
+)
+"""
+
+
+class Entry(NamedTuple):
+    """Result of probing an image, as stored in the index"""
+
+    path: str
+    mtime_ns: int
+    size: int
+    header: Optional[payload.Header] = None
+    error: Optional[str] = None
+
+    @property
+    def has_payload(self) -> bool:
+        """bool: True if the image holds a payload."""
+        return self.header is not None
+
+
+class IndexStats(NamedTuple):
+    """Files seen by CorpusIndex.update"""
+
+    probed: int
+    unchanged: int
+    errors: int
+
+
+class CorpusIndex:
+    """SQLite index of probe results, only probing files that changed"""
+
+    def __init__(self, path: str = ":memory:", workers: int = 1) -> None:
+        """Initialize the class, creating the database if it doesn't exist.
+
+        Args:
+            path (str, optional): Path of the SQLite database. Defaults to
+            ":memory:", which keeps the index until it is closed.
+            workers (int, optional): Threads probing files at a time, which
+            mostly wait on reading them. Defaults to 1.
+        """
+        self.path = path
+        self.workers = workers
+
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS probes")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._connection.execute(_SCHEMA)
+
+    def update(self, paths: Iterable[str]) -> IndexStats:
+        """Probes the files that aren't indexed or changed since they were.
+
+        Args:
+            paths (Iterable[str]): Paths of the images.
+
+        Returns:
+            IndexStats: Number of files probed, files left as they were and
+            files that couldn't be probed.
+        """
+        probed = unchanged = errors = 0
+        for entry, fresh in self._scan(paths):
+            probed += fresh
+            unchanged += not fresh
+            errors += fresh and entry.error is not None
+
+        return IndexStats(probed, unchanged, errors)
+
+    def probe(self, paths: Iterable[str]) -> Iterator[Entry]:
+        """Yields the result of each file, probing only the ones that changed.
+
+        Args:
+            paths (Iterable[str]): Paths of the images.
+
+        Yields:
+            Entry: Result of each file, in the same order as paths.
+        """
+        for entry, _ in self._scan(paths):
+            yield entry
+
+    def get(self, path: str) -> Optional[Entry]:
+        """Returns the indexed result of a file, without probing it.
+
+        Args:
+            path (str): Path of the image.
+
+        Returns:
+            Optional[Entry]: Result, or None if the file isn't indexed.
+        """
+        row = self._connection.execute(
+            "SELECT * FROM probes WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        return _entry(row) if row else None
+
+    def with_payload(self) -> Iterator[Entry]:
+        """Returns every indexed file holding a payload.
+
+        Returns:
+            Iterator[Entry]: Result of each file, ordered by path.
+        """
+        rows = self._connection.execute(
+            "SELECT * FROM probes WHERE length IS NOT NULL ORDER BY path"
+        )
+        return map(_entry, rows)
+
+    def prune(self) -> int:
+        """Removes the files that no longer exist from the index.
+
+        Returns:
+            int: Number of files removed.
+        """
+        paths = [row[0] for row in self._connection.execute("SELECT path FROM probes")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        with self._connection:
+            self._connection.executemany("DELETE FROM probes WHERE path = ?", missing)
+
+        return len(missing)
+
+    def __len__(self) -> int:
+        """Returns the number of indexed files.
+
+        Returns:
+            int: Number of files.
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the database."""
+        self._connection.close()
+
+    def __enter__(self) -> "CorpusIndex":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _scan(self, paths: Iterable[str]) -> Iterator[Tuple[Entry, bool]]:
+        """Yields the result of each file, probing the ones that changed.
+
+        Paths are read lazily and results are committed every BATCH_SIZE
+        files, so an interrupted scan keeps what it probed.
+
+        Args:
+            paths (Iterable[str]): Paths of the images.
+
+        Yields:
+            Tuple[Entry, bool]: Result of each file, in the same order as
+            paths, and whether it was probed.
+        """
+        with ThreadPoolExecutor(self.workers) as executor:
+            for batch in _batches(paths, BATCH_SIZE):
+                indexed = [self._lookup(path) for path in batch]
+                stale = [path for path, entry in zip(batch, indexed) if not entry]
+
+                probed = list(executor.map(_probe, stale))
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        map(_row, probed),
+                    )
+
+                probed = iter(probed)
+                for entry in indexed:
+                    yield (entry, False) if entry else (next(probed), True)
+
+    def _lookup(self, path: str) -> Optional[Entry]:
+        """Returns the indexed result of a file if it didn't change since.
+
+        Args:
+            path (str): Path of the image.
+
+        Returns:
+            Optional[Entry]: Result, or None if the file isn't indexed, was
+            modified or can't be read.
+        """
+        key = _stat(path)
+        if key is None:
+            return None
+
+        row = self._connection.execute(
+            "SELECT * FROM probes WHERE path = ? AND mtime_ns = ? AND size = ?", key
+        ).fetchone()
+        return _entry(row) if row else None
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[List]:
+    """Splits iterable into lists of size items, the last one may be shorter.
+
+    Args:
+        iterable (Iterable): Items to split, read lazily.
+        size (int): Items of each list.
+
+    Yields:
+        List: Batch of items.
+    """
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def _stat(path: str) -> Optional[Tuple[str, int, int]]:
+    """Returns the key of a file in the index.
+
+    Args:
+        path (str): Path of the image.
+
+    Returns:
+        Optional[Tuple[str, int, int]]: Absolute path, modification time in
+        nanoseconds and size, or None if the file can't be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def _probe(path: str) -> Entry:
+    """Probes a file, catching its errors.
+
+    Args:
+        path (str): Path of the image.
+
+    Returns:
+        Entry: Result, with the error when the file couldn't be probed.
+    """
+    key = _stat(path) or (os.path.abspath(path), 0, 0)
+    try:
+        return Entry(*key, header=probe(path))
+    except Exception as error:
+        return Entry(*key, error=f"{type(error).__name__}: {error}")
+
+
+def _row(entry: Entry) -> tuple:
+    """Returns an entry as a row of the probes table.
+
+    Args:
+        entry (Entry): Result of probing a file.
+
+    Returns:
+        tuple: Values of every column.
+    """
+    header = entry.header or payload.Header(None, None, None, None)
+    return (
+        entry.path,
+        entry.mtime_ns,
+        entry.size,
+        header.length,
+        header.flags,
+        header.bits_per_channel,
+        header.version,
+        entry.error,
+    )
+
+
+def _entry(row: tuple) -> Entry:
+    """Returns a row of the probes table as an entry.
+
+    Args:
+        row (tuple): Values of every column.
+
+    Returns:
+        Entry: Result of probing the file.
+    """
+    path, mtime_ns, size, length, flags, bits_per_channel, version, error = row
+    header = None
+    if length is not None:
+        header = payload.Header(length, flags, bits_per_channel, version)
+
+    return Entry(path, mtime_ns, size, header, error)
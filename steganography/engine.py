@@ -0,0 +1,394 @@
+"""Vectorized engine that writes bits to the least significant bits of pixels.
+
+Pixels are visited column by column (every ``y`` of ``x = 0``, then every ``y``
+of ``x = 1`` and so on) and, by default, each pixel stores one bit in each of
+its channels, which is the layout `Steganography` has always produced.
+embed_runs and extract_runs visit runs of pixels that are consecutive in
+memory, as in the row order, and embed_at and extract_at visit pixels in any
+other order, given the column-major index of each of them.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+FIRST_CHUNK = 256
+MAX_CHUNK = 1 << 20
+
+
+def unpack_bits(data: bytes) -> np.ndarray:
+    """Unpacks bytes into an array of bits, most significant bit first.
+
+    Args:
+        data (bytes): Bytes to be unpacked.
+
+    Returns:
+        np.ndarray: uint8 array with one bit per element.
+    """
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def pack_bits(bits: np.ndarray) -> bytes:
+    """Packs an array of bits into bytes, most significant bit first.
+
+    Args:
+        bits (np.ndarray): Array with one bit per element.
+
+    Returns:
+        bytes: Packed bytes.
+    """
+    return np.packbits(bits).tobytes()
+
+
+def capacity(pixels: np.ndarray, bits_per_channel: int = 1) -> int:
+    """Returns how many bits fit inside pixels.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+
+    Returns:
+        int: Number of bits that can be written.
+    """
+    height, width, channels = pixels.shape
+    return height * width * channels * bits_per_channel
+
+
+def embed(
+    pixels: np.ndarray, bits: np.ndarray, start: int = 0, bits_per_channel: int = 1
+) -> None:
+    """Writes bits to the least significant bits of pixels, in place.
+
+    Bits that don't fit inside the image are ignored. When bits_per_channel is
+    larger than 1 the last channel is padded with zeros.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        bits (np.ndarray): Array of bits to be written.
+        start (int, optional): Index of the first pixel to write to.
+        Defaults to 0.
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+    """
+    channels = pixels.shape[2]
+    skipped = start * channels * bits_per_channel
+    bits = bits[: capacity(pixels, bits_per_channel) - skipped]
+    if not bits.size:
+        return
+
+    bits = _group(bits, bits_per_channel)
+    stop = start + -(-bits.size // channels)
+    values = _read(pixels, start, stop)
+    _merge(values, bits, bits_per_channel)
+    _write(pixels, start, values)
+
+
+def embed_at(
+    pixels: np.ndarray,
+    bits: np.ndarray,
+    positions: np.ndarray,
+    bits_per_channel: int = 1,
+) -> None:
+    """Writes bits to the least significant bits of the pixels at positions.
+
+    Same as embed, visiting the pixels in the order of positions.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        bits (np.ndarray): Array of bits to be written.
+        positions (np.ndarray): Column-major index of each pixel, as returned
+        by traversal.positions. Bits that don't fit inside them are ignored.
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+    """
+    height, _, channels = pixels.shape
+    bits = bits[: len(positions) * channels * bits_per_channel]
+    if not bits.size:
+        return
+
+    bits = _group(bits, bits_per_channel)
+    xs, ys = np.divmod(positions[: -(-bits.size // channels)], height)
+    values = pixels[ys, xs]
+    _merge(values, bits, bits_per_channel)
+    pixels[ys, xs] = values
+
+
+def embed_runs(
+    pixels: np.ndarray,
+    bits: np.ndarray,
+    runs: List[Tuple[int, int]],
+    bits_per_channel: int = 1,
+) -> None:
+    """Writes bits to the least significant bits of runs of pixels, in place.
+
+    Same as embed, visiting the pixels of each run in row-major order.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        bits (np.ndarray): Array of bits to be written.
+        runs (List[Tuple[int, int]]): Row-major index of the first pixel of
+        each run and index after its last pixel, as returned by
+        traversal.row_runs. Bits that don't fit inside them are ignored.
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+    """
+    _, width, channels = pixels.shape
+    n_pixels = sum(stop - start for start, stop in runs)
+    bits = bits[: n_pixels * channels * bits_per_channel]
+    if not bits.size:
+        return
+
+    bits = _group(bits, bits_per_channel)
+    bottom = -(-runs[-1][1] // width)
+    rows = pixels[:bottom]
+    flat = rows.reshape(-1, channels)
+
+    values = np.concatenate([flat[start:stop] for start, stop in runs])
+    _merge(values, bits, bits_per_channel)
+
+    offset = 0
+    for start, stop in runs:
+        flat[start:stop] = values[offset : offset + stop - start]
+        offset += stop - start
+
+    if not np.may_share_memory(flat, rows):
+        # Rows that aren't contiguous are copied by reshape
+        pixels[:bottom] = flat.reshape(rows.shape)
+
+
+def extract(
+    pixels: np.ndarray, start: int, stop: int, bits_per_channel: int = 1
+) -> np.ndarray:
+    """Reads the least significant bits of every channel from start to stop.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        start (int): Index of the first pixel.
+        stop (int): Index after the last pixel.
+        bits_per_channel (int, optional): Bits read from each channel.
+        Defaults to 1.
+
+    Returns:
+        np.ndarray: uint8 array with one bit per element.
+    """
+    return _split(_read(pixels, start, stop), bits_per_channel)
+
+
+def extract_at(
+    pixels: np.ndarray, positions: np.ndarray, bits_per_channel: int = 1
+) -> np.ndarray:
+    """Reads the least significant bits of every channel of the pixels at positions.
+
+    Only the region around positions is read from pixels that aren't arrays,
+    such as ImagePixels.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        positions (np.ndarray): Column-major index of each pixel, as returned
+        by traversal.positions.
+        bits_per_channel (int, optional): Bits read from each channel.
+        Defaults to 1.
+
+    Returns:
+        np.ndarray: uint8 array with one bit per element.
+    """
+    height, _, channels = pixels.shape
+    if not len(positions):
+        return np.empty(0, dtype=np.uint8)
+
+    xs, ys = np.divmod(positions, height)
+    left, right = xs.min(), xs.max() + 1
+    top, bottom = ys.min(), ys.max() + 1
+    region = pixels[top:bottom, left:right]
+    return _split(region[ys - top, xs - left], bits_per_channel)
+
+
+def extract_runs(
+    pixels: np.ndarray, runs: List[Tuple[int, int]], bits_per_channel: int = 1
+) -> np.ndarray:
+    """Reads the least significant bits of every channel of runs of pixels.
+
+    Only the rows holding runs are read from pixels that aren't arrays, such
+    as ImagePixels.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        runs (List[Tuple[int, int]]): Row-major index of the first pixel of
+        each run and index after its last pixel, as returned by
+        traversal.row_runs.
+        bits_per_channel (int, optional): Bits read from each channel.
+        Defaults to 1.
+
+    Returns:
+        np.ndarray: uint8 array with one bit per element.
+    """
+    _, width, channels = pixels.shape
+    if not runs:
+        return np.empty(0, dtype=np.uint8)
+
+    bottom = -(-runs[-1][1] // width)
+    flat = pixels[:bottom, :].reshape(-1, channels)
+    values = np.concatenate([flat[start:stop] for start, stop in runs])
+    return _split(values, bits_per_channel)
+
+
+def read_until(pixels: np.ndarray, end: bytes, start: int = 0) -> bytes:
+    """Reads bytes from pixels until end is found.
+
+    Pixels are read in chunks that grow from FIRST_CHUNK up to MAX_CHUNK pixels,
+    so reading stops shortly after end is written instead of at the last pixel.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        end (bytes): Bytes that mark the end of the data.
+        start (int, optional): Index of the first pixel. Defaults to 0.
+
+    Returns:
+        bytes: Data before end or every byte in the image if end wasn't found.
+    """
+    height, width, _ = pixels.shape
+    n_pixels = height * width
+
+    data = bytearray()
+    pending = np.empty(0, dtype=np.uint8)
+    chunk = FIRST_CHUNK
+
+    while start < n_pixels:
+        stop = min(start + chunk, n_pixels)
+        bits = np.concatenate((pending, extract(pixels, start, stop)))
+        n_bits = bits.size - bits.size % 8
+
+        searched = max(len(data) - len(end) + 1, 0)
+        data += pack_bits(bits[:n_bits])
+        pending = bits[n_bits:]
+
+        index = data.find(end, searched)
+        if index != -1:
+            return bytes(data[:index])
+
+        start = stop
+        chunk = min(chunk * 2, MAX_CHUNK)
+
+    return bytes(data)
+
+
+class ImagePixels:
+    """Read-only view of a Pillow image that converts only the region read"""
+
+    def __init__(self, image) -> None:
+        """Initialize the class
+
+        Args:
+            image (PIL.Image.Image): Image to read pixels from.
+        """
+        self._image = image
+
+        width, height = image.size
+        self.shape = (height, width, len(image.getbands()))
+
+    def __getitem__(self, key: tuple) -> np.ndarray:
+        """Returns the rows and columns selected by key as an array.
+
+        Args:
+            key (tuple): Row and column slices, e.g. pixels[:, start:stop].
+
+        Returns:
+            np.ndarray: Array with shape (rows, columns, channels).
+        """
+        rows, columns = key
+        height, width, channels = self.shape
+        top, bottom, _ = rows.indices(height)
+        left, right, _ = columns.indices(width)
+
+        block = np.asarray(self._image.crop((left, top, right, bottom)))
+        return block.reshape(bottom - top, right - left, channels)
+
+
+def _group(bits: np.ndarray, bits_per_channel: int) -> np.ndarray:
+    """Groups bits into values of bits_per_channel bits, most significant first.
+
+    Args:
+        bits (np.ndarray): Array of bits, the last value is padded with zeros.
+        bits_per_channel (int): Bits of each value.
+
+    Returns:
+        np.ndarray: Array with one value per element.
+    """
+    if bits_per_channel == 1:
+        return bits
+
+    n_values = -(-bits.size // bits_per_channel)
+    padded = np.zeros(n_values * bits_per_channel, dtype=np.uint8)
+    padded[: bits.size] = bits
+    weights = 1 << np.arange(bits_per_channel - 1, -1, -1)
+    return padded.reshape(-1, bits_per_channel) @ weights
+
+
+def _merge(values: np.ndarray, bits: np.ndarray, bits_per_channel: int) -> None:
+    """Replaces the least significant bits of the first channels, in place.
+
+    Args:
+        values (np.ndarray): Array with shape (n_pixels, channels).
+        bits (np.ndarray): Values of bits_per_channel bits, as returned by
+        _group, one for each of the first channels.
+        bits_per_channel (int): Bits replaced in each channel.
+    """
+    flat = values.reshape(-1)
+    n_values = bits.size
+    low = flat[:n_values] >> bits_per_channel << bits_per_channel
+    flat[:n_values] = low | bits.astype(flat.dtype)
+
+
+def _split(values: np.ndarray, bits_per_channel: int) -> np.ndarray:
+    """Splits the least significant bits of values into an array of bits.
+
+    Args:
+        values (np.ndarray): Array of samples, of any shape.
+        bits_per_channel (int): Bits read from each sample.
+
+    Returns:
+        np.ndarray: uint8 array with one bit per element.
+    """
+    values = values.reshape(-1, 1)
+    shifts = np.arange(bits_per_channel - 1, -1, -1, dtype=values.dtype)
+    return ((values >> shifts) & 1).reshape(-1).astype(np.uint8, copy=False)
+
+
+def _read(pixels: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Returns a copy of the pixels from start to stop in column-major order.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        start (int): Index of the first pixel.
+        stop (int): Index after the last pixel.
+
+    Returns:
+        np.ndarray: Array with shape (stop - start, channels).
+    """
+    height, _, channels = pixels.shape
+    first_column, last_column = start // height, -(-stop // height)
+    offset = first_column * height
+
+    columns = pixels[:, first_column:last_column].transpose(1, 0, 2)
+    return columns.reshape(-1, channels)[start - offset : stop - offset].copy()
+
+
+def _write(pixels: np.ndarray, start: int, values: np.ndarray) -> None:
+    """Writes values back to pixels starting at start in column-major order.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        start (int): Index of the first pixel.
+        values (np.ndarray): Array with shape (n_pixels, channels).
+    """
+    height, _, channels = pixels.shape
+    stop = start + len(values)
+    first_column, last_column = start // height, -(-stop // height)
+    offset = first_column * height
+
+    columns = pixels[:, first_column:last_column].transpose(1, 0, 2)
+    flat = columns.reshape(-1, channels)
+    flat[start - offset : stop - offset] = values
+
+    columns = flat.reshape(columns.shape)
+    pixels[:, first_column:last_column] = columns.transpose(1, 0, 2)
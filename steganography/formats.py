@@ -0,0 +1,124 @@
+"""Lossless formats encoded images can be saved as, with presets.
+
+Presets trade saving time for file size, from "fastest" to "smallest". Lossy
+formats, and modes a format would have to convert, would destroy the payload
+and are rejected.
+
+Lossless WebP drops the color of fully transparent pixels unless it is saved
+with the exact option, which older Pillow versions ignore, so RGBA images are
+only saved as WebP when the installed Pillow keeps them.
+"""
+import functools
+import io
+from typing import Optional
+
+FORMATS = ("PNG", "WEBP", "TIFF", "BMP")
+PRESETS = ("fastest", "fast", "default", "small", "smallest")
+DEFAULT_PRESET = "default"
+
+EXTENSIONS = {"PNG": ".png", "WEBP": ".webp", "TIFF": ".tiff", "BMP": ".bmp"}
+
+_MODES = {
+    "PNG": ("L", "LA", "P", "RGB", "RGBA", "I;16", "I;16B"),
+    "WEBP": ("RGB", "RGBA"),
+    "TIFF": ("L", "LA", "P", "RGB", "RGBA", "I;16", "I;16B"),
+    "BMP": ("L", "P", "RGB"),
+}
+
+_WEBP = {"lossless": True, "exact": True}
+_OPTIONS = {
+    "PNG": {
+        "fastest": {"compress_level": 1},
+        "fast": {"compress_level": 3},
+        "default": {"compress_level": 6},
+        "small": {"compress_level": 9},
+        "smallest": {"compress_level": 9, "optimize": True},
+    },
+    "WEBP": {
+        "fastest": {**_WEBP, "quality": 0, "method": 0},
+        "fast": {**_WEBP, "quality": 25, "method": 2},
+        "default": {**_WEBP, "quality": 80, "method": 4},
+        "small": {**_WEBP, "quality": 100, "method": 5},
+        "smallest": {**_WEBP, "quality": 100, "method": 6},
+    },
+    "TIFF": {
+        "fastest": {},
+        "fast": {"compression": "packbits"},
+        "default": {"compression": "tiff_lzw"},
+        "small": {"compression": "tiff_adobe_deflate"},
+        "smallest": {"compression": "tiff_adobe_deflate"},
+    },
+    "BMP": {preset: {} for preset in PRESETS},
+}
+
+
+def check_format(format: str, mode: Optional[str] = None) -> str:
+    """Checks if images can be saved as format without losing the payload.
+
+    Args:
+        format (str): Format name, case insensitive, such as "png".
+        mode (Optional[str], optional): Mode of the image that will be saved.
+        Defaults to None, which only checks the format.
+
+    Raises:
+        ValueError: When format is lossy or unknown or can't store mode as it
+        is.
+
+    Returns:
+        str: Format name in upper case, one of FORMATS.
+    """
+    name = format.upper()
+    if name not in FORMATS:
+        raise ValueError(
+            f"Format must be one of {FORMATS}, got {format}. Lossy formats "
+            + "such as JPEG would destroy the hidden message"
+        )
+    if mode is not None and mode not in _MODES[name]:
+        raise ValueError(f"{name} can't store {mode} images without converting them")
+    if name == "WEBP" and mode == "RGBA" and not _webp_keeps_transparent_pixels():
+        raise ValueError(
+            "This version of Pillow can't save WEBP without changing transparent "
+            + "pixels, save RGBA images as PNG or TIFF instead"
+        )
+
+    return name
+
+
+def save_options(format: str, preset: str = DEFAULT_PRESET) -> dict:
+    """Returns the Pillow save options of a preset.
+
+    Args:
+        format (str): Format name, one of FORMATS.
+        preset (str, optional): One of PRESETS. Defaults to DEFAULT_PRESET.
+
+    Raises:
+        ValueError: When format or preset are not supported.
+
+    Returns:
+        dict: Keyword arguments for PIL.Image.Image.save, format included.
+    """
+    name = check_format(format)
+    if preset not in PRESETS:
+        raise ValueError(f"Preset must be one of {PRESETS}, got {preset}")
+
+    return {"format": name, **_OPTIONS[name][preset]}
+
+
+@functools.lru_cache(maxsize=None)
+def _webp_keeps_transparent_pixels() -> bool:
+    """Checks if Pillow saves the color of fully transparent pixels as WebP.
+
+    Returns:
+        bool: True if an RGBA image saved with _WEBP reads back unchanged.
+    """
+    from PIL import Image, features
+
+    if not features.check("webp"):
+        return False
+
+    pixels = b"".join(bytes((idx, 255 - idx, idx * 7 % 256, 0)) for idx in range(64))
+    image = Image.frombytes("RGBA", (8, 8), pixels)
+
+    file = io.BytesIO()
+    image.save(file, "WEBP", **_WEBP)
+    return Image.open(file).tobytes() == pixels
@@ -0,0 +1,355 @@
+"""Use the frames of animated and multi-page images as one large carrier.
+
+The payload is compressed once and written to as many frames as it needs,
+from the first one, each frame holding a shard as described in shards. Frames
+are visited lazily with ImageSequence, so decoding stops at the last frame
+holding the payload.
+
+Encoded images are saved as multi-page TIFF, written one frame at a time, or
+as animated PNG, which Pillow assembles in memory. Pillow can't copy a frame
+without decoding it, so frames the payload doesn't need are decoded and
+written back one at a time, but their pixels are left untouched. Frames keep
+their mode, except palette frames, such as those of GIF, which are converted to
+RGB, or RGBA when they have transparency: GIF frames often use more colors
+than a palette hiding a payload can keep, see palette. 16 bit frames opened as
+mode "I" are converted to "I;16", see modes, and frames in other modes are
+rejected.
+
+Animated PNG stores a single mode, so when saving as PNG every frame is
+converted to a mode that holds all of them without losing colors or
+transparency: RGBA if any frame has transparency, RGB if any has colors, and
+LA or L otherwise. Animated PNG can't hold 16 bit frames, so those are only
+saved as TIFF.
+"""
+import os
+import uuid
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageSequence, TiffImagePlugin
+
+from . import buffers
+from . import compression as compression_module
+from . import engine, modes, payload, shards
+from .steganography import ImageSource, Steganography
+
+FORMATS = ("TIFF", "PNG")
+
+_EXTENSIONS = {".tif": "TIFF", ".tiff": "TIFF", ".png": "PNG", ".apng": "PNG"}
+_MODES = ("L", "LA", "RGB", "RGBA", "I;16", "I;16B")
+_PALETTE_MODES = ("P", "PA")
+_16_BITS = ("I;16", "I;16B")
+
+
+def capacity(source: ImageSource, bits_per_channel: int = 1, format: str = None) -> int:
+    """Returns how many bytes fit inside every frame of an image together.
+
+    Only the size and mode of each frame are read, and the pixels of frames
+    opened as mode "I", which must fit in 16 bits.
+
+    Args:
+        source (ImageSource): Path, bytes, binary file object or PIL image.
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+        format (str, optional): "TIFF" or "PNG", the format the image will be
+        saved as. Frames saved as PNG all take a mode holding every frame.
+        Defaults to "TIFF", where each frame keeps its own mode.
+
+    Raises:
+        ValueError: When a frame's mode is not supported, see _mode, or
+        frames saved as PNG are 16 bit.
+
+    Returns:
+        int: Number of bytes, after compression.
+    """
+    image = Steganography._open(source, normalize=False)
+    mode = _png_mode(image) if format and format.upper() == "PNG" else None
+    return sum(_capacity(shape, bits_per_channel) for shape in _shapes(image, mode))
+
+
+def encode(
+    source: ImageSource,
+    output: Union[str, BinaryIO],
+    data: bytes,
+    format: str = None,
+    bits_per_channel: int = 1,
+    compression: str = None,
+    compression_level: int = None,
+) -> None:
+    """Encodes data across the frames of an image and saves it.
+
+    Fails before writing anything when data doesn't fit inside every frame
+    together.
+
+    Args:
+        source (ImageSource): Path, bytes, binary file object or PIL image,
+        with one or more frames.
+        output (Union[str, BinaryIO]): Path to save the image to, or a binary
+        file object to write it to.
+        data (bytes): Data to encode.
+        format (str, optional): "TIFF" or "PNG". Defaults to the format of
+        output's extension.
+        bits_per_channel, compression, compression_level: Same as in
+        Steganography.
+
+    Raises:
+        ValueError: When the options, the format or a frame's mode are not
+        supported or data doesn't fit.
+    """
+    buffers.check_options(
+        False, bits_per_channel, compression, compression_level=compression_level
+    )
+    format = _format(output, format)
+
+    data, flags = compression_module.compress(data, compression, compression_level)
+    image = Steganography._open(source, normalize=False)
+    # Animated PNG stores every frame in one mode
+    mode = _png_mode(image) if format == "PNG" else None
+    chunks = _split(data, image, bits_per_channel, mode)
+
+    payload_id = uuid.uuid4().bytes
+    encoded = iter(
+        [
+            shards.PREFIX.pack(payload_id, index, len(chunks)) + chunk
+            for index, chunk in enumerate(chunks)
+        ]
+    )
+    options = (flags | payload.FLAG_SHARD, buffers.END, False, bits_per_channel)
+
+    frames = _frames(image, encoded, options, mode)
+    if format == "TIFF":
+        with TiffImagePlugin.AppendingTiffWriter(output, new=True) as file:
+            for frame, _ in frames:
+                frame.save(file, format="TIFF")
+                file.newFrame()
+    else:
+        frames, durations = zip(
+            *((frame, info.get("duration", 0)) for frame, info in frames)
+        )
+        frames[0].save(
+            output,
+            format="PNG",
+            save_all=True,
+            append_images=list(frames[1:]),
+            duration=list(durations),
+            loop=image.info.get("loop", 0),
+        )
+
+
+def decode(source: ImageSource) -> bytes:
+    """Decodes data encoded across frames, reading only the frames holding it.
+
+    Args:
+        source (ImageSource): Path, bytes, binary file object or PIL image.
+
+    Raises:
+        ValueError: When the image doesn't hold data encoded across frames or
+        some frames are missing.
+
+    Returns:
+        bytes: Decoded data.
+    """
+    image = Steganography._open(source, normalize=False)
+    return shards.join(_read(image))
+
+
+def _read(image: Image.Image) -> Iterator[shards.Shard]:
+    """Reads the shard of each frame until the last one is read.
+
+    Args:
+        image (Image.Image): Image with one or more frames.
+
+    Yields:
+        shards.Shard: Shard of each frame, in order.
+    """
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        shard = shards.read_pixels(engine.ImagePixels(modes.normalize(frame)))
+        yield shard
+        if index + 1 >= shard.count:
+            return
+
+
+def _frames(
+    image: Image.Image, encoded: Iterator[bytes], options: tuple, mode: str = None
+) -> Iterator[Tuple[Image.Image, dict]]:
+    """Yields every frame, with encoded written to the first frames.
+
+    Args:
+        image (Image.Image): Image with one or more frames.
+        encoded (Iterator[bytes]): Shard written to each of the first frames.
+        options (tuple): Flags, end, legacy and bits_per_channel, as taken by
+        buffers.place.
+        mode (str, optional): Mode every frame is converted to. Defaults to
+        None, which keeps the mode of each frame, see _mode.
+
+    Yields:
+        Tuple[Image.Image, dict]: Frame, decoded one at a time, and the info
+        of the original frame, such as its duration.
+    """
+    for frame in ImageSequence.Iterator(image):
+        info = dict(frame.info)
+        frame_mode = mode or _mode(frame)
+        # Copies frames already in frame_mode too, since the iterator reuses
+        # the image for every frame
+        frame = modes.normalize(frame).convert(frame_mode)
+
+        data = next(encoded, None)
+        if data is not None:
+            pixels = np.array(frame)
+            buffers.place(buffers.as_pixels(pixels), data, *options)
+            # Older Pillow versions make mode "I" images out of 16 bit arrays
+            frame = Image.frombytes(frame_mode, frame.size, pixels.tobytes())
+
+        yield frame, info
+
+
+def _split(
+    data: bytes, image: Image.Image, bits_per_channel: int, mode: str = None
+) -> List[bytes]:
+    """Splits data across the first frames, filling each one in turn.
+
+    Args:
+        data (bytes): Data to split.
+        image (Image.Image): Image with one or more frames.
+        bits_per_channel (int): Bits written to each channel.
+        mode (str, optional): Mode every frame is converted to, as in _frames.
+        Defaults to None.
+
+    Raises:
+        ValueError: When data doesn't fit inside every frame together.
+
+    Returns:
+        List[bytes]: Part of data written to each frame, in order.
+    """
+    chunks, start = [], 0
+    for shape in _shapes(image, mode):
+        end = start + _capacity(shape, bits_per_channel)
+        chunks.append(data[start:end])
+        start = end
+        if start >= len(data):
+            return chunks
+
+    raise ValueError(
+        f"Payload of {len(data)} bytes doesn't fit inside the frames, "
+        + f"which hold {start} bytes"
+    )
+
+
+def _shapes(image: Image.Image, mode: str = None) -> Iterator[Tuple[int, int, int]]:
+    """Yields the shape of each frame, seeking back to the first one after.
+
+    Args:
+        image (Image.Image): Image with one or more frames.
+        mode (str, optional): Mode every frame is converted to, as in _frames.
+        Defaults to None.
+
+    Yields:
+        Tuple[int, int, int]: Height, width and channels of each frame.
+    """
+    try:
+        for index in range(getattr(image, "n_frames", 1)):
+            image.seek(index)
+            width, height = image.size
+            yield height, width, Image.getmodebands(mode or _mode(image))
+    finally:
+        image.seek(0)
+
+
+def _mode(frame: Image.Image) -> str:
+    """Returns the mode a frame is encoded in.
+
+    Args:
+        frame (Image.Image): Frame of an image.
+
+    Raises:
+        ValueError: When the frame is neither in a mode the payload can be
+        written to, nor a palette frame, nor a 16 bit frame in mode "I".
+
+    Returns:
+        str: Mode of the frame if the payload can be written to it as it is,
+        "I;16" for 16 bit frames in mode "I", and RGBA for palette frames
+        with transparency and RGB for the others.
+    """
+    if frame.mode in _MODES:
+        return frame.mode
+    if frame.mode == "I":
+        return modes.normalize(frame).mode
+    if frame.mode in _PALETTE_MODES:
+        if "A" in frame.getbands() or "transparency" in frame.info:
+            return "RGBA"
+        return "RGB"
+
+    raise ValueError(
+        f"Frames in mode {frame.mode} are not supported, convert them to one of "
+        + f"{_MODES}"
+    )
+
+
+def _png_mode(image: Image.Image) -> str:
+    """Returns the mode every frame is converted to when saved as PNG.
+
+    Args:
+        image (Image.Image): Image with one or more frames.
+
+    Raises:
+        ValueError: When a frame's mode is not supported or frames are 16 bit.
+
+    Returns:
+        str: Mode holding the colors and transparency of every frame.
+    """
+    try:
+        frame_modes = set()
+        for index in range(getattr(image, "n_frames", 1)):
+            image.seek(index)
+            frame_modes.add(_mode(image))
+    finally:
+        image.seek(0)
+
+    if frame_modes & set(_16_BITS):
+        raise ValueError("16 bit frames can't be saved as PNG, save them as TIFF")
+
+    alpha = bool(frame_modes & {"LA", "RGBA"})
+    color = bool(frame_modes & {"RGB", "RGBA"})
+    if color:
+        return "RGBA" if alpha else "RGB"
+    return "LA" if alpha else "L"
+
+
+def _capacity(shape: Tuple[int, int, int], bits_per_channel: int) -> int:
+    """Returns how many bytes of data fit inside a frame, besides its prefix.
+
+    Args:
+        shape (Tuple[int, int, int]): Height, width and channels of the frame.
+        bits_per_channel (int): Bits written to each channel.
+
+    Returns:
+        int: Number of bytes.
+    """
+    available = buffers.capacity(shape, bits_per_channel=bits_per_channel)
+    return max(available - shards.PREFIX.size, 0)
+
+
+def _format(output: Union[str, BinaryIO], format: Optional[str]) -> str:
+    """Returns the format to save output as.
+
+    Args:
+        output (Union[str, BinaryIO]): Path or binary file object.
+        format (Optional[str]): Format asked for, if any.
+
+    Raises:
+        ValueError: When the format is not supported or can't be guessed.
+
+    Returns:
+        str: One of FORMATS.
+    """
+    if format is None and isinstance(output, str):
+        _, extension = os.path.splitext(output)
+        format = _EXTENSIONS.get(extension.lower())
+    if format is None:
+        raise ValueError(f"Can't guess the format of {output}, pass one of {FORMATS}")
+
+    format = format.upper()
+    if format not in FORMATS:
+        raise ValueError(f"Format must be one of {FORMATS}, got {format}")
+
+    return format
@@ -0,0 +1,240 @@
+"""Per-stage timings of encode, decode and save, and a sampling profiler.
+
+Every operation reports the duration, pixels and bytes of each of its stages
+to the hooks that are registered, followed by a "total" event for the whole
+operation:
+
+- open: "total", opening the image or reading it from the cache.
+- encode: "compress", "load" (decoding and copying the cover's pixels),
+  "embed" (writing the bits), "to_image" and "total".
+- decode: "open", "header", "extract" (reading the bits), "decompress", or
+  "read_until" for legacy images, and "total".
+- save: "total", encoding the image file and writing it, with the size of
+  the file as bytes when it is saved to a path.
+
+Hooks are called on the thread running the operation and should return
+quickly, for example by handing the event to a metrics client. Nothing is
+timed while no hook is registered.
+"""
+import collections
+import contextlib
+import contextvars
+import sys
+import threading
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+
+class StageEvent(NamedTuple):
+    """Duration and size of a stage of an operation"""
+
+    operation: Optional[str]
+    stage: str
+    duration: float
+    pixels: int = 0
+    bytes: int = 0
+
+
+Hook = Callable[[StageEvent], None]
+
+
+class Measurement:
+    """Pixels and bytes of a stage, which can be set while it runs"""
+
+    __slots__ = ("pixels", "bytes")
+
+    def __init__(self, pixels: int = 0, bytes: int = 0) -> None:
+        self.pixels = pixels
+        self.bytes = bytes
+
+
+_hooks: Tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+_operation = contextvars.ContextVar("operation", default=None)
+
+
+def add_hook(hook: Hook) -> None:
+    """Registers a hook called with every StageEvent, from every thread.
+
+    Args:
+        hook (Hook): Function called with each event.
+    """
+    global _hooks
+
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: Hook) -> None:
+    """Unregisters a hook.
+
+    Args:
+        hook (Hook): Function given to add_hook.
+
+    Raises:
+        ValueError: When hook is not registered.
+    """
+    global _hooks
+
+    with _hooks_lock:
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+@contextlib.contextmanager
+def record() -> Iterator[List[StageEvent]]:
+    """Collects every StageEvent emitted inside the block.
+
+    Yields:
+        List[StageEvent]: Events, appended as they are emitted.
+    """
+    events = []
+    add_hook(events.append)
+    try:
+        yield events
+    finally:
+        remove_hook(events.append)
+
+
+@contextlib.contextmanager
+def operation(name: str, pixels: int = 0, bytes: int = 0) -> Iterator[Measurement]:
+    """Times an operation, the stages inside it are reported as part of it.
+
+    Args:
+        name (str): Operation, such as "encode".
+        pixels (int, optional): Pixels of the image. Defaults to 0.
+        bytes (int, optional): Bytes of the payload. Defaults to 0.
+
+    Yields:
+        Measurement: Pixels and bytes reported in the "total" event.
+    """
+    token = _operation.set(name)
+    try:
+        with measure("total", pixels, bytes) as measurement:
+            yield measurement
+    finally:
+        _operation.reset(token)
+
+
+@contextlib.contextmanager
+def measure(stage: str, pixels: int = 0, bytes: int = 0) -> Iterator[Measurement]:
+    """Times a stage of the current operation and reports it to every hook.
+
+    The stage is reported even when it raises.
+
+    Args:
+        stage (str): Stage, such as "compress".
+        pixels (int, optional): Pixels processed. Defaults to 0.
+        bytes (int, optional): Bytes processed. Defaults to 0.
+
+    Yields:
+        Measurement: Pixels and bytes reported, to be set when they are only
+        known once the stage ran.
+    """
+    measurement = Measurement(pixels, bytes)
+    if not _hooks:
+        yield measurement
+        return
+
+    start = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        duration = time.perf_counter() - start
+        event = StageEvent(
+            _operation.get(),
+            stage,
+            duration,
+            measurement.pixels,
+            measurement.bytes,
+        )
+        for hook in _hooks:
+            hook(event)
+
+
+class Profile:
+    """Call stacks sampled while profiling"""
+
+    def __init__(self) -> None:
+        """Initialize the class"""
+        self.samples = collections.Counter()
+
+    def hot_paths(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Returns the call stacks sampled the most.
+
+        Args:
+            limit (int, optional): Number of stacks. Defaults to 10.
+
+        Returns:
+            List[Tuple[str, int]]: Stacks, from the outermost call to the
+            innermost separated by semicolons, and their number of samples.
+        """
+        return self.samples.most_common(limit)
+
+    def dump(self, file: TextIO = None) -> None:
+        """Writes every stack and its samples, one per line.
+
+        The output is in the collapsed format read by flame graph tools.
+
+        Args:
+            file (TextIO, optional): Text file to write to. Defaults to
+            sys.stderr.
+        """
+        file = file or sys.stderr
+        for stack, count in self.samples.most_common():
+            file.write(f"{stack} {count}\n")
+
+
+@contextlib.contextmanager
+def profile(interval: float = 0.001) -> Iterator[Profile]:
+    """Samples the call stack of the current thread while the block runs.
+
+    A background thread reads the stack every interval seconds, so the
+    profiled code runs unchanged and the overhead stays low.
+
+    Args:
+        interval (float, optional): Seconds between samples. Defaults to
+        0.001.
+
+    Yields:
+        Profile: Samples, complete once the block exits.
+    """
+    result = Profile()
+    target = threading.get_ident()
+    stop = threading.Event()
+
+    def sample() -> None:
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                result.samples[_stack(frame)] += 1
+
+    sampler = threading.Thread(target=sample, name="steganography-profiler")
+    sampler.daemon = True
+    sampler.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        sampler.join()
+
+
+def _stack(frame) -> str:
+    """Formats a call stack, from the outermost call to frame.
+
+    Args:
+        frame (FrameType): Innermost frame.
+
+    Returns:
+        str: One "module:function" entry for each frame, separated by
+        semicolons.
+    """
+    entries = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", code.co_filename)
+        entries.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+
+    return ";".join(reversed(entries))
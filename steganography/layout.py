@@ -0,0 +1,99 @@
+"""How payloads are laid out in an image, without reading any pixel.
+
+Shared by the NumPy engine used by buffers and by the pure-Python engine in
+pure: the end characters of legacy mode, which options can be used together
+and how many bytes fit inside pixels of a given shape.
+"""
+from typing import Tuple
+
+from . import compression as compression_module
+from . import payload, traversal
+
+END = r"\end"
+
+
+def check_options(
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+    compression: str = None,
+    order: str = "column",
+    key: traversal.Key = None,
+    compression_level: int = None,
+) -> None:
+    """Checks if the encoding options are supported together.
+
+    Args:
+        legacy (bool, optional): Legacy mode. Defaults to False.
+        bits_per_channel (int, optional): Bits per channel. Defaults to 1.
+        compression (str, optional): Compression method. Defaults to None.
+        order (str, optional): Order of the payload's pixels. Defaults to
+        "column".
+        key (traversal.Key, optional): Key of the "scatter" order. Defaults to
+        None.
+        compression_level (int, optional): Compression level. Defaults to None.
+
+    Raises:
+        ValueError: When an option is not supported or is used in legacy mode.
+    """
+    payload.check_bits_per_channel(bits_per_channel)
+    compression_module.check_method(compression)
+    compression_module.check_level(compression_level)
+    traversal.check_order(order, key)
+    if legacy and (bits_per_channel != 1 or compression or order != "column"):
+        raise ValueError(
+            "Legacy mode only supports 1 bit per channel, no compression and "
+            + "the column order"
+        )
+
+
+def capacity(
+    shape: Tuple[int, int, int],
+    end: str = END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+) -> int:
+    """Returns how many bytes of data fit inside pixels of a given shape.
+
+    Only the shape is needed, so it can be called before any pixel is read.
+    The bytes taken by the header, or by end in legacy mode, are excluded.
+
+    Args:
+        shape (Tuple[int, int, int]): Shape of the pixels, (height, width,
+        channels).
+        end, legacy, bits_per_channel: Same as in buffers.write.
+
+    Returns:
+        int: Number of bytes, after compression.
+    """
+    height, width, channels = shape
+    if legacy:
+        return max(height * width * channels // 8 - len(end.encode("latin-1")), 0)
+
+    return payload.capacity(width, height, channels, bits_per_channel)
+
+
+def check_fits(
+    length: int,
+    shape: Tuple[int, int, int],
+    end: str = END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+) -> None:
+    """Checks if data fits inside pixels of a given shape.
+
+    Args:
+        length (int): Length of the data in bytes, after compression.
+        shape (Tuple[int, int, int]): Shape of the pixels, (height, width,
+        channels).
+        end, legacy, bits_per_channel: Same as in buffers.write.
+
+    Raises:
+        ValueError: When data doesn't fit.
+    """
+    available = capacity(shape, end, legacy, bits_per_channel)
+    if length > available:
+        height, width, _ = shape
+        raise ValueError(
+            f"Payload of {length} bytes doesn't fit inside a {width}x{height} "
+            + f"image, which holds {available} bytes"
+        )
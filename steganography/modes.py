@@ -0,0 +1,36 @@
+"""Pillow modes images are encoded in.
+
+Older Pillow versions open 16 bit grayscale images as mode "I", with 32 bit
+signed samples, and make mode "I" images out of 16 bit arrays. Those images
+are converted to "I;16" when every sample fits in 16 bits, so they are encoded
+in the least significant bits of their own samples.
+"""
+from PIL import Image
+
+MODES = ("L", "LA", "P", "RGB", "RGBA", "I;16", "I;16B")
+
+
+def normalize(image: Image.Image) -> Image.Image:
+    """Returns a 16 bit image opened as mode "I" in mode "I;16".
+
+    Args:
+        image (Image.Image): Image in any mode.
+
+    Raises:
+        ValueError: When image is in mode "I" and has samples that don't fit
+        in 16 bits.
+
+    Returns:
+        Image.Image: Image converted to "I;16", or image itself if it isn't in
+        mode "I".
+    """
+    if image.mode != "I":
+        return image
+
+    low, high = image.getextrema()
+    if low < 0 or high > 0xFFFF:
+        raise ValueError(
+            f"Mode I images must hold 16 bit samples, got samples from {low} to {high}"
+        )
+
+    return image.convert("I;16")
@@ -0,0 +1,64 @@
+"""Palettes that keep the colors of palette images hiding a payload.
+
+The payload of palette images ("P") is written to the least significant bits
+of the palette indices. With the image's own palette, flipping those bits
+jumps to an unrelated color, so the palette is rewritten first: each color
+used by the image gets a block of 2 ** bits_per_channel identical entries and
+pixels point to the first entry of their color's block. Whatever bits are
+written, a pixel stays inside its block and keeps its exact color.
+
+The trade-off is that only images with up to 256 >> bits_per_channel colors,
+128 with one bit per index, can be encoded, and the palette indices of every
+pixel change even where the payload isn't written. Images with more colors
+are rejected and have to be converted to RGB first.
+"""
+from typing import List, Sequence, Tuple
+
+ENTRIES = 256
+
+
+def spread(
+    palette: Sequence[int], counts: Sequence[int], bits_per_channel: int = 1
+) -> Tuple[bytes, List[int]]:
+    """Returns a palette with a block of identical entries for each used color.
+
+    Args:
+        palette (Sequence[int]): RGB palette of the image, as returned by
+        Image.getpalette. Missing entries are black.
+        counts (Sequence[int]): Number of pixels of each palette index, as
+        returned by Image.histogram.
+        bits_per_channel (int, optional): Bits written to each index, which
+        sets the size of each block. Defaults to 1.
+
+    Raises:
+        ValueError: When the image uses more colors than there are blocks.
+
+    Returns:
+        Tuple[bytes, List[int]]: Translation table from each index to the
+        first index of its color's block, and the new RGB palette.
+    """
+    block = 1 << bits_per_channel
+    palette = list(palette[: ENTRIES * 3]) + [0] * (ENTRIES * 3 - len(palette))
+
+    used = [index for index, count in enumerate(counts[:ENTRIES]) if count]
+    colors = [tuple(palette[index * 3 : index * 3 + 3]) for index in used]
+    # Distinct colors, in the order of their first index
+    blocks = {color: n for n, color in enumerate(dict.fromkeys(colors))}
+
+    if len(blocks) > ENTRIES // block:
+        raise ValueError(
+            f"Palette images hiding {bits_per_channel} bits per index can use up "
+            + f"to {ENTRIES // block} colors, got {len(blocks)}. Convert the "
+            + "image to RGB first"
+        )
+
+    table = bytearray(ENTRIES)
+    for index, color in zip(used, colors):
+        table[index] = blocks[color] * block
+
+    result = [0] * (ENTRIES * 3)
+    for color, position in blocks.items():
+        first = position * block * 3
+        result[first : first + block * 3] = color * block
+
+    return bytes(table), result
@@ -0,0 +1,126 @@
+"""Extract large payloads across a pool of processes.
+
+The pixels holding the payload are copied once, in the order they are read,
+to a block of shared memory that every process attaches to instead of
+receiving a pickled copy. The payload's pixel range is split into chunks of a
+multiple of 8 pixels, so each chunk holds whole bytes and the results only
+have to be joined in order.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+import numpy as np
+
+from . import engine, payload
+
+MIN_PIXELS = 1 << 20
+CHUNKS_PER_WORKER = 4
+
+
+def extract(
+    pixels: np.ndarray,
+    header: payload.Header,
+    workers: int = None,
+    min_pixels: int = MIN_PIXELS,
+) -> bytes:
+    """Reads the payload described by header across a pool of processes.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        header (payload.Header): Header read with payload.read_header.
+        workers (int, optional): Number of processes, 1 reads the payload in
+        the current process. Defaults to the number of CPUs.
+        min_pixels (int, optional): Payloads in fewer pixels are read in the
+        current process, since starting processes would take longer.
+        Defaults to MIN_PIXELS.
+
+    Raises:
+        ValueError: When the header says the payload is larger than the image.
+
+    Returns:
+        bytes: Payload.
+    """
+    start, stop = payload.payload_range(pixels.shape, header)
+    workers = workers or os.cpu_count()
+    if workers == 1 or stop - start < min_pixels:
+        return payload.extract(pixels, header)
+
+    height, _, channels = pixels.shape
+    first_column, last_column = start // height, -(-stop // height)
+    offset = first_column * height
+    shape = ((last_column - first_column) * height, 1, channels)
+    columns = pixels[:, first_column:last_column].transpose(1, 0, 2)
+    dtype = columns.dtype.str
+
+    memory = shared_memory.SharedMemory(create=True, size=columns.nbytes)
+    try:
+        shared = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        shared.reshape(-1, height, channels)[:] = columns
+        del shared, columns
+
+        ranges = _split(start - offset, stop - offset, workers * CHUNKS_PER_WORKER)
+        with ProcessPoolExecutor(workers) as executor:
+            parts = executor.map(
+                _extract,
+                itertools.repeat(memory.name),
+                itertools.repeat(shape),
+                itertools.repeat(dtype),
+                *zip(*ranges),
+                itertools.repeat(header.bits_per_channel),
+            )
+            data = b"".join(parts)
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return data[: header.length]
+
+
+def _split(start: int, stop: int, n_chunks: int) -> List[Tuple[int, int]]:
+    """Splits a range of pixels into chunks of a multiple of 8 pixels.
+
+    Args:
+        start (int): Index of the first pixel.
+        stop (int): Index after the last pixel.
+        n_chunks (int): Number of chunks wanted.
+
+    Returns:
+        List[Tuple[int, int]]: Start and stop of each chunk, in order.
+    """
+    size = -(-(stop - start) // n_chunks)
+    size = max(-(-size // 8) * 8, 8)
+    return [(i, min(i + size, stop)) for i in range(start, stop, size)]
+
+
+def _extract(
+    name: str,
+    shape: Tuple[int, int, int],
+    dtype: str,
+    start: int,
+    stop: int,
+    bits_per_channel: int,
+) -> bytes:
+    """Reads a chunk of pixels from shared memory.
+
+    Args:
+        name (str): Name of the shared memory block.
+        shape (Tuple[int, int, int]): Shape of the pixels in the block.
+        dtype (str): Type of the samples.
+        start (int): Index of the first pixel.
+        stop (int): Index after the last pixel.
+        bits_per_channel (int): Bits read from each channel.
+
+    Returns:
+        bytes: Bytes held by the chunk.
+    """
+    memory = shared_memory.SharedMemory(name)
+    try:
+        pixels = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        bits = engine.extract(pixels, start, stop, bits_per_channel)
+        del pixels
+        return engine.pack_bits(bits)
+    finally:
+        memory.close()
@@ -0,0 +1,291 @@
+"""Versioned container that stores the payload length in a header.
+
+The header is written to the first pixels of the image, one bit per channel,
+followed by the payload starting at the next pixel with as many bits per
+channel as the header says. Knowing the length up front means only the pixels
+that hold the payload have to be read.
+
+    +-------+---------+-------+------------------+--------+
+    | magic | version | flags | bits_per_channel | length |
+    +-------+---------+-------+------------------+--------+
+    | 4B    | 1B      | 1B    | 1B               | 4B     |
+    +-------+---------+-------+------------------+--------+
+
+Bits 3 and 4 of the flags hold the index in traversal.ORDERS of the order the
+payload's pixels are visited in. The header itself is always written in
+column-major order.
+
+Only embed, read_header and extract need NumPy, which is imported when they
+are called, so headers can be packed and unpacked without it.
+"""
+import struct
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple
+
+from . import traversal
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"\x89STG"
+VERSION = 2
+
+FLAG_ZLIB = 0x01
+FLAG_LZMA = 0x02
+FLAG_SHARD = 0x04
+
+ORDER_SHIFT = 3
+ORDER_MASK = 0x03 << ORDER_SHIFT
+
+MIN_BITS_PER_CHANNEL = 1
+MAX_BITS_PER_CHANNEL = 4
+
+_HEADER = struct.Struct(">4sBBBI")
+HEADER_BITS = _HEADER.size * 8
+
+
+class Header(NamedTuple):
+    """Header stored before the payload"""
+
+    length: int
+    flags: int = 0
+    bits_per_channel: int = 1
+    version: int = VERSION
+
+    def pack(self) -> bytes:
+        """Packs header as bytes.
+
+        Returns:
+            bytes: Header as bytes.
+        """
+        return _HEADER.pack(
+            MAGIC, self.version, self.flags, self.bits_per_channel, self.length
+        )
+
+    @property
+    def order(self) -> int:
+        """int: Index in traversal.ORDERS of the order of the payload."""
+        return (self.flags & ORDER_MASK) >> ORDER_SHIFT
+
+    @classmethod
+    def unpack(cls, data: bytes) -> Optional["Header"]:
+        """Unpacks header from bytes.
+
+        Args:
+            data (bytes): Bytes starting with a packed header.
+
+        Raises:
+            ValueError: When the header has an unsupported version, bits per
+            channel or order.
+
+        Returns:
+            Optional[Header]: Unpacked header or None if data doesn't start
+            with MAGIC.
+        """
+        if len(data) < _HEADER.size:
+            return None
+
+        magic, version, flags, bits_per_channel, length = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            return None
+        if version != VERSION:
+            raise ValueError(f"Unsupported payload version: {version}")
+        check_bits_per_channel(bits_per_channel)
+
+        header = cls(length, flags, bits_per_channel, version)
+        if header.order >= len(traversal.ORDERS):
+            raise ValueError(f"Unsupported payload order: {header.order}")
+
+        return header
+
+
+def check_bits_per_channel(bits_per_channel: int) -> None:
+    """Checks if bits_per_channel is supported.
+
+    Args:
+        bits_per_channel (int): Bits written to each channel.
+
+    Raises:
+        ValueError: When bits_per_channel is not between MIN_BITS_PER_CHANNEL
+        and MAX_BITS_PER_CHANNEL.
+    """
+    if not MIN_BITS_PER_CHANNEL <= bits_per_channel <= MAX_BITS_PER_CHANNEL:
+        raise ValueError(
+            f"bits_per_channel must be between {MIN_BITS_PER_CHANNEL} and "
+            + f"{MAX_BITS_PER_CHANNEL}, got {bits_per_channel}"
+        )
+
+
+def header_pixels(channels: int) -> int:
+    """Returns how many pixels the header takes.
+
+    Args:
+        channels (int): Number of channels of each pixel.
+
+    Returns:
+        int: Number of pixels.
+    """
+    return -(-HEADER_BITS // channels)
+
+
+def payload_pixels(length: int, channels: int, bits_per_channel: int) -> int:
+    """Returns how many pixels a payload takes, without the header.
+
+    Args:
+        length (int): Payload length in bytes.
+        channels (int): Number of channels of each pixel.
+        bits_per_channel (int): Bits written to each channel.
+
+    Returns:
+        int: Number of pixels.
+    """
+    return -(-length * 8 // (channels * bits_per_channel))
+
+
+def capacity(width: int, height: int, channels: int, bits_per_channel: int = 1) -> int:
+    """Returns how many payload bytes fit inside an image.
+
+    Args:
+        width (int): Width of the image.
+        height (int): Height of the image.
+        channels (int): Number of channels of each pixel.
+        bits_per_channel (int, optional): Bits written to each channel.
+        Defaults to 1.
+
+    Returns:
+        int: Number of bytes.
+    """
+    n_pixels = width * height - header_pixels(channels)
+    return max(n_pixels * channels * bits_per_channel // 8, 0)
+
+
+def embed(
+    pixels: "np.ndarray",
+    data: bytes,
+    flags: int = 0,
+    bits_per_channel: int = 1,
+    order: str = "column",
+    key: traversal.Key = None,
+) -> None:
+    """Writes header and data to pixels, in place.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        data (bytes): Payload to be written.
+        flags (int, optional): Flags stored in the header. Defaults to 0.
+        bits_per_channel (int, optional): Bits of each channel used by the
+        payload. Defaults to 1.
+        order (str, optional): One of traversal.ORDERS, stored in the header.
+        Defaults to "column".
+        key (traversal.Key, optional): Key of the "scatter" order. Defaults to
+        None.
+
+    Raises:
+        ValueError: When bits_per_channel or order are not supported or data
+        doesn't fit inside pixels.
+    """
+    check_bits_per_channel(bits_per_channel)
+    order_index = traversal.check_order(order, key)
+
+    height, width, channels = pixels.shape
+    start = header_pixels(channels)
+    stop = start + payload_pixels(len(data), channels, bits_per_channel)
+
+    if stop > height * width:
+        raise ValueError(
+            f"Payload of {len(data)} bytes doesn't fit inside a {width}x{height} image"
+        )
+
+    from . import engine
+
+    flags = flags & ~ORDER_MASK | order_index << ORDER_SHIFT
+    header = Header(len(data), flags, bits_per_channel)
+    engine.embed(pixels, engine.unpack_bits(header.pack()))
+    if order_index == traversal.COLUMN:
+        engine.embed(pixels, engine.unpack_bits(data), start, bits_per_channel)
+    elif order_index == traversal.ROW:
+        runs = traversal.row_runs(pixels.shape, start, stop - start)
+        engine.embed_runs(pixels, engine.unpack_bits(data), runs, bits_per_channel)
+    else:
+        indices = traversal.positions(
+            order_index, pixels.shape, start, stop - start, key
+        )
+        engine.embed_at(pixels, engine.unpack_bits(data), indices, bits_per_channel)
+
+
+def read_header(pixels: "np.ndarray") -> Optional[Header]:
+    """Reads the header from the first pixels.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+
+    Returns:
+        Optional[Header]: Header or None if pixels don't start with one.
+    """
+    height, width, channels = pixels.shape
+    stop = header_pixels(channels)
+    if stop > height * width:
+        return None
+
+    from . import engine
+
+    bits = engine.extract(pixels, 0, stop)[:HEADER_BITS]
+    return Header.unpack(engine.pack_bits(bits))
+
+
+def payload_range(shape: Tuple[int, int, int], header: Header) -> Tuple[int, int]:
+    """Returns the range of pixels holding the payload described by header.
+
+    Args:
+        shape (Tuple[int, int, int]): Shape of the pixels, (height, width,
+        channels).
+        header (Header): Header read with read_header.
+
+    Raises:
+        ValueError: When the header says the payload is larger than the image.
+
+    Returns:
+        Tuple[int, int]: Index of the first pixel and index after the last.
+    """
+    height, width, channels = shape
+    start = header_pixels(channels)
+    stop = start + payload_pixels(header.length, channels, header.bits_per_channel)
+
+    if stop > height * width:
+        raise ValueError("Payload length is larger than the image, data is corrupted")
+
+    return start, stop
+
+
+def extract(pixels: "np.ndarray", header: Header, key: traversal.Key = None) -> bytes:
+    """Reads the payload described by header.
+
+    Only the pixels holding the payload are read.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+        header (Header): Header read with read_header.
+        key (traversal.Key, optional): Key of the "scatter" order. Defaults to
+        None.
+
+    Raises:
+        ValueError: When the header says the payload is larger than the image,
+        or its order is "scatter" and key is missing.
+
+    Returns:
+        bytes: Payload.
+    """
+    from . import engine
+
+    start, stop = payload_range(pixels.shape, header)
+    if header.order == traversal.COLUMN:
+        bits = engine.extract(pixels, start, stop, header.bits_per_channel)
+    elif header.order == traversal.ROW:
+        runs = traversal.row_runs(pixels.shape, start, stop - start)
+        bits = engine.extract_runs(pixels, runs, header.bits_per_channel)
+    else:
+        indices = traversal.positions(
+            header.order, pixels.shape, start, stop - start, key
+        )
+        bits = engine.extract_at(pixels, indices, header.bits_per_channel)
+    bits = bits[: header.length * 8]
+    return engine.pack_bits(bits)
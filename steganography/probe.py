@@ -0,0 +1,121 @@
+"""Tell whether an image holds a payload by reading only its header.
+
+The header is written to the first pixels in column-major order, which are
+the first rows of the leftmost columns, so only those rows have to be
+decoded. Non-interlaced PNG and uncompressed TIFF and BMP images are decoded
+up to the last row holding the header and the rest of the file is never read.
+Other files are decoded whole, and formats that can't hold a payload because
+they are lossy, such as JPEG, are answered without decoding any pixel.
+
+Images encoded in legacy mode have no header, so they are reported as not
+holding a payload.
+"""
+from typing import Optional
+
+from PIL import Image
+
+from . import formats, payload, pure
+from .steganography import MODES, ImageSource, Steganography
+
+# Codecs that decode rows from the top, so decoding can stop at any row
+_ROW_CODECS = ("zip", "raw")
+
+
+def probe(source: ImageSource) -> Optional[payload.Header]:
+    """Reads the header of the payload hidden in an image, if there is one.
+
+    Args:
+        source (ImageSource): Path, bytes, binary file object or PIL image.
+
+    Raises:
+        OSError: When the image can't be opened.
+        ValueError: When the header has an unsupported version, bits per
+        channel or order, or says the payload is larger than the image.
+
+    Returns:
+        Optional[payload.Header]: Header, or None if the image doesn't hold a
+        payload or only one written in legacy mode.
+    """
+    image = Steganography._open(source)
+    try:
+        if image.format and image.format not in formats.FORMATS:
+            return None
+        if image.mode not in MODES:
+            return None
+
+        width, height = image.size
+        channels = len(image.getbands())
+        rows = min(payload.header_pixels(channels), height)
+        columns = min(-(-payload.header_pixels(channels) // rows), width)
+
+        if image is source:
+            # Images given by the caller are only read, never truncated
+            corner = image.crop((0, 0, columns, rows))
+        else:
+            corner = _top(image, rows, columns)
+
+        header = pure.read_header(pure.Pixels(corner))
+        if header:
+            payload.payload_range((height, width, channels), header)
+        return header
+    finally:
+        if image is not source:
+            image.close()
+
+
+def has_payload(source: ImageSource) -> bool:
+    """Checks if an image holds a payload with a header, see probe.
+
+    Args:
+        source (ImageSource): Path, bytes, binary file object or PIL image.
+
+    Raises:
+        OSError: When the image can't be opened.
+        ValueError: When the header is corrupted.
+
+    Returns:
+        bool: True if the image holds a payload.
+    """
+    return probe(source) is not None
+
+
+def _top(image: Image.Image, rows: int, columns: int) -> Image.Image:
+    """Returns the top left corner of an image, decoding as few rows as possible.
+
+    Args:
+        image (Image.Image): Image opened by probe, truncated to rows when it
+        isn't loaded yet.
+        rows (int): Rows of the corner.
+        columns (int): Columns of the corner.
+
+    Returns:
+        Image.Image: Corner with size (columns, rows).
+    """
+    tiles = getattr(image, "tile", None)
+    if (
+        tiles
+        and len(tiles) == 1
+        and tiles[0][0] in _ROW_CODECS
+        and tuple(tiles[0][1]) == (0, 0) + image.size
+        and not image.info.get("interlace")
+    ):
+        codec, _, offset, args = tiles[0]
+        width, height = image.size
+        # Raw tiles take (rawmode, stride, orientation), zip tiles a rawmode
+        options = args if isinstance(args, tuple) else (args,)
+        stride = options[1] if len(options) > 1 else 0
+        orientation = options[2] if len(options) > 2 else 1
+
+        if codec == "raw" and orientation == -1 and stride:
+            # Rows are stored from the bottom, as in BMP, skip the ones below
+            offset += (height - rows) * stride
+        elif codec == "raw" and orientation != 1:
+            return image.crop((0, 0, columns, rows))
+
+        image._size = (width, rows)
+        image.tile = [(codec, (0, 0, width, rows), offset, args)]
+        # PNG reads every chunk after the pixels once they are decoded,
+        # looking for text chunks the probe doesn't need
+        image.load_end = lambda: None
+
+    return image.crop((0, 0, columns, rows))
@@ -0,0 +1,492 @@
+"""Pure-Python engine, used by Steganography when NumPy isn't installed.
+
+Writes the same pixels as the NumPy engine, in the same column-major order.
+Pixels are read and written in bulk with Image.tobytes and Image.frombytes.
+In those bytes each channel of a column is a strided slice, so bits are
+written one slice at a time: a 256 entry translation table clears the least
+significant bits of the whole slice and the payload's values are OR-ed in as
+one large integer. Bytes are split into values, and joined back, with 256
+entry tables too, so no Python code runs for each bit.
+
+In the row order pixels are visited in runs that are consecutive in memory, so
+each run is a single slice of those bytes. Pixels visited in the scatter order
+are read and written one byte at a time, at the offsets of their channels.
+
+16 bit samples are supported by only touching the byte holding their least
+significant bits.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from . import compression as compression_module
+from . import instrumentation, layout
+from . import palette as palette_module
+from . import payload, traversal
+
+FIRST_CHUNK = 256
+MAX_CHUNK = 1 << 20
+
+# Bytes of each sample and index of the one holding the least significant bits
+_SAMPLES = {"I;16": (2, 0), "I;16B": (2, 1)}
+
+_CLEAR = {bits: bytes(b >> bits << bits for b in range(256)) for bits in (1, 2, 3, 4)}
+_LOW = {bits: bytes(b & ((1 << bits) - 1) for b in range(256)) for bits in (1, 2, 3, 4)}
+_SPLIT = {
+    bits: [
+        bytes(b >> shift & ((1 << bits) - 1) for shift in range(8 - bits, -1, -bits))
+        for b in range(256)
+    ]
+    for bits in (1, 2, 4)
+}
+_JOIN = {bits: {values: b for b, values in enumerate(_SPLIT[bits])} for bits in _SPLIT}
+
+
+class Pixels:
+    """Raw bytes of a Pillow image, read and written column by column"""
+
+    def __init__(self, image: Image.Image) -> None:
+        """Initialize the class, copying the image's bytes.
+
+        Args:
+            image (Image.Image): Image in one of Steganography's modes.
+        """
+        self.mode = image.mode
+        self.palette = image.getpalette() if image.mode == "P" else None
+        self.width, self.height = image.size
+        self.channels = len(image.getbands())
+        self.data = bytearray(image.tobytes())
+
+        self._sample, self._low = _SAMPLES.get(image.mode, (1, 0))
+        self._row = self.width * self.channels * self._sample
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Tuple[int, int, int]: Height, width and channels."""
+        return self.height, self.width, self.channels
+
+    def to_image(self) -> Image.Image:
+        """Returns the pixels as a new image.
+
+        Returns:
+            Image.Image: Image with the same mode and palette.
+        """
+        image = Image.frombytes(self.mode, (self.width, self.height), bytes(self.data))
+        if self.palette is not None:
+            image.putpalette(self.palette)
+
+        return image
+
+    def embed(self, values: bytes, start: int = 0, bits_per_channel: int = 1) -> None:
+        """Writes values to the least significant bits of each channel.
+
+        Args:
+            values (bytes): One value of bits_per_channel bits in each byte.
+            start (int, optional): Index of the first pixel to write to.
+            Defaults to 0.
+            bits_per_channel (int, optional): Bits written to each channel.
+            Defaults to 1.
+        """
+        clear = _CLEAR[bits_per_channel]
+        stop = start + -(-len(values) // self.channels)
+
+        for position, offset, rows in self._columns(start, stop):
+            for channel in range(self.channels):
+                first = offset * self.channels + channel
+                last = min((offset + rows) * self.channels, len(values))
+                column = values[first : last : self.channels]
+                if not column:
+                    continue
+
+                first_byte = position + channel * self._sample
+                last_byte = first_byte + (len(column) - 1) * self._row + 1
+                index = slice(first_byte, last_byte, self._row)
+                cleared = int.from_bytes(self.data[index].translate(clear), "big")
+                merged = cleared | int.from_bytes(column, "big")
+                self.data[index] = merged.to_bytes(len(column), "big")
+
+    def extract(self, start: int, stop: int, bits_per_channel: int = 1) -> bytes:
+        """Reads the least significant bits of every channel from start to stop.
+
+        Args:
+            start (int): Index of the first pixel.
+            stop (int): Index after the last pixel.
+            bits_per_channel (int, optional): Bits read from each channel.
+            Defaults to 1.
+
+        Returns:
+            bytes: One value of bits_per_channel bits in each byte.
+        """
+        low = _LOW[bits_per_channel]
+        values = bytearray((stop - start) * self.channels)
+
+        for position, offset, rows in self._columns(start, stop):
+            for channel in range(self.channels):
+                first_byte = position + channel * self._sample
+                last_byte = first_byte + (rows - 1) * self._row + 1
+                column = self.data[first_byte : last_byte : self._row]
+
+                first = offset * self.channels + channel
+                last = (offset + rows) * self.channels
+                values[first : last : self.channels] = column.translate(low)
+
+        return bytes(values)
+
+    def embed_runs(
+        self, values: bytes, runs: List[Tuple[int, int]], bits_per_channel: int = 1
+    ) -> None:
+        """Writes values to the least significant bits of runs of pixels.
+
+        Args:
+            values (bytes): One value of bits_per_channel bits in each byte.
+            Values that don't fit inside the runs are ignored.
+            runs (List[Tuple[int, int]]): Row-major index of the first pixel of
+            each run and index after its last pixel, as returned by
+            traversal.row_runs.
+            bits_per_channel (int, optional): Bits written to each channel.
+            Defaults to 1.
+        """
+        clear = _CLEAR[bits_per_channel]
+        offset = 0
+        for start, stop in runs:
+            run = values[offset : offset + (stop - start) * self.channels]
+            if not run:
+                return
+
+            first_byte = start * self.channels * self._sample + self._low
+            last_byte = first_byte + (len(run) - 1) * self._sample + 1
+            index = slice(first_byte, last_byte, self._sample)
+            cleared = int.from_bytes(self.data[index].translate(clear), "big")
+            merged = cleared | int.from_bytes(run, "big")
+            self.data[index] = merged.to_bytes(len(run), "big")
+            offset += len(run)
+
+    def extract_runs(
+        self, runs: List[Tuple[int, int]], bits_per_channel: int = 1
+    ) -> bytes:
+        """Reads the least significant bits of every channel of runs of pixels.
+
+        Args:
+            runs (List[Tuple[int, int]]): Row-major index of the first pixel of
+            each run and index after its last pixel, as returned by
+            traversal.row_runs.
+            bits_per_channel (int, optional): Bits read from each channel.
+            Defaults to 1.
+
+        Returns:
+            bytes: One value of bits_per_channel bits in each byte.
+        """
+        pixel = self.channels * self._sample
+        return b"".join(
+            self.data[start * pixel + self._low : stop * pixel : self._sample]
+            for start, stop in runs
+        ).translate(_LOW[bits_per_channel])
+
+    def embed_at(
+        self, values: bytes, positions: Sequence[int], bits_per_channel: int = 1
+    ) -> None:
+        """Writes values to the least significant bits of the pixels at positions.
+
+        Args:
+            values (bytes): One value of bits_per_channel bits in each byte.
+            Values that don't fit inside the pixels are ignored.
+            positions (Sequence[int]): Column-major index of each pixel, as
+            returned by traversal.position_list.
+            bits_per_channel (int, optional): Bits written to each channel.
+            Defaults to 1.
+        """
+        offsets = self._offsets(positions[: -(-len(values) // self.channels)])
+        offsets = offsets[: len(values)]
+        values = values[: len(offsets)]
+
+        current = bytes(map(self.data.__getitem__, offsets))
+        cleared = int.from_bytes(current.translate(_CLEAR[bits_per_channel]), "big")
+        merged = cleared | int.from_bytes(values, "big")
+        for offset, value in zip(offsets, merged.to_bytes(len(offsets), "big")):
+            self.data[offset] = value
+
+    def extract_at(self, positions: Sequence[int], bits_per_channel: int = 1) -> bytes:
+        """Reads the least significant bits of every channel of the pixels at positions.
+
+        Args:
+            positions (Sequence[int]): Column-major index of each pixel, as
+            returned by traversal.position_list.
+            bits_per_channel (int, optional): Bits read from each channel.
+            Defaults to 1.
+
+        Returns:
+            bytes: One value of bits_per_channel bits in each byte.
+        """
+        values = bytes(map(self.data.__getitem__, self._offsets(positions)))
+        return values.translate(_LOW[bits_per_channel])
+
+    def _offsets(self, positions: Sequence[int]) -> List[int]:
+        """Returns the offset of the byte of each channel of the pixels at positions.
+
+        Args:
+            positions (Sequence[int]): Column-major index of each pixel.
+
+        Returns:
+            List[int]: Offsets, every channel of a pixel before the next pixel.
+        """
+        column = self.channels * self._sample
+        channels = [
+            channel * self._sample + self._low for channel in range(self.channels)
+        ]
+        offsets = []
+        for position in positions:
+            x, y = divmod(position, self.height)
+            first = y * self._row + x * column
+            offsets.extend(first + channel for channel in channels)
+
+        return offsets
+
+    def _columns(self, start: int, stop: int):
+        """Yields the part of each column holding the pixels from start to stop.
+
+        Args:
+            start (int): Index of the first pixel.
+            stop (int): Index after the last pixel.
+
+        Yields:
+            Tuple[int, int, int]: Position of the first byte of the column's
+            first pixel, index of that pixel counted from start and number of
+            pixels.
+        """
+        for x in range(start // self.height, -(-stop // self.height)):
+            top = max(start - x * self.height, 0)
+            bottom = min(stop - x * self.height, self.height)
+            position = top * self._row + x * self.channels * self._sample + self._low
+            yield position, x * self.height + top - start, bottom - top
+
+
+def split(data: bytes, bits_per_channel: int = 1) -> bytes:
+    """Splits data into values of bits_per_channel bits, most significant first.
+
+    When bits don't split evenly the last value is padded with zeros.
+
+    Args:
+        data (bytes): Data to split.
+        bits_per_channel (int, optional): Bits of each value. Defaults to 1.
+
+    Returns:
+        bytes: One value in each byte.
+    """
+    if bits_per_channel in _SPLIT:
+        return b"".join(map(_SPLIT[bits_per_channel].__getitem__, data))
+
+    # 3 bytes hold exactly 8 values of 3 bits
+    values = bytearray()
+    padded = data + bytes(-len(data) % 3)
+    for index in range(0, len(padded), 3):
+        group = int.from_bytes(padded[index : index + 3], "big")
+        values += bytes(group >> shift & 7 for shift in range(21, -1, -3))
+
+    return bytes(values[: -(-len(data) * 8 // 3)])
+
+
+def join(values: bytes, bits_per_channel: int = 1) -> bytes:
+    """Joins values of bits_per_channel bits back into bytes.
+
+    Bits left over after the last full byte are ignored.
+
+    Args:
+        values (bytes): One value in each byte, as returned by split.
+        bits_per_channel (int, optional): Bits of each value. Defaults to 1.
+
+    Returns:
+        bytes: Joined bytes.
+    """
+    length = len(values) * bits_per_channel // 8
+    if bits_per_channel in _JOIN:
+        table, step = _JOIN[bits_per_channel], 8 // bits_per_channel
+        groups = (
+            values[index : index + step] for index in range(0, length * step, step)
+        )
+        return bytes(map(table.__getitem__, groups))
+
+    data = bytearray()
+    padded = values + bytes(-len(values) % 8)
+    for index in range(0, len(padded), 8):
+        group = 0
+        for value in padded[index : index + 8]:
+            group = group << 3 | value
+        data += group.to_bytes(3, "big")
+
+    return bytes(data[:length])
+
+
+def embed(
+    image: Image.Image,
+    data: bytes,
+    flags: int = 0,
+    end: str = layout.END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+    order: str = "column",
+    key: traversal.Key = None,
+) -> Image.Image:
+    """Writes data that is already compressed to a copy of image.
+
+    Same as buffers.place, without NumPy.
+
+    Args:
+        image (Image.Image): Cover image, left untouched.
+        data (bytes): Data as returned by compression.compress.
+        flags (int, optional): Flags returned by compression.compress.
+        Defaults to 0.
+        end, legacy, bits_per_channel, order, key: Same as in buffers.write.
+
+    Raises:
+        ValueError: When data doesn't fit inside image, or image is a palette
+        image with too many colors, see palette.spread.
+
+    Returns:
+        Image.Image: Encoded image.
+    """
+    width, height = image.size
+    with instrumentation.measure("load", width * height):
+        pixels = Pixels(image)
+        if pixels.mode == "P":
+            table, pixels.palette = palette_module.spread(
+                pixels.palette, image.histogram(), bits_per_channel
+            )
+            pixels.data = pixels.data.translate(table)
+
+    layout.check_fits(len(data), pixels.shape, end, legacy, bits_per_channel)
+
+    with instrumentation.measure("embed", width * height, len(data)):
+        if legacy:
+            pixels.embed(split(data + end.encode("latin-1")))
+        else:
+            order_index = traversal.check_order(order, key)
+            flags = flags & ~payload.ORDER_MASK | order_index << payload.ORDER_SHIFT
+            header = payload.Header(len(data), flags, bits_per_channel)
+            pixels.embed(split(header.pack()))
+
+            values = split(data, bits_per_channel)
+            start, stop = payload.payload_range(pixels.shape, header)
+            if order_index == traversal.COLUMN:
+                pixels.embed(values, start, bits_per_channel)
+            elif order_index == traversal.ROW:
+                runs = traversal.row_runs(pixels.shape, start, stop - start)
+                pixels.embed_runs(values, runs, bits_per_channel)
+            else:
+                positions = traversal.position_list(
+                    order_index, pixels.shape, start, stop - start, key
+                )
+                pixels.embed_at(values, positions, bits_per_channel)
+
+    with instrumentation.measure("to_image", width * height):
+        return pixels.to_image()
+
+
+def read(
+    image: Image.Image, end: str = layout.END, key: traversal.Key = None
+) -> Tuple[Optional[payload.Header], bytes]:
+    """Reads the header, if any, and the data hidden in image.
+
+    Same as buffers.read, without NumPy.
+
+    Args:
+        image (Image.Image): Encoded image.
+        end (str, optional): End characters of data encoded in legacy mode.
+        Defaults to "\\end".
+        key (traversal.Key, optional): Key of data encoded in the "scatter"
+        order. Defaults to None.
+
+    Raises:
+        ValueError: When the data is corrupted, is a shard of a larger
+        payload or is in the "scatter" order and key is missing.
+
+    Returns:
+        Tuple[Optional[payload.Header], bytes]: Header, or None for data
+        encoded in legacy mode, and the decoded data.
+    """
+    pixels = Pixels(image)
+
+    with instrumentation.measure("header"):
+        header = read_header(pixels)
+    if header and header.flags & payload.FLAG_SHARD:
+        raise ValueError("Image holds a shard of a payload, decode it with shards")
+    if header:
+        with instrumentation.measure("extract", bytes=header.length):
+            start, stop = payload.payload_range(pixels.shape, header)
+            if header.order == traversal.COLUMN:
+                values = pixels.extract(start, stop, header.bits_per_channel)
+            elif header.order == traversal.ROW:
+                runs = traversal.row_runs(pixels.shape, start, stop - start)
+                values = pixels.extract_runs(runs, header.bits_per_channel)
+            else:
+                positions = traversal.position_list(
+                    header.order, pixels.shape, start, stop - start, key
+                )
+                values = pixels.extract_at(positions, header.bits_per_channel)
+            data = join(values, header.bits_per_channel)[: header.length]
+        with instrumentation.measure("decompress", bytes=len(data)) as measurement:
+            data = compression_module.decompress(data, header.flags)
+            measurement.bytes = len(data)
+        return header, data
+
+    with instrumentation.measure("read_until") as measurement:
+        data = read_until(pixels, end.encode("latin-1"))
+        measurement.bytes = len(data)
+    return None, data
+
+
+def read_header(pixels: Pixels) -> Optional[payload.Header]:
+    """Reads the header from the first pixels.
+
+    Args:
+        pixels (Pixels): Pixels of the image.
+
+    Returns:
+        Optional[payload.Header]: Header or None if pixels don't start with one.
+    """
+    height, width, channels = pixels.shape
+    stop = payload.header_pixels(channels)
+    if stop > height * width:
+        return None
+
+    values = pixels.extract(0, stop)[: payload.HEADER_BITS]
+    return payload.Header.unpack(join(values))
+
+
+def read_until(pixels: Pixels, end: bytes, start: int = 0) -> bytes:
+    """Reads bytes from pixels until end is found.
+
+    Pixels are read in chunks that grow from FIRST_CHUNK up to MAX_CHUNK pixels,
+    as engine.read_until does.
+
+    Args:
+        pixels (Pixels): Pixels of the image.
+        end (bytes): Bytes that mark the end of the data.
+        start (int, optional): Index of the first pixel. Defaults to 0.
+
+    Returns:
+        bytes: Data before end or every byte in the image if end wasn't found.
+    """
+    height, width, _ = pixels.shape
+    n_pixels = height * width
+
+    data = bytearray()
+    pending = b""
+    chunk = FIRST_CHUNK
+
+    while start < n_pixels:
+        stop = min(start + chunk, n_pixels)
+        values = pending + pixels.extract(start, stop)
+        n_values = len(values) - len(values) % 8
+
+        searched = max(len(data) - len(end) + 1, 0)
+        data += join(values[:n_values])
+        pending = values[n_values:]
+
+        index = data.find(end, searched)
+        if index != -1:
+            return bytes(data[:index])
+
+        start = stop
+        chunk = min(chunk * 2, MAX_CHUNK)
+
+    return bytes(data)
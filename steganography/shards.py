@@ -0,0 +1,258 @@
+"""Split payloads that don't fit inside one image across many covers.
+
+The payload is compressed once and split in proportion to each cover's
+capacity. Every shard starts with a prefix holding the payload id, its index
+and the number of shards, and its header has FLAG_SHARD set along with the
+compression flags of the whole payload:
+
+    +------------+-------+-------+------+
+    | payload_id | index | count | data |
+    +------------+-------+-------+------+
+    | 16B        | 2B    | 2B    |      |
+    +------------+-------+-------+------+
+
+Shards are encoded and decoded across a pool of processes, and can be
+decoded in any order.
+"""
+import functools
+import struct
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, List, NamedTuple, Sequence, Union
+
+import numpy as np
+
+from . import buffers
+from . import compression as compression_module
+from . import engine, payload
+from .steganography import Steganography
+
+PREFIX = struct.Struct(">16sHH")
+MAX_SHARDS = 0xFFFF
+
+
+class Shard(NamedTuple):
+    """Part of a payload read from one image"""
+
+    payload_id: bytes
+    index: int
+    count: int
+    data: bytes
+    flags: int = 0
+
+
+def encode(
+    data: bytes,
+    covers: Sequence[Union[str, bytes]],
+    outputs: Sequence[str],
+    workers: int = None,
+    bits_per_channel: int = 1,
+    compression: str = None,
+    compression_level: int = None,
+) -> List[str]:
+    """Encodes data across covers and saves one image for each of them.
+
+    Fails before encoding anything when data doesn't fit inside every cover
+    together.
+
+    Args:
+        data (bytes): Payload to encode.
+        covers (Sequence[Union[str, bytes]]): Paths or contents of the covers.
+        outputs (Sequence[str]): Where to save each encoded cover, in the same
+        order as covers.
+        workers (int, optional): Number of processes, 1 encodes every shard in
+        the current process. Defaults to the number of CPUs.
+        bits_per_channel, compression, compression_level: Same as in
+        Steganography.
+
+    Raises:
+        ValueError: When the options are not supported, covers and outputs
+        have different lengths or data doesn't fit.
+
+    Returns:
+        List[str]: Paths the images were saved to, with png as extension.
+    """
+    buffers.check_options(
+        False, bits_per_channel, compression, compression_level=compression_level
+    )
+    if len(covers) != len(outputs):
+        raise ValueError("covers and outputs must have the same length")
+    if not 0 < len(covers) <= MAX_SHARDS:
+        raise ValueError(f"Between 1 and {MAX_SHARDS} covers are needed")
+
+    data, flags = compression_module.compress(data, compression, compression_level)
+    capacities = [
+        Steganography(cover, bits_per_channel=bits_per_channel).capacity() - PREFIX.size
+        for cover in covers
+    ]
+
+    payload_id = uuid.uuid4().bytes
+    chunks = split(data, capacities)
+    shards = [
+        PREFIX.pack(payload_id, index, len(chunks)) + chunk
+        for index, chunk in enumerate(chunks)
+    ]
+
+    encode_shard = functools.partial(
+        _encode,
+        flags=flags | payload.FLAG_SHARD,
+        bits_per_channel=bits_per_channel,
+    )
+    if workers == 1:
+        return list(map(encode_shard, covers, shards, outputs))
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(encode_shard, covers, shards, outputs))
+
+
+def decode(paths: Iterable[Union[str, bytes]], workers: int = None) -> bytes:
+    """Decodes shards and reassembles the payload, whatever their order.
+
+    Args:
+        paths (Iterable[Union[str, bytes]]): Paths or contents of every image
+        holding a shard of the payload.
+        workers (int, optional): Number of processes, 1 decodes every shard in
+        the current process. Defaults to the number of CPUs.
+
+    Raises:
+        ValueError: When an image doesn't hold a shard, shards belong to
+        different payloads or some are missing or repeated.
+
+    Returns:
+        bytes: Payload.
+    """
+    paths = list(paths)
+
+    if workers == 1:
+        return join(map(read, paths))
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(read, path) for path in paths]
+        return join(future.result() for future in as_completed(futures))
+
+
+def split(data: bytes, capacities: Sequence[int]) -> List[bytes]:
+    """Splits data in proportion to capacities.
+
+    Args:
+        data (bytes): Data to split.
+        capacities (Sequence[int]): Bytes each part can hold.
+
+    Raises:
+        ValueError: When data is larger than every capacity together.
+
+    Returns:
+        List[bytes]: One part for each capacity, none larger than it.
+    """
+    capacities = [max(capacity, 0) for capacity in capacities]
+    total = sum(capacities)
+    if len(data) > total:
+        raise ValueError(
+            f"Payload of {len(data)} bytes doesn't fit inside the covers, "
+            + f"which hold {total} bytes"
+        )
+
+    sizes = [len(data) * capacity // total for capacity in capacities]
+    for index, capacity in enumerate(capacities):
+        extra = min(capacity - sizes[index], len(data) - sum(sizes))
+        sizes[index] += extra
+
+    parts, start = [], 0
+    for size in sizes:
+        parts.append(data[start : start + size])
+        start += size
+
+    return parts
+
+
+def read(path: Union[str, bytes]) -> Shard:
+    """Reads the shard hidden in an image.
+
+    Args:
+        path (Union[str, bytes]): Path or contents of the image.
+
+    Raises:
+        ValueError: When the image doesn't hold a shard.
+
+    Returns:
+        Shard: Shard, still compressed as the whole payload was.
+    """
+    return read_pixels(engine.ImagePixels(Steganography._open(path)))
+
+
+def read_pixels(pixels: np.ndarray) -> Shard:
+    """Reads the shard hidden in pixels.
+
+    Args:
+        pixels (np.ndarray): Array with shape (height, width, channels).
+
+    Raises:
+        ValueError: When the pixels don't hold a shard.
+
+    Returns:
+        Shard: Shard, still compressed as the whole payload was.
+    """
+    header = payload.read_header(pixels)
+    if not header or not header.flags & payload.FLAG_SHARD:
+        raise ValueError("Image doesn't hold a shard")
+
+    data = payload.extract(pixels, header)
+    payload_id, index, count = PREFIX.unpack_from(data)
+    flags = header.flags & ~payload.FLAG_SHARD
+    return Shard(payload_id, index, count, data[PREFIX.size :], flags)
+
+
+def join(shards: Iterable[Shard]) -> bytes:
+    """Reassembles and decompresses a payload from its shards.
+
+    Args:
+        shards (Iterable[Shard]): Every shard of the payload, in any order.
+
+    Raises:
+        ValueError: When shards belong to different payloads or some are
+        missing or repeated.
+
+    Returns:
+        bytes: Payload.
+    """
+    slots = None
+    for shard in shards:
+        if slots is None:
+            first, slots = shard, [None] * shard.count
+        if (shard.payload_id, shard.count) != (first.payload_id, first.count):
+            raise ValueError("Shards belong to different payloads")
+        if not 0 <= shard.index < shard.count:
+            raise ValueError(f"Shard {shard.index} of {shard.count} is corrupted")
+        if slots[shard.index] is not None:
+            raise ValueError(f"Shard {shard.index} is repeated")
+
+        slots[shard.index] = shard.data
+
+    if not slots:
+        raise ValueError("No shards to join")
+
+    missing = [index for index, data in enumerate(slots) if data is None]
+    if missing:
+        raise ValueError(f"Shards {missing} of {len(slots)} are missing")
+
+    return compression_module.decompress(b"".join(slots), first.flags)
+
+
+def _encode(
+    cover: Union[str, bytes], shard: bytes, output: str, flags: int, **options
+) -> str:
+    """Encodes and saves a single shard.
+
+    Args:
+        cover (Union[str, bytes]): Path or contents of the cover.
+        shard (bytes): Prefix and data of the shard.
+        output (str): Where to save the image.
+        flags (int): Header flags.
+        **options: Keyword arguments passed to Steganography.
+
+    Returns:
+        str: Path the image was saved to.
+    """
+    steganography = Steganography(cover, **options)
+    steganography._embed(shard, flags)
+    return steganography.save(output)
@@ -1,157 +1,530 @@
+import io
 import os
 import pathlib
-import re
+from concurrent.futures import Future
+from typing import BinaryIO, Optional, Tuple, Union
 
 from PIL import Image
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, images are encoded by pure without it
+    np = None
+
+from . import compression as compression_module
+from . import palette as palette_module
+from . import formats, instrumentation, layout, modes, payload, pure, traversal
+from . import writer as writer_module
+from .modes import MODES
+
+if np is not None:
+    from . import buffers
+    from . import cache as cache_module
+    from . import engine
+
+ImageSource = Union[str, pathlib.Path, bytes, BinaryIO, Image.Image]
+
 
 class Steganography:
     """Steganography class responsible for hiding text inside images"""
 
-    def __init__(self, path: str, end: str = None) -> None:
+    def __init__(
+        self,
+        path: ImageSource,
+        end: str = None,
+        legacy: bool = False,
+        bits_per_channel: int = 1,
+        compression: str = None,
+        compression_level: int = None,
+        cache: Union[bool, "cache_module.CoverCache"] = False,
+        order: str = "column",
+        key: traversal.Key = None,
+    ) -> None:
         """Initialize the class
 
         Args:
-            path (str): Path to the image that will hide the text
+            path (ImageSource): Path to the image that will hide the text, or
+            the image itself as bytes, a binary file object or a PIL image,
+            in one of MODES. Every channel is used, alpha included, and 16 bit
+            images use the least significant bits of each sample. Palette
+            images keep their colors but get a new palette, and can use up to
+            256 >> bits_per_channel colors, see palette.
             end (str, optional): End characters to know when to stop
-            decoding. Defaults to "\\end".
+            decoding images encoded in legacy mode. Defaults to "\\end".
+            legacy (bool, optional): Encode the message followed by end instead
+            of after a header with its length, so older versions can decode it.
+            Defaults to False.
+            bits_per_channel (int, optional): Least significant bits of each
+            channel used to encode, from 1 to 4. More bits touch fewer pixels
+            and fit larger messages, but change the image more. Decoding reads
+            it from the header. Defaults to 1.
+            compression (str, optional): Compress the message before encoding
+            with "zlib", "lzma" or "auto" to use whichever compresses the most.
+            The message is left as is when compressing doesn't make it smaller.
+            Decoding reads it from the header. Defaults to None.
+            compression_level (int, optional): Compression level from 0 to 9,
+            higher is smaller but slower. Defaults to the method's default.
+            cache (Union[bool, cache_module.CoverCache], optional): Reuse the
+            decoded pixels of covers given as paths, bytes or file objects
+            instead of decoding them every time. True uses the process-wide
+            cache. Needs NumPy. Defaults to False.
+            order (str, optional): Order the pixels holding the message are
+            visited in: "column", "row" or "scatter", a pseudo-random order
+            derived from key that spreads the message across the image.
+            Decoding reads it from the header. Defaults to "column".
+            key (traversal.Key, optional): Key of the "scatter" order, needed
+            to encode and to decode messages written in it. Defaults to None.
+
+        Raises:
+            ValueError: When bits_per_channel, compression, compression_level
+            or order are not supported or are used in legacy mode, or order is
+            "scatter" and key is missing.
+            ImportError: When cache is used without NumPy installed.
         """
-        self._original_image = Image.open(path)
+        layout.check_options(
+            legacy, bits_per_channel, compression, order, key, compression_level
+        )
+        if cache and np is None:
+            raise ImportError("The cover cache needs NumPy")
+
+        self._original_image = None
+        self._original_cover = None
+        with instrumentation.operation("open") as measurement:
+            if cache and not isinstance(path, Image.Image):
+                if cache is True:
+                    cache = cache_module.default_cache()
+                self._original_cover = cache.get_cover(path)
+            else:
+                self._original_image = self._open(path)
+
+            measurement.pixels = self._pixel_count()
 
         self._encoded_image = None
-        self._end_message = end or r"\end"
+        self._end_message = end or layout.END
+        self._legacy = legacy
+        self._bits_per_channel = bits_per_channel
+        self._compression = compression
+        self._compression_level = compression_level
+        self._order = order
+        self._key = key
 
     def encode(self, message: str) -> None:
         """Encode image with a string message
 
+        The message is encoded as UTF-8, or as Latin-1 in legacy mode so older
+        versions can decode it.
+
         Args:
             message (str): message to encode
+
+        Raises:
+            ValueError: When the image mode is not supported or the
+            message doesn't fit inside it.
         """
-        image = self._original_image.copy()
-        width, height = image.size
-        pixels = image.load()
+        encoding = "latin-1" if self._legacy else "utf-8"
+        self.encode_bytes(message.encode(encoding))
 
-        binary_string = self._str_to_binary_string(message + self._end_message)
-        tribit_list = self._split(binary_string, 3)
+    def encode_bytes(self, data: bytes) -> None:
+        """Encode image with bytes
 
-        for x_pixel in range(width):
-            for y_pixel in range(height):
-                tribit = tribit_list.pop(0)
-                rgb_binary = self._rgb_to_binary(pixels[x_pixel, y_pixel])
-                new_pixel = self._write_to_lsb(tribit, rgb_binary)
+        Args:
+            data (bytes): data to encode
 
-                if len(new_pixel) < 3:
-                    new_pixel = self._complete_list(new_pixel, list(rgb_binary))
+        Raises:
+            ValueError: When the image mode is not supported or the
+            data doesn't fit inside it.
+        """
+        with instrumentation.operation("encode", self._pixel_count(), len(data)):
+            with instrumentation.measure("compress", bytes=len(data)):
+                data, flags = compression_module.compress(
+                    data, self._compression, self._compression_level
+                )
+            self._embed(data, flags)
+
+    def _embed(self, data: bytes, flags: int) -> None:
+        """Encode image with data that is already compressed
 
-                pixels[x_pixel, y_pixel] = self._binary_to_rgb(*new_pixel)
+        Args:
+            data (bytes): data as returned by compression.compress
+            flags (int): header flags
 
-                if not tribit_list:
-                    break
+        Raises:
+            ValueError: When the image mode is not supported or the
+            data doesn't fit inside it.
+        """
+        mode = self._mode()
+        self._check_mode(mode)
+
+        options = (self._end_message, self._legacy, self._bits_per_channel)
+        layout.check_fits(len(data), self._shape(), *options)
+        traversal_options = (self._order, self._key)
+        if np is None:
+            image = self._original_image
+            image = pure.embed(image, data, flags, *options, *traversal_options)
+            self._encoded_image = image
+            return
+
+        n_pixels = self._pixel_count()
+        with instrumentation.measure("load", n_pixels):
+            if self._original_image is None:
+                pixels = self._original_cover.pixels.copy()
+                palette = self._original_cover.palette
             else:
-                continue
-            break
+                pixels = np.array(self._original_image)
+                palette = self._original_image.getpalette()
+
+            if mode == "P":
+                counts = np.bincount(pixels.reshape(-1), minlength=256)
+                table, palette = palette_module.spread(
+                    palette, counts, self._bits_per_channel
+                )
+                pixels = np.frombuffer(table, dtype=np.uint8)[pixels]
+
+        with instrumentation.measure("embed", n_pixels, len(data)):
+            view = buffers.as_pixels(pixels)
+            buffers.place(view, data, flags, *options, *traversal_options)
+
+        with instrumentation.measure("to_image", n_pixels):
+            self._encoded_image = Image.fromarray(pixels)
+            if self._encoded_image.mode != mode:
+                # Older Pillow versions make mode "I" images out of 16 bit arrays
+                self._encoded_image = Image.frombytes(
+                    mode, self._encoded_image.size, pixels.tobytes()
+                )
+            if mode == "P":
+                self._encoded_image.putpalette(palette)
+
+    def capacity(self) -> int:
+        """Returns how many bytes fit inside the image, without reading its pixels
+
+        Takes the header, or the end characters in legacy mode, and
+        bits_per_channel into account. Compression is not, see fits.
+
+        Returns:
+            int: Number of bytes.
+        """
+        options = (self._end_message, self._legacy, self._bits_per_channel)
+        return layout.capacity(self._shape(), *options)
 
-        self._encoded_image = image
+    def fits(self, message: Union[str, bytes]) -> bool:
+        """Checks if a message fits inside the image, without reading its pixels
 
-    def decode(self, path: str = None) -> str:
+        The message is compressed first when compression is set.
+
+        Args:
+            message (Union[str, bytes]): Message or data, as given to encode or
+            encode_bytes.
+
+        Returns:
+            bool: True if encoding message would succeed.
+        """
+        if isinstance(message, str):
+            message = message.encode("latin-1" if self._legacy else "utf-8")
+
+        data, _ = compression_module.compress(
+            message, self._compression, self._compression_level
+        )
+        return len(data) <= self.capacity()
+
+    def decode(self, path: ImageSource = None, workers: int = 1) -> str:
         """Decode image and returns the hidden message
 
+        Images encoded in legacy mode are detected by the lack of a header.
+
         Args:
-            path (str, optional): Path of the image, if not specified uses the encoded
-            image from self. Defaults to None.
+            path (ImageSource, optional): Path of the image, or the image itself
+            as bytes, a binary file object or a PIL image. If not specified uses
+            the encoded image from self, or the image it was initialized with if
+            nothing was encoded yet. Defaults to None.
+            workers (int, optional): Processes that read large payloads in
+            parallel, None uses every CPU. Defaults to 1.
 
         Returns:
             str: Decoded message
         """
-        if path:
-            image = Image.open(path)
-        else:
-            image = self._encoded_image
+        header, data = self._decode(path, workers)
+        return data.decode("utf-8" if header else "latin-1")
+
+    def decode_bytes(self, path: ImageSource = None, workers: int = 1) -> bytes:
+        """Decode image and returns the hidden bytes
 
-        width, height = image.size
-        pixels = image.load()
+        Args:
+            path (ImageSource, optional): Path of the image, or the image itself
+            as bytes, a binary file object or a PIL image. If not specified uses
+            the encoded image from self, or the image it was initialized with if
+            nothing was encoded yet. Defaults to None.
+            workers (int, optional): Processes that read large payloads in
+            parallel, None uses every CPU. Defaults to 1.
+
+        Returns:
+            bytes: Decoded data
+        """
+        _, data = self._decode(path, workers)
+        return data
+
+    def _decode(
+        self, path: ImageSource = None, workers: int = 1
+    ) -> Tuple[Optional[payload.Header], bytes]:
+        """Reads the header, if any, and the hidden bytes
+
+        Args:
+            path (ImageSource, optional): Path of the image, or the image itself
+            as bytes, a binary file object or a PIL image. If not specified uses
+            the encoded image from self, or the image it was initialized with if
+            nothing was encoded yet. Defaults to None.
+            workers (int, optional): Processes that read large payloads in
+            parallel, None uses every CPU. Defaults to 1.
+
+        Raises:
+            ValueError: When the image mode is not supported.
+
+        Returns:
+            Tuple[Optional[payload.Header], bytes]: Header, or None for images
+            encoded in legacy mode, and the hidden bytes.
+        """
+        with instrumentation.operation("decode") as measurement:
+            with instrumentation.measure("open"):
+                if path is not None:
+                    image = self._open(path)
+                else:
+                    image = self._encoded_image or self._original_image
+
+            if image is None:
+                self._check_mode(self._original_cover.mode)
+                pixels = buffers.as_pixels(self._original_cover.pixels)
+            else:
+                self._check_mode(image.mode)
+                pixels = engine.ImagePixels(image) if np is not None else None
 
-        binary_string = ""
-        for x_pixel in range(width):
-            for y_pixel in range(height):
-                rgb = pixels[x_pixel, y_pixel]
-                red, blue, green = self._rgb_to_binary(rgb)
-                binary_string += red[-1] + blue[-1] + green[-1]
+            if pixels is None:
+                header, data = pure.read(image, self._end_message, self._key)
+                measurement.pixels = image.width * image.height
+            else:
+                header, data = buffers.read(
+                    pixels, self._end_message, workers, self._key
+                )
+                measurement.pixels = pixels.shape[0] * pixels.shape[1]
+            measurement.bytes = len(data)
 
-        return self._binary_string_to_str(binary_string, end=self._end_message)
+        return header, data
 
-    def save(self, path: str) -> None:
-        """Save image as png.
+    def save(
+        self,
+        path: Union[str, BinaryIO],
+        format: str = None,
+        preset: str = formats.DEFAULT_PRESET,
+    ) -> Optional[str]:
+        """Save image as png, or as another lossless format.
 
         Args:
-            path (str): path to save image.
+            path (Union[str, BinaryIO]): path to save image, or a binary file
+            object to write it to.
+            format (str, optional): One of formats.FORMATS: "PNG", "WEBP",
+            "TIFF" or "BMP". Lossy formats are rejected, as well as formats
+            that can't store the image's mode as it is. Defaults to PNG.
+            preset (str, optional): One of formats.PRESETS, from "fastest" to
+            "smallest", trading saving time for file size. Defaults to
+            "default".
+
+        Raises:
+            ValueError: When format or preset are not supported.
+
+        Returns:
+            Optional[str]: path the image was saved to, with the format's
+            extension, or None if it was written to a file object or the image
+            was not encoded yet.
         """
         if self._encoded_image:
-            path = self._path_as_png(path)
-            self._encoded_image.save(path)
+            return self._save(self._encoded_image, path, format, preset)
         else:
             print("Error! Image was not encoded yet.")
+            return None
+
+    def save_async(
+        self,
+        path: Union[str, BinaryIO],
+        format: str = None,
+        preset: str = formats.DEFAULT_PRESET,
+        writer: writer_module.AsyncWriter = None,
+        callback: writer_module.Callback = None,
+    ) -> Future:
+        """Save image in the background, as save does, and return right away.
+
+        The next message can be encoded while this one is compressed and
+        written. Blocks while writer already has as many saves in flight as it
+        allows.
 
-    @staticmethod
-    def _write_to_lsb(tribit: str, rgb_binary: tuple):
-        """Writes tribit to least significant bit from rgb_binary
+        Args:
+            path (Union[str, BinaryIO]): path to save image, or a binary file
+            object to write it to.
+            format (str, optional): Lossless format, as in save. Defaults to
+            PNG.
+            preset (str, optional): One of formats.PRESETS. Defaults to
+            "default".
+            writer (writer_module.AsyncWriter, optional): Writer running the
+            save. Defaults to the process-wide writer.
+            callback (writer_module.Callback, optional): Called with the
+            future once it is done, after the callbacks of every earlier save
+            of writer. Defaults to None.
+
+        Raises:
+            ValueError: When the image was not encoded yet or format or preset
+            are not supported.
+
+        Returns:
+            Future: Future of the path the image was saved to, as returned by
+            save.
+        """
+        if not self._encoded_image:
+            raise ValueError("Image was not encoded yet.")
+
+        format = formats.check_format(format or "PNG", self._encoded_image.mode)
+        formats.save_options(format, preset)
+
+        writer = writer or writer_module.default_writer()
+        return writer.submit(
+            self._save, self._encoded_image, path, format, preset, callback=callback
+        )
+
+    def _save(
+        self,
+        image: Image.Image,
+        path: Union[str, BinaryIO],
+        format: Optional[str],
+        preset: str,
+    ) -> Optional[str]:
+        """Saves image as format, replacing the extension of path.
 
         Args:
-            tribit (str): A string with 3 bits
-            rgb_binary (tuple): RGB values as binary
+            image (Image.Image): Encoded image.
+            path (Union[str, BinaryIO]): Path or binary file object.
+            format (Optional[str]): Lossless format, None for PNG.
+            preset (str): One of formats.PRESETS.
 
         Returns:
-            list: rgb_binary with least significant bits as tribit
+            Optional[str]: path the image was saved to, or None if it was
+            written to a file object.
         """
-        pixel = []
-        for idx, bit in enumerate(tribit):
-            color = rgb_binary[idx]
-            color = color[:-1] + bit
-            pixel.append(color)
+        format = formats.check_format(format or "PNG", image.mode)
+        options = formats.save_options(format, preset)
+        pixels = image.width * image.height
+        if not isinstance(path, str):
+            with instrumentation.operation("save", pixels):
+                image.save(path, **options)
+            return None
 
-        return pixel
+        path = self._path_as_png(path)
+        if format != "PNG":
+            path = path[: -len(".png")] + formats.EXTENSIONS[format]
 
-    @staticmethod
-    def _split(string: str, n: int):
-        """Split string every n characters.
+        with instrumentation.operation("save", pixels) as measurement:
+            image.save(path, **options)
+            measurement.bytes = os.path.getsize(path)
+
+        return path
+
+    def to_bytes(
+        self, format: str = "PNG", preset: str = formats.DEFAULT_PRESET
+    ) -> bytes:
+        """Returns the encoded image as bytes, without touching the disk.
 
         Args:
-            string (str): String to be splitted.
-            n (int): group size.
+            format (str, optional): Lossless format, as in save. Defaults to
+            "PNG".
+            preset (str, optional): One of formats.PRESETS. Defaults to
+            "default".
+
+        Raises:
+            ValueError: When the image was not encoded yet or format or preset
+            are not supported.
 
         Returns:
-            list: A list containing substrings of size n.
+            bytes: Encoded image in format.
         """
-        return [string[start : start + n] for start in range(0, len(string), n)]
+        if not self._encoded_image:
+            raise ValueError("Image was not encoded yet.")
 
-    @staticmethod
-    def _complete_list(to_complete: list, from_complete: list):
-        """Completes to_complete with values from from_complete
+        file = io.BytesIO()
+        self.save(file, format, preset)
+        return file.getvalue()
 
-        If to_complete has 1 elements and from_complete as 3, to_complete will
-        use the second and third element from from_complete so it also has
-        3 elements.
+    @property
+    def encoded_image(self) -> Optional[Image.Image]:
+        """Optional[Image.Image]: Encoded image or None if nothing was encoded yet."""
+        return self._encoded_image
 
-        Args:
-            to_complete (list): List with RGB values for a pixel
-            from_complete (list): List with RGB values for a pixel
+    def _shape(self) -> Tuple[int, int, int]:
+        """Returns the shape of the original image without reading its pixels.
 
         Returns:
-            list: New pixel with the same length as from_complete using the
-            latter's values to complete any missing element.
+            Tuple[int, int, int]: Height, width and channels.
+        """
+        if self._original_image is None:
+            return buffers.as_pixels(self._original_cover.pixels).shape
+
+        width, height = self._original_image.size
+        return height, width, len(self._original_image.getbands())
+
+    def _pixel_count(self) -> int:
+        """Returns the number of pixels of the original image.
+
+        Returns:
+            int: Width times height.
+        """
+        height, width, _ = self._shape()
+        return height * width
+
+    def _mode(self) -> str:
+        """Returns the mode of the original image.
+
+        Returns:
+            str: Pillow mode, such as "RGB".
+        """
+        if self._original_image is None:
+            return self._original_cover.mode
+
+        return self._original_image.mode
+
+    @staticmethod
+    def _check_mode(mode: str) -> None:
+        """Checks if images of a mode can be encoded and decoded.
+
+        Args:
+            mode (str): Pillow mode.
+
+        Raises:
+            ValueError: When mode is not one of MODES.
         """
-        to_complete_ = list(to_complete).copy()
-        from_complete_ = list(from_complete).copy()
+        if mode not in MODES:
+            raise ValueError(f"Image mode must be one of {MODES}, got {mode}")
 
-        if len(to_complete_) < len(from_complete_):
+    @staticmethod
+    def _open(source: ImageSource, normalize: bool = True) -> Image.Image:
+        """Opens an image from any supported source.
 
-            n_missing_elements = len(from_complete_) - len(to_complete_)
-            start = n_missing_elements * -1
-            end = 0
-            for i in range(start, end):
-                to_complete_.append(from_complete_[i])
+        Args:
+            source (ImageSource): Path, bytes, binary file object or PIL image.
+            normalize (bool, optional): Convert 16 bit images in mode "I" to
+            "I;16". Converting keeps only the current frame, so images with
+            many frames are opened without it. Defaults to True.
 
-        return to_complete_
+        Raises:
+            ValueError: When the image is in mode "I" and isn't 16 bit, see
+            modes.normalize.
+
+        Returns:
+            Image.Image: Opened image. PIL images are returned as they are,
+            unless they are 16 bit images in mode "I" and normalize is True,
+            which are converted to "I;16".
+        """
+        if isinstance(source, Image.Image):
+            image = source
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            image = Image.open(io.BytesIO(source))
+        else:
+            image = Image.open(source)
+
+        return modes.normalize(image) if normalize else image
 
     @staticmethod
     def _path_as_png(filepath: str):
@@ -193,99 +566,3 @@ class Steganography:
                 filepath_without_extension = filepath
 
         return filepath_without_extension + ".png"
-
-    @staticmethod
-    def _str_to_binary_string(string: str) -> str:
-        """Converts regular text to binary.
-
-        Args:
-            string (str): Text to be converted.
-
-        Raises:
-            ValueError: When return value is empty.
-
-        Returns:
-            str: Text as binary.
-        """
-        binary_string = ""
-        for char in string:
-            ascii_code = ord(char)
-            binary_string += format(ascii_code, "08b")
-
-        if binary_string:
-            return binary_string
-        else:
-            raise ValueError("Error converting message to binary")
-
-    @staticmethod
-    def _binary_string_to_str(binary_string: str, end=None) -> str:
-        """Converts string with binary numbers to text string
-
-        Args:
-            binary_string (str): A string with binary numbers for ASCII
-            codes.
-            end (string, optional): Stops when end is found. Defaults to None.
-
-        Returns:
-            str: Text converted from binary string.
-        """
-        string = ""
-
-        binary_list = re.findall("." * 8, binary_string)
-        for byte in binary_list:
-            string += chr(int(byte, 2))
-            if end and string.endswith(end):
-                return string[: -len(end)]
-
-        return string
-
-    @staticmethod
-    def _rgb_to_binary(rgb: tuple) -> tuple:
-        """Converts tuple of decimal string to binary
-
-        Args:
-            rgb (tuple): An RGB tuple. Example: (255, 255, 255).
-
-        Raises:
-            ValueError: When the tuple is not of length 3.
-
-        Returns:
-            tuple: Binary tuple.
-            Example ("11111111", "11111111", "11111111").
-        """
-        if len(rgb) != 3:
-            raise ValueError("RGB must be a tuple with 3 values")
-
-        red, green, blue = tuple(map(int, rgb))
-
-        r_binary = format(red, "08b")
-        g_binary = format(green, "08b")
-        b_binary = format(blue, "08b")
-
-        return (r_binary, g_binary, b_binary)
-
-    @staticmethod
-    def _binary_to_rgb(*args) -> tuple:
-        """Converts RGB binary values to decimal.
-
-        Returns:
-            tuple: RGB values in the decimal system.
-        """
-        if len(args) == 1:
-            red = args[0][0]
-            green = args[0][1]
-            blue = args[0][2]
-        elif len(args) == 3:
-            red = args[0]
-            green = args[1]
-            blue = args[2]
-        else:
-            raise ValueError(
-                "Arguments must be RGB tuple or Red, Green, Blue as 3 arguments."
-            )
-
-        r_int = int(red, 2)
-        g_int = int(green, 2)
-        b_int = int(blue, 2)
-
-        return (r_int, g_int, b_int)
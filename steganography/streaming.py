@@ -0,0 +1,274 @@
+"""Encode very large images in bands of rows, with bounded memory.
+
+Pixels are visited column by column, so a payload only ever touches the
+leftmost columns of an image. Only those columns are copied and encoded, then
+the image is written as PNG one band of rows at a time, compressing each band
+as soon as it is filtered. Neither a full copy of the image nor the encoded
+image are ever held in memory.
+
+NumPy arrays, including ``np.memmap`` of raw pixels, are read band by band
+too. Pillow decodes compressed images as a whole the first time they are read,
+so for those the decoded image is the only full size buffer left.
+"""
+import struct
+import zlib
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+from . import buffers, engine, payload
+from . import compression as compression_module
+from .steganography import ImageSource, Steganography
+
+BAND_ROWS = 256
+IDAT_SIZE = 1 << 16
+
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+_MODES = ("L", "LA", "RGB", "RGBA")
+_PAETH = 4
+
+
+class PngWriter:
+    """Writes a PNG image band by band, compressing rows as they arrive"""
+
+    def __init__(
+        self, file: BinaryIO, width: int, height: int, channels: int, level: int = 6
+    ) -> None:
+        """Initialize the class and write the PNG signature and header.
+
+        Args:
+            file (BinaryIO): Binary file object to write to.
+            width (int): Width of the image.
+            height (int): Height of the image.
+            channels (int): Number of 8 bit channels, from 1 (grayscale) to 4
+            (RGBA).
+            level (int, optional): zlib compression level. Defaults to 6.
+
+        Raises:
+            ValueError: When the number of channels is not supported.
+        """
+        if channels not in _COLOR_TYPES:
+            raise ValueError(f"PNG images have 1 to 4 channels, got {channels}")
+
+        self._file = file
+        self._height = height
+        self._channels = channels
+        self._rows = 0
+        self._previous = np.zeros(width * channels, dtype=np.uint8)
+        self._compressor = zlib.compressobj(level)
+        self._pending = bytearray()
+
+        header = struct.pack(
+            ">IIBBBBB", width, height, 8, _COLOR_TYPES[channels], 0, 0, 0
+        )
+        self._file.write(_SIGNATURE)
+        self._chunk(b"IHDR", header)
+
+    def write(self, rows: np.ndarray) -> None:
+        """Filters, compresses and writes a band of rows.
+
+        Args:
+            rows (np.ndarray): uint8 array with shape (rows, width, channels).
+        """
+        rows = rows.reshape(len(rows), -1)
+        filtered = _paeth(rows, self._previous, self._channels)
+        self._previous = rows[-1].copy()
+        self._rows += len(rows)
+
+        self._pending += self._compressor.compress(filtered.tobytes())
+        if len(self._pending) >= IDAT_SIZE:
+            self._chunk(b"IDAT", self._pending)
+            self._pending = bytearray()
+
+    def close(self) -> None:
+        """Writes the remaining data and the end of the image.
+
+        Raises:
+            ValueError: When fewer or more rows than height were written.
+        """
+        if self._rows != self._height:
+            raise ValueError(f"Wrote {self._rows} rows of {self._height}")
+
+        self._pending += self._compressor.flush()
+        self._chunk(b"IDAT", self._pending)
+        self._chunk(b"IEND", b"")
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        """Writes a PNG chunk.
+
+        Args:
+            kind (bytes): Chunk type.
+            data (bytes): Chunk data.
+        """
+        self._file.write(struct.pack(">I", len(data)) + kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+
+def encode(
+    source: Union[ImageSource, np.ndarray],
+    output: Union[str, BinaryIO],
+    data: bytes,
+    band_rows: int = BAND_ROWS,
+    end: str = buffers.END,
+    legacy: bool = False,
+    bits_per_channel: int = 1,
+    compression: str = None,
+    compression_level: int = None,
+) -> Optional[str]:
+    """Encodes data into an image and saves it as PNG, band by band.
+
+    Produces the same pixels as Steganography, while peak memory depends on
+    band_rows and on the size of data instead of the size of the image.
+
+    Args:
+        source (Union[ImageSource, np.ndarray]): Path, bytes, binary file
+        object or PIL image in L, LA, RGB or RGBA mode, or an array with
+        shape (height, width, channels), such as a np.memmap.
+        output (Union[str, BinaryIO]): Path to save the image to, or a binary
+        file object to write it to.
+        data (bytes): Data to encode.
+        band_rows (int, optional): Rows read, filtered and compressed at a
+        time. Defaults to BAND_ROWS.
+        end, legacy, bits_per_channel, compression, compression_level: Same
+        as in Steganography.
+
+    Raises:
+        ValueError: When the options or the image mode are not supported or
+        data doesn't fit inside the image.
+
+    Returns:
+        Optional[str]: Path the image was saved to, with png as extension, or
+        None if it was written to a file object.
+    """
+    buffers.check_options(
+        legacy, bits_per_channel, compression, compression_level=compression_level
+    )
+    pixels = _open(source)
+    height, width, channels = pixels.shape
+
+    data, flags = compression_module.compress(data, compression, compression_level)
+    options = (end, legacy, bits_per_channel)
+    buffers.check_fits(len(data), pixels.shape, *options)
+
+    if legacy:
+        stop = payload.payload_pixels(len(data + end.encode("latin-1")), channels, 1)
+    else:
+        stop = payload.header_pixels(channels)
+        stop += payload.payload_pixels(len(data), channels, bits_per_channel)
+
+    n_columns = min(-(-stop // height), width)
+    columns = np.array(pixels[:, :n_columns])
+    buffers.place(columns, data, flags, *options)
+
+    if not isinstance(output, str):
+        _write(pixels, columns, output, band_rows)
+        return None
+
+    path = Steganography._path_as_png(output)
+    with open(path, "wb") as file:
+        _write(pixels, columns, file, band_rows)
+
+    return path
+
+
+def decode(source: Union[ImageSource, np.ndarray], end: str = buffers.END) -> bytes:
+    """Decodes the data hidden in an image, reading only the columns holding it.
+
+    Args:
+        source (Union[ImageSource, np.ndarray]): Image or array, as in encode.
+        end (str, optional): End characters of data encoded in legacy mode.
+        Defaults to "\\end".
+
+    Returns:
+        bytes: Decoded data.
+    """
+    _, data = buffers.read(_open(source), end)
+    return data
+
+
+def _open(source: Union[ImageSource, np.ndarray]):
+    """Returns pixels of source that are read lazily, region by region.
+
+    Args:
+        source (Union[ImageSource, np.ndarray]): Image or array.
+
+    Raises:
+        ValueError: When the image mode is not supported, or the array doesn't
+        hold 8 bit samples of 1 to 4 channels, the only ones PngWriter writes.
+
+    Returns:
+        Union[np.ndarray, engine.ImagePixels]: Pixels with shape (height,
+        width, channels).
+    """
+    if isinstance(source, np.ndarray):
+        pixels = buffers.as_pixels(source)
+        if pixels.dtype != np.uint8:
+            raise ValueError(f"Array samples must be uint8, got {pixels.dtype}")
+        if pixels.shape[2] not in _COLOR_TYPES:
+            raise ValueError(f"Array must have 1 to 4 channels, got {pixels.shape[2]}")
+        return pixels
+
+    image = Steganography._open(source)
+    if image.mode not in _MODES:
+        raise ValueError(f"Image mode must be one of {_MODES}, got {image.mode}")
+
+    return engine.ImagePixels(image)
+
+
+def _write(pixels, columns: np.ndarray, file: BinaryIO, band_rows: int) -> None:
+    """Writes pixels as PNG, with its leftmost columns replaced by columns.
+
+    Args:
+        pixels (Union[np.ndarray, engine.ImagePixels]): Original pixels.
+        columns (np.ndarray): Encoded leftmost columns.
+        file (BinaryIO): Binary file object to write to.
+        band_rows (int): Rows written at a time.
+    """
+    height, width, channels = pixels.shape
+    n_columns = columns.shape[1]
+    writer = PngWriter(file, width, height, channels)
+
+    for top in range(0, height, band_rows):
+        bottom = min(top + band_rows, height)
+        band = np.array(pixels[top:bottom, :])
+        band[:, :n_columns] = columns[top:bottom]
+        writer.write(band)
+
+    writer.close()
+
+
+def _paeth(rows: np.ndarray, previous: np.ndarray, channels: int) -> np.ndarray:
+    """Applies the PNG Paeth filter to rows.
+
+    Args:
+        rows (np.ndarray): uint8 array with one row of samples per line.
+        previous (np.ndarray): Row written before rows, zeros for the first.
+        channels (int): Samples of each pixel.
+
+    Returns:
+        np.ndarray: Filtered rows, each starting with the filter type byte.
+    """
+    current = rows.astype(np.int16)
+    up = np.vstack((previous, rows[:-1])).astype(np.int16)
+    left = np.zeros_like(current)
+    left[:, channels:] = current[:, :-channels]
+    up_left = np.zeros_like(current)
+    up_left[:, channels:] = up[:, :-channels]
+
+    estimate = left + up - up_left
+    distance_left = np.abs(estimate - left)
+    distance_up = np.abs(estimate - up)
+    distance_up_left = np.abs(estimate - up_left)
+
+    predictor = np.where(distance_up <= distance_up_left, up, up_left)
+    predictor = np.where(
+        (distance_left <= distance_up) & (distance_left <= distance_up_left),
+        left,
+        predictor,
+    )
+
+    filtered = ((current - predictor) & 0xFF).astype(np.uint8)
+    kinds = np.full((len(rows), 1), _PAETH, dtype=np.uint8)
+    return np.hstack((kinds, filtered))
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+from PIL import Image
+
+from steganography import Steganography
+from steganography.batch import EncodeJob, decode_many, encode_many
+
+
+@pytest.fixture
+def test_image():
+    return "./steganography/tests/resources/apyr.jpg"
+
+
+@pytest.fixture
+def jobs(tmp_folder, test_image):
+    return [
+        EncodeJob(test_image, f"message {idx}", os.path.join(tmp_folder, f"batch{idx}"))
+        for idx in range(6)
+    ]
+
+
+def test_encode_many(jobs):
+    # ARRANGE / ACT
+    results = encode_many(jobs, workers=2, chunksize=2)
+
+    # ASSERT
+    assert [result.job for result in results] == jobs
+    for idx, result in enumerate(results):
+        assert result.error is None
+        assert result.output == jobs[idx].output + ".png"
+        assert Steganography(result.output).decode(result.output) == f"message {idx}"
+
+
+def test_encode_many_with_bytes_and_options(tmp_folder, test_image):
+    # ARRANGE
+    output = os.path.join(tmp_folder, "batch_bytes.png")
+    jobs = [(test_image, b"\x00\x01\x02" * 100, output)]
+
+    # ACT
+    results = encode_many(jobs, workers=1, bits_per_channel=2, compression="zlib")
+
+    # ASSERT
+    assert Steganography(output).decode_bytes(output) == b"\x00\x01\x02" * 100
+    assert results[0].error is None
+
+
+def test_encode_many_collects_errors(tmp_folder, jobs):
+    # ARRANGE
+    missing = EncodeJob("missing.jpg", "message", os.path.join(tmp_folder, "missing"))
+    jobs.insert(1, missing)
+
+    # ACT
+    results = encode_many(jobs, workers=2)
+
+    # ASSERT
+    assert len(results) == len(jobs)
+    assert results[1].output is None
+    assert "FileNotFoundError" in results[1].error
+    assert all(result.error is None for result in results[:1] + results[2:])
+
+
+def test_encode_many_reports_progress(jobs):
+    # ARRANGE
+    calls = []
+
+    # ACT
+    encode_many(jobs, workers=1, progress=lambda done, total: calls.append(done))
+
+    # ASSERT
+    assert calls == list(range(1, len(jobs) + 1))
+
+
+@pytest.fixture
+def encoded_folder(tmp_folder, test_image):
+    folder = os.path.join(tmp_folder, "decode_many")
+    os.makedirs(os.path.join(folder, "nested"), exist_ok=True)
+    for idx in range(5):
+        s = Steganography(test_image)
+        s.encode(f"message {idx}")
+        s.save(os.path.join(folder, "nested" if idx % 2 else "", f"image{idx}.png"))
+
+    return folder
+
+
+def test_decode_many_with_glob(encoded_folder):
+    # ARRANGE / ACT
+    results = decode_many(os.path.join(encoded_folder, "**", "*.png"), workers=2)
+
+    # ASSERT
+    messages = sorted(result.message for result in results)
+    assert messages == [f"message {idx}" for idx in range(5)]
+
+
+def test_decode_many_is_lazy(encoded_folder):
+    # ARRANGE
+    paths = iter([os.path.join(encoded_folder, "image0.png")] * 100)
+
+    # ACT
+    results = decode_many(paths, workers=1, chunksize=4)
+    first = next(results)
+
+    # ASSERT
+    assert first.message == "message 0"
+    assert len(list(paths)) == 96
+
+
+def test_decode_many_binary_with_errors(encoded_folder):
+    # ARRANGE
+    paths = [os.path.join(encoded_folder, "image0.png"), "missing.png"]
+
+    # ACT
+    results = {result.path: result for result in decode_many(paths, binary=True)}
+
+    # ASSERT
+    assert results[paths[0]].message == b"message 0"
+    assert results[paths[0]].error is None
+    assert "FileNotFoundError" in results["missing.png"].error
+
+
+def test_decode_many_opens_each_image_once(encoded_folder, monkeypatch):
+    # ARRANGE
+    opened = []
+    open_image = Image.open
+    monkeypatch.setattr(
+        Image, "open", lambda *args: opened.append(args) or open_image(*args)
+    )
+    paths = [os.path.join(encoded_folder, "image0.png")]
+
+    # ACT
+    results = list(decode_many(paths, workers=1))
+
+    # ASSERT
+    assert results[0].message == "message 0"
+    assert len(opened) == 1
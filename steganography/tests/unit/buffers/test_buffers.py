@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from steganography import buffers
+
+
+@pytest.fixture
+def pixels(cover):
+    return cover((20, 20, 3), array=True)
+
+
+def test_embed_in_place(pixels):
+    # ARRANGE
+    data = b"Sample text"
+
+    # ACT
+    result = buffers.embed(pixels, data)
+
+    # ASSERT
+    assert np.shares_memory(result, pixels)
+    assert buffers.extract(pixels) == data
+
+
+def test_embed_copy(pixels):
+    # ARRANGE
+    original = pixels.copy()
+
+    # ACT
+    result = buffers.embed(pixels, b"Sample text", copy=True)
+
+    # ASSERT
+    assert not np.shares_memory(result, pixels)
+    assert np.array_equal(pixels, original)
+    assert buffers.extract(result) == b"Sample text"
+
+
+def test_embed_and_extract_bytearray(pixels):
+    # ARRANGE
+    buffer = bytearray(pixels.tobytes())
+
+    # ACT
+    buffers.embed(buffer, b"Sample text", shape=pixels.shape, bits_per_channel=2)
+    result = buffers.extract(bytes(buffer), shape=pixels.shape)
+
+    # ASSERT
+    assert result == b"Sample text"
+
+
+def test_embed_read_only_buffer(pixels):
+    # ARRANGE
+    buffer = pixels.tobytes()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        buffers.embed(buffer, b"Sample text", shape=pixels.shape)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"legacy": True},
+        {"compression": "zlib"},
+        {"legacy": True, "end": "<stop>"},
+    ],
+)
+def test_embed_and_extract_options(pixels, options):
+    # ARRANGE
+    data = b"Sample text " * 4
+
+    # ACT
+    buffers.embed(pixels, data, **options)
+    result = buffers.extract(pixels, end=options.get("end", buffers.END))
+
+    # ASSERT
+    assert result == data
+
+
+def test_as_pixels_grayscale():
+    # ARRANGE
+    buffer = np.zeros((4, 5), dtype=np.uint8)
+
+    # ACT
+    result = buffers.as_pixels(buffer)
+
+    # ASSERT
+    assert result.shape == (4, 5, 1)
+    assert np.shares_memory(result, buffer)
+
+
+@pytest.mark.parametrize(
+    "buffer",
+    [np.zeros((4, 5, 3), dtype=np.float32), np.zeros(60, dtype=np.uint8)],
+)
+def test_as_pixels_invalid(buffer):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        buffers.as_pixels(buffer)
+
+
+def test_check_options_legacy_with_compression():
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        buffers.check_options(legacy=True, compression="zlib")
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, 138),
+        ({"bits_per_channel": 4}, 555),
+        ({"legacy": True}, 146),
+        ({"legacy": True, "end": "<stop>"}, 144),
+    ],
+)
+def test_capacity(options, expected):
+    # ARRANGE / ACT
+    result = buffers.capacity((20, 20, 3), **options)
+
+    # ASSERT
+    assert result == expected
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_embed_too_large(pixels, legacy):
+    # ARRANGE
+    original = pixels.copy()
+    data = bytes(buffers.capacity(pixels.shape, legacy=legacy) + 1)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        buffers.embed(pixels, data, legacy=legacy)
+    assert np.array_equal(pixels, original)
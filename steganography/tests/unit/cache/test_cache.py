@@ -0,0 +1,166 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import Steganography
+from steganography.cache import CacheStats, CoverCache, default_cache
+
+
+@pytest.fixture
+def covers(tmp_folder):
+    paths = []
+    for idx in range(3):
+        pixels = np.full((10, 10, 3), idx, dtype=np.uint8)
+        path = os.path.join(tmp_folder, f"cover{idx}.png")
+        Image.fromarray(pixels).save(path)
+        paths.append(path)
+
+    return paths
+
+
+def test_get_hit_and_miss(covers):
+    # ARRANGE
+    cache = CoverCache()
+
+    # ACT
+    first = cache.get(covers[0])
+    second = cache.get(covers[0])
+
+    # ASSERT
+    assert first is second
+    assert not first.flags.writeable
+    assert cache.stats() == CacheStats(
+        hits=1, misses=1, evictions=0, entries=1, size=300
+    )
+
+
+def test_get_bytes_by_content(covers):
+    # ARRANGE
+    cache = CoverCache()
+    with open(covers[1], "rb") as file:
+        data = file.read()
+
+    # ACT
+    cache.get(data)
+    result = cache.get(io.BytesIO(data))
+
+    # ASSERT
+    assert result[0, 0, 0] == 1
+    assert cache.stats().hits == 1
+
+
+def test_get_modified_file(covers):
+    # ARRANGE
+    cache = CoverCache()
+    cache.get(covers[2])
+    Image.new("RGB", (10, 10), (9, 9, 9)).save(covers[2])
+    os.utime(covers[2], ns=(0, 0))
+
+    # ACT
+    result = cache.get(covers[2])
+
+    # ASSERT
+    assert result[0, 0, 0] == 9
+    assert cache.stats().misses == 2
+
+
+def test_evicts_least_recently_used(covers):
+    # ARRANGE
+    cache = CoverCache(max_bytes=600)
+
+    # ACT
+    cache.get(covers[0])
+    cache.get(covers[1])
+    cache.get(covers[0])
+    cache.get(covers[2])
+
+    # ASSERT
+    assert cache.stats().evictions == 1
+    cache.get(covers[0])
+    assert cache.stats().hits == 2
+    cache.get(covers[1])
+    assert cache.stats().misses == 4
+
+
+def test_larger_than_max_bytes_not_cached(covers):
+    # ARRANGE
+    cache = CoverCache(max_bytes=100)
+
+    # ACT
+    result = cache.get(covers[0])
+
+    # ASSERT
+    assert result.shape == (10, 10, 3)
+    assert cache.stats().entries == 0
+
+
+def test_clear(covers):
+    # ARRANGE
+    cache = CoverCache()
+    cache.get(covers[0])
+
+    # ACT
+    cache.clear()
+
+    # ASSERT
+    assert cache.stats() == CacheStats(0, 0, 0, 0, 0)
+
+
+def test_default_cache():
+    # ARRANGE / ACT / ASSERT
+    assert default_cache() is default_cache()
+
+
+def test_steganography_with_cache(covers):
+    # ARRANGE
+    cache = CoverCache()
+    first = Steganography(covers[0], cache=cache)
+    second = Steganography(covers[0], cache=cache)
+
+    # ACT
+    first.encode("first")
+    second.encode("second")
+
+    # ASSERT
+    assert first.decode() == "first"
+    assert second.decode() == "second"
+    assert cache.get(covers[0])[0, 0, 0] == 0
+    assert cache.stats().hits == 2
+
+
+def test_steganography_with_cache_16_bits_opened_as_mode_i(cover, tmp_folder):
+    # ARRANGE
+    path = os.path.join(tmp_folder, "cover_16_bits.tiff")
+    cover((10, 10), "I;16").convert("I").save(path)
+    cache = CoverCache()
+
+    # ACT
+    s = Steganography(path, cache=cache)
+    s.encode("a")
+
+    # ASSERT
+    assert Image.open(path).mode == "I"
+    assert cache.get_cover(path).mode == "I;16"
+    assert s.decode() == "a"
+
+
+def test_steganography_with_cache_keeps_colors(covers):
+    # ARRANGE
+    path = covers[0].replace(".png", "_palette.png")
+    Image.open(covers[1]).convert("P").save(path)
+    cache = CoverCache()
+    Steganography(path, cache=cache)
+
+    # ACT
+    s = Steganography(path, cache=cache)
+    s.encode("a")
+
+    # ASSERT
+    assert s.decode() == "a"
+    assert s.encoded_image.mode == "P"
+    colors = np.array(s.encoded_image.convert("RGB"))
+    assert np.array_equal(colors, np.array(Image.open(path).convert("RGB")))
+    assert cache.get_cover(path).mode == "P"
@@ -0,0 +1,258 @@
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from steganography import Steganography
+from steganography.cli import main
+
+
+@pytest.fixture
+def test_image():
+    return "./steganography/tests/resources/apyr.jpg"
+
+
+@pytest.fixture
+def stdin(monkeypatch):
+    def set_stdin(data: bytes):
+        monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(data)))
+
+    return set_stdin
+
+
+def test_help_doesnt_import_pillow_or_numpy():
+    # ARRANGE
+    code = (
+        "import sys; from steganography import cli; cli._parser();"
+        + " print('PIL' in sys.modules, 'numpy' in sys.modules)"
+    )
+
+    # ACT
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+
+    # ASSERT
+    assert result.stdout.split() == [b"False", b"False"]
+
+
+def test_encode_and_decode_through_stdin_and_stdout(test_image, capsysbinary, stdin):
+    # ARRANGE
+    with open(test_image, "rb") as file:
+        cover = file.read()
+
+    # ACT
+    stdin(cover)
+    encode_exit_code = main(["encode", "-", "--message", "hidden ✓", "-b", "3"])
+    image, _ = capsysbinary.readouterr()
+
+    stdin(image)
+    decode_exit_code = main(["decode"])
+    output, _ = capsysbinary.readouterr()
+
+    # ASSERT
+    assert encode_exit_code == decode_exit_code == 0
+    assert image.startswith(b"\x89PNG")
+    assert output.decode() == "hidden ✓\n"
+
+
+def test_encode_payload_from_stdin(tmp_folder, test_image, capsysbinary, stdin):
+    # ARRANGE
+    output = os.path.join(tmp_folder, "cli_stdin_payload.png")
+    stdin(b"\x00binary\xff")
+
+    # ACT
+    exit_code = main(["encode", test_image, "-o", output, "-c", "zlib"])
+    main(["decode", output, "--binary"])
+    result, errors = capsysbinary.readouterr()
+
+    # ASSERT
+    assert exit_code == 0
+    assert errors.decode().strip() == output
+    assert result == b"\x00binary\xff"
+
+
+def test_encode_with_format(tmp_folder, test_image, capsys):
+    # ARRANGE
+    output = os.path.join(tmp_folder, "cli_format.png")
+
+    # ACT
+    exit_code = main(
+        ["encode", test_image, "-m", "tiff", "-o", output, "--format", "tiff"]
+    )
+    main(["decode", output.replace(".png", ".tiff")])
+    result, errors = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 0
+    assert errors.strip().endswith("cli_format.tiff")
+    assert result == "tiff\n"
+
+
+def test_encode_with_scatter_order(tmp_folder, test_image, capsys):
+    # ARRANGE
+    output = os.path.join(tmp_folder, "cli_scatter.png")
+    options = ["--order", "scatter", "--key", "secret"]
+
+    # ACT
+    exit_code = main(["encode", test_image, "-m", "scattered", "-o", output, *options])
+    main(["decode", output, "-k", "secret"])
+    result, _ = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 0
+    assert result == "scattered\n"
+
+
+def test_encode_if_cover_and_payload_from_stdin(capsys, stdin):
+    # ARRANGE
+    stdin(b"")
+
+    # ACT
+    exit_code = main(["encode", "-"])
+    _, errors = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 1
+    assert "stdin" in errors
+
+
+def test_encode_with_invalid_compression_level(tmp_folder, test_image, capsys):
+    # ARRANGE
+    output = os.path.join(tmp_folder, "cli_level.png")
+    options = ["--compression", "zlib", "--compression-level", "42"]
+
+    # ACT
+    exit_code = main(["encode", test_image, "-m", "level", "-o", output, *options])
+    _, errors = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 1
+    assert "level" in errors
+    assert not os.path.exists(output)
+
+
+def test_capacity(test_image, capsys):
+    # ARRANGE / ACT
+    main(["capacity", test_image])
+    main(["capacity", test_image, "--bits-per-channel", "4"])
+    main(["capacity", test_image, "--legacy"])
+    output, _ = capsys.readouterr()
+
+    # ASSERT
+    assert list(map(int, output.split())) == [31092, 124371, 31100]
+
+
+def test_batch(tmp_folder, test_image, capsys):
+    # ARRANGE
+    payload_file = os.path.join(tmp_folder, "cli_payload.bin")
+    with open(payload_file, "wb") as file:
+        file.write(b"\xde\xad\xbe\xef")
+
+    outputs = [os.path.join(tmp_folder, f"cli{idx}.png") for idx in range(2)]
+    jobs = [
+        {"cover": test_image, "message": "hi", "output": outputs[0]},
+        {"cover": test_image, "payload": payload_file, "output": outputs[1]},
+    ]
+    jobs_file = os.path.join(tmp_folder, "jobs.jsonl")
+    with open(jobs_file, "w") as file:
+        file.write("\n".join(json.dumps(job) for job in jobs))
+
+    # ACT
+    exit_code = main(["batch", jobs_file, "--workers", "1", "-b", "2"])
+    output, errors = capsys.readouterr()
+    results = [json.loads(line) for line in output.splitlines()]
+
+    # ASSERT
+    assert exit_code == 0
+    assert "2/2" in errors
+    assert [result["error"] for result in results] == [None, None]
+    assert Steganography(test_image).decode(results[0]["output"]) == "hi"
+    assert Steganography(test_image).decode_bytes(results[1]["output"]) == (
+        b"\xde\xad\xbe\xef"
+    )
+
+
+def test_batch_with_errors(tmp_folder, capsys):
+    # ARRANGE
+    jobs_file = os.path.join(tmp_folder, "jobs_with_errors.jsonl")
+    with open(jobs_file, "w") as file:
+        job = {"cover": "missing.jpg", "message": "hi", "output": "out.png"}
+        file.write(json.dumps(job))
+
+    # ACT
+    exit_code = main(["batch", jobs_file, "--workers", "1", "--quiet"])
+    output, errors = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 1
+    assert errors == ""
+    assert "FileNotFoundError" in json.loads(output)["error"]
+
+
+def test_decode_many(tmp_folder, test_image, capsys, monkeypatch):
+    # ARRANGE
+    folder = os.path.join(tmp_folder, "cli_decode_many")
+    os.mkdir(folder)
+    for idx in range(3):
+        s = Steganography(test_image)
+        s.encode(f"message {idx}")
+        s.save(os.path.join(folder, f"image{idx}.png"))
+
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{folder}/missing.png\n"))
+
+    # ACT
+    exit_code = main(["decode-many", f"{folder}/*.png", "-", "--workers", "2"])
+    output, _ = capsys.readouterr()
+    results = {
+        os.path.basename(line["path"]): line
+        for line in map(json.loads, output.splitlines())
+    }
+
+    # ASSERT
+    assert exit_code == 1
+    assert len(results) == 4
+    for idx in range(3):
+        assert results[f"image{idx}.png"]["message"] == f"message {idx}"
+    assert "FileNotFoundError" in results["missing.png"]["error"]
+
+
+def test_decode_many_binary(tmp_folder, test_image, capsys):
+    # ARRANGE
+    path = os.path.join(tmp_folder, "cli_decode_many_binary.png")
+    s = Steganography(test_image)
+    s.encode_bytes(b"\x00\xff")
+    s.save(path)
+
+    # ACT
+    exit_code = main(["decode-many", path, "--binary", "--workers", "1"])
+    output, _ = capsys.readouterr()
+
+    # ASSERT
+    assert exit_code == 0
+    assert base64.b64decode(json.loads(output)["payload"]) == b"\x00\xff"
+
+
+def test_probe(tmp_folder, test_image, capsys):
+    # ARRANGE
+    folder = os.path.join(tmp_folder, "cli_probe")
+    os.mkdir(folder)
+    s = Steganography(test_image)
+    s.encode("probed")
+    s.save(os.path.join(folder, "encoded.png"))
+    index = os.path.join(folder, "index.sqlite")
+
+    # ACT
+    exit_code = main(["probe", f"{folder}/*.png", test_image, "--index", index])
+    main(["probe", f"{folder}/*.png", "--index", index])
+    output, _ = capsys.readouterr()
+    results = [json.loads(line) for line in output.splitlines()]
+
+    # ASSERT
+    assert exit_code == 0
+    assert results[0]["payload"] is True
+    assert results[0]["length"] == len("probed")
+    assert results[1]["payload"] is False
+    assert results[2] == results[0]
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from steganography import compression, payload
+
+
+@pytest.fixture
+def json_data():
+    rows = [{"id": idx, "level": "INFO", "message": "all good"} for idx in range(200)]
+    return json.dumps(rows).encode()
+
+
+def test_compress_and_decompress(json_data):
+    for method in compression.METHODS + (compression.AUTO,):
+        # ARRANGE / ACT
+        data, flags = compression.compress(json_data, method)
+        result = compression.decompress(data, flags)
+
+        # ASSERT
+        assert len(data) < len(json_data)
+        assert result == json_data
+
+
+def test_compress_with_flags(json_data):
+    # ARRANGE / ACT
+    _, zlib_flags = compression.compress(json_data, "zlib")
+    _, lzma_flags = compression.compress(json_data, "lzma")
+
+    # ASSERT
+    assert zlib_flags == payload.FLAG_ZLIB
+    assert lzma_flags == payload.FLAG_LZMA
+
+
+def test_compress_with_level(json_data):
+    # ARRANGE / ACT
+    stored, _ = compression.compress(json_data, "zlib", level=0)
+    smallest, _ = compression.compress(json_data, "zlib", level=9)
+
+    # ASSERT
+    assert len(smallest) < len(stored)
+
+
+def test_compress_without_method(json_data):
+    # ARRANGE / ACT
+    data, flags = compression.compress(json_data, None)
+
+    # ASSERT
+    assert data == json_data
+    assert flags == 0
+
+
+def test_compress_if_data_doesnt_shrink():
+    # ARRANGE
+    data = b"short"
+
+    # ACT
+    result, flags = compression.compress(data, compression.AUTO)
+
+    # ASSERT
+    assert result == data
+    assert flags == 0
+
+
+def test_compress_with_unknown_method():
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        compression.compress(b"data", "gzip")
+
+
+@pytest.mark.parametrize("level", [-1, 10, 42, 1.5, "9", True])
+def test_compress_with_invalid_level(level):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        compression.compress(b"data", "zlib", level)
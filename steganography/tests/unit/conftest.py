@@ -4,6 +4,7 @@ from shutil import rmtree
 from tempfile import mkdtemp
 
 import pytest
+from PIL import Image
 
 TMP_FOLDER = mkdtemp()
 
@@ -26,3 +27,36 @@ def random():
     seed = time.time()
     print("Random Seed:", seed)
     return Random()
+
+
+@pytest.fixture(scope="session")
+def cover():
+    """Returns a function making synthetic covers of random pixels.
+
+    The pixels are the same on every call with the same arguments:
+
+    - shape: (height, width, channels) or (height, width) of the pixels.
+    - mode: Mode the image is converted to. Palette images use 16 colors, so
+      they can be encoded with up to 4 bits per channel, and "I;16" and
+      "I;16B" images are made of 16 bit samples of shape (height, width).
+    - array: Return the pixels as a NumPy array instead of an image.
+    - seed: Seed of the pixels, to make different covers of the same shape.
+
+    Tests using it are skipped when NumPy isn't installed.
+    """
+    np = pytest.importorskip("numpy")
+
+    def make(shape=(40, 30, 3), mode=None, array=False, seed=0):
+        rng = np.random.default_rng(seed)
+        if mode in ("I;16", "I;16B"):
+            pixels = rng.integers(0, 1 << 16, shape[:2], dtype=np.uint16)
+            return Image.fromarray(pixels.astype("<u2" if mode == "I;16" else ">u2"))
+
+        pixels = rng.integers(0, 256, shape, dtype=np.uint8)
+        if array:
+            return pixels
+
+        image = Image.fromarray(pixels)
+        return image.convert(mode, palette=Image.ADAPTIVE, colors=16) if mode else image
+
+    return make
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from steganography import Steganography
+from steganography import corpus as corpus_module
+from steganography.corpus import CorpusIndex, IndexStats
+
+
+@pytest.fixture
+def folder(cover, tmp_path):
+    for index in range(4):
+        image = cover((40, 30, 3), seed=index)
+        if index % 2:
+            image.save(tmp_path / f"plain{index}.png")
+        else:
+            s = Steganography(image)
+            s.encode(f"message {index}")
+            s.save(str(tmp_path / f"encoded{index}.png"))
+
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    return tmp_path
+
+
+def paths(folder):
+    return sorted(str(path) for path in folder.iterdir())
+
+
+def test_update_probes_every_file(folder):
+    # ARRANGE
+    index = CorpusIndex()
+
+    # ACT
+    stats = index.update(paths(folder))
+
+    # ASSERT
+    assert stats == IndexStats(probed=5, unchanged=0, errors=1)
+    assert len(index) == 5
+    assert [os.path.basename(entry.path) for entry in index.with_payload()] == [
+        "encoded0.png",
+        "encoded2.png",
+    ]
+    assert index.get(str(folder / "encoded2.png")).header.length == len("message 2")
+    assert not index.get(str(folder / "plain1.png")).has_payload
+    assert "UnidentifiedImageError" in index.get(str(folder / "broken.png")).error
+    assert index.get(str(folder / "missing.png")) is None
+
+
+def test_update_only_probes_changed_files(folder, monkeypatch):
+    # ARRANGE
+    database = str(folder / "index.sqlite")
+    with CorpusIndex(database) as index:
+        index.update(paths(folder))
+
+    probed = []
+    probe = corpus_module.probe
+    monkeypatch.setattr(
+        corpus_module, "probe", lambda path: probed.append(path) or probe(path)
+    )
+
+    s = Steganography(str(folder / "plain1.png"))
+    s.encode("now encoded")
+    s.save(str(folder / "plain1.png"))
+    os.utime(folder / "plain1.png", ns=(0, 0))
+
+    # ACT
+    with CorpusIndex(database) as index:
+        stats = index.update(paths(folder))
+        entry = index.get(str(folder / "plain1.png"))
+
+    # ASSERT
+    assert probed == [str(folder / "index.sqlite"), str(folder / "plain1.png")]
+    assert stats.unchanged == 4
+    assert entry.has_payload
+    assert entry.mtime_ns == 0
+
+
+def test_probe_yields_in_order(folder, monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(corpus_module, "BATCH_SIZE", 2)
+    index = CorpusIndex(workers=3)
+    index.update(paths(folder)[:2])
+
+    # ACT
+    entries = list(index.probe(paths(folder)))
+
+    # ASSERT
+    assert [entry.path for entry in entries] == paths(folder)
+    assert [entry.has_payload for entry in entries] == [
+        False,
+        True,
+        True,
+        False,
+        False,
+    ]
+
+
+def test_prune(folder):
+    # ARRANGE
+    index = CorpusIndex()
+    index.update(paths(folder))
+    os.remove(folder / "plain3.png")
+
+    # ACT
+    removed = index.prune()
+
+    # ASSERT
+    assert removed == 1
+    assert len(index) == 4
@@ -0,0 +1,169 @@
+import numpy as np
+from PIL import Image
+
+from steganography import engine
+
+
+def test_unpack_bits():
+    # ARRANGE
+    data = b"D"
+    expected_result = [0, 1, 0, 0, 0, 1, 0, 0]
+
+    # ACT
+    result = engine.unpack_bits(data)
+
+    # ASSERT
+    assert result.tolist() == expected_result
+
+
+def test_capacity():
+    # ARRANGE
+    pixels = np.zeros((4, 5, 3), dtype=np.uint8)
+
+    # ACT
+    result = engine.capacity(pixels)
+
+    # ASSERT
+    assert result == 60
+
+
+def test_embed_writes_column_by_column():
+    # ARRANGE
+    pixels = np.full((2, 2, 3), 0b10000000, dtype=np.uint8)
+    bits = np.array([1, 1, 0, 1, 0, 1, 1, 1], dtype=np.uint8)
+
+    # ACT
+    engine.embed(pixels, bits)
+
+    # ASSERT
+    assert pixels[0, 0].tolist() == [129, 129, 128]
+    assert pixels[1, 0].tolist() == [129, 128, 129]
+    assert pixels[0, 1].tolist() == [129, 129, 128]
+    assert pixels[1, 1].tolist() == [128, 128, 128]
+
+
+def test_embed_keeps_other_bits():
+    # ARRANGE
+    pixels = np.full((1, 1, 3), 0b11111111, dtype=np.uint8)
+    bits = np.array([0, 1, 0], dtype=np.uint8)
+
+    # ACT
+    engine.embed(pixels, bits)
+
+    # ASSERT
+    assert pixels[0, 0].tolist() == [254, 255, 254]
+
+
+def test_embed_with_start():
+    # ARRANGE
+    pixels = np.zeros((2, 2, 3), dtype=np.uint8)
+    bits = np.ones(3, dtype=np.uint8)
+
+    # ACT
+    engine.embed(pixels, bits, start=2)
+
+    # ASSERT
+    assert pixels[:, 0].sum() == 0
+    assert pixels[0, 1].tolist() == [1, 1, 1]
+    assert pixels[1, 1].tolist() == [0, 0, 0]
+
+
+def test_embed_ignores_bits_that_dont_fit():
+    # ARRANGE
+    pixels = np.zeros((1, 2, 3), dtype=np.uint8)
+    bits = np.ones(10, dtype=np.uint8)
+
+    # ACT
+    engine.embed(pixels, bits)
+
+    # ASSERT
+    assert pixels.sum() == 6
+
+
+def test_extract():
+    # ARRANGE
+    pixels = np.array([[[1, 2, 3]], [[4, 5, 7]]], dtype=np.uint8)
+    expected_result = [1, 0, 1, 0, 1, 1]
+
+    # ACT
+    result = engine.extract(pixels, 0, 2)
+
+    # ASSERT
+    assert result.tolist() == expected_result
+
+
+def test_read_until_end():
+    # ARRANGE
+    pixels = np.zeros((10, 10, 3), dtype=np.uint8)
+    engine.embed(pixels, engine.unpack_bits(b"some text\\endNOT SEEN"))
+
+    # ACT
+    result = engine.read_until(pixels, b"\\end")
+
+    # ASSERT
+    assert result == b"some text"
+
+
+def test_read_until_end_across_chunks(monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(engine, "FIRST_CHUNK", 1)
+    pixels = np.zeros((7, 9, 3), dtype=np.uint8)
+    engine.embed(pixels, engine.unpack_bits(b"some longer text\\end"))
+
+    # ACT
+    result = engine.read_until(pixels, b"\\end")
+
+    # ASSERT
+    assert result == b"some longer text"
+
+
+def test_read_until_without_end():
+    # ARRANGE
+    pixels = np.zeros((2, 3, 3), dtype=np.uint8)
+    engine.embed(pixels, engine.unpack_bits(b"ab"))
+
+    # ACT
+    result = engine.read_until(pixels, b"\\end")
+
+    # ASSERT
+    assert result == b"ab"
+
+
+def test_image_pixels_converts_only_requested_columns():
+    # ARRANGE
+    array = np.arange(2 * 4 * 3, dtype=np.uint8).reshape(2, 4, 3)
+    pixels = engine.ImagePixels(Image.fromarray(array))
+
+    # ACT
+    result = pixels[:, 1:3]
+
+    # ASSERT
+    assert pixels.shape == (2, 4, 3)
+    assert np.array_equal(result, array[:, 1:3])
+
+
+def test_embed_with_bits_per_channel():
+    # ARRANGE
+    pixels = np.full((1, 2, 3), 0b11111111, dtype=np.uint8)
+    bits = np.array([1, 0, 0, 1, 1, 0, 1], dtype=np.uint8)
+
+    # ACT
+    engine.embed(pixels, bits, bits_per_channel=2)
+
+    # ASSERT
+    assert pixels[0, 0].tolist() == [0b11111110, 0b11111101, 0b11111110]
+    assert pixels[0, 1].tolist() == [0b11111110, 0b11111111, 0b11111111]
+
+
+def test_embed_and_extract_with_bits_per_channel(random):
+    for bits_per_channel in range(1, 5):
+        # ARRANGE
+        pixels = np.zeros((9, 7, 3), dtype=np.uint8)
+        bits = np.array([random.randint(0, 1) for _ in range(100)], dtype=np.uint8)
+
+        # ACT
+        engine.embed(pixels, bits, 2, bits_per_channel)
+        result = engine.extract(pixels, 2, 63, bits_per_channel)
+
+        # ASSERT
+        assert result[: bits.size].tolist() == bits.tolist()
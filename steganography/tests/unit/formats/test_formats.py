@@ -0,0 +1,140 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import Steganography, formats
+from steganography.formats import FORMATS, PRESETS, check_format, save_options
+
+
+@pytest.fixture
+def rgb_image(cover):
+    return cover((40, 30, 3))
+
+
+@pytest.mark.parametrize("format", FORMATS)
+@pytest.mark.parametrize("preset", PRESETS)
+def test_save_and_decode(rgb_image, format, preset):
+    # ARRANGE
+    s = Steganography(rgb_image, compression="zlib")
+    s.encode("lossless")
+
+    # ACT
+    data = s.to_bytes(format, preset)
+    result = Steganography(data).decode()
+
+    # ASSERT
+    assert Image.open(io.BytesIO(data)).format == format
+    assert result == "lossless"
+
+
+@pytest.mark.parametrize(
+    "format, mode",
+    [("WEBP", "L"), ("WEBP", "LA"), ("WEBP", "P"), ("BMP", "RGBA"), ("BMP", "LA")],
+)
+def test_save_unsupported_mode(rgb_image, format, mode):
+    # ARRANGE
+    s = Steganography(rgb_image.convert(mode, palette=Image.ADAPTIVE, colors=16))
+    s.encode("a")
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        s.to_bytes(format)
+
+
+@pytest.mark.parametrize("mode", ["L", "LA", "P", "RGBA"])
+def test_save_tiff_modes(rgb_image, mode):
+    # ARRANGE
+    s = Steganography(rgb_image.convert(mode, palette=Image.ADAPTIVE, colors=16))
+    s.encode("a")
+
+    # ACT
+    result = Steganography(s.to_bytes("tiff", "smallest")).decode()
+
+    # ASSERT
+    assert result == "a"
+
+
+@pytest.mark.parametrize("format", ["JPEG", "gif", "unknown"])
+def test_check_format_lossy(format):
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        check_format(format)
+
+
+def test_check_format():
+    # ACT / ASSERT
+    assert check_format("webp", "RGBA") == "WEBP"
+
+
+def test_save_options():
+    # ACT
+    fastest = save_options("png", "fastest")
+    smallest = save_options("PNG", "smallest")
+
+    # ASSERT
+    assert fastest == {"format": "PNG", "compress_level": 1}
+    assert smallest == {"format": "PNG", "compress_level": 9, "optimize": True}
+    assert save_options("WEBP")["lossless"]
+
+
+def test_save_options_unknown_preset():
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        save_options("PNG", "tiny")
+
+
+def test_save_with_format(rgb_image, tmp_folder):
+    # ARRANGE
+    s = Steganography(rgb_image)
+    s.encode("saved as webp")
+
+    # ACT
+    path = s.save(os.path.join(tmp_folder, "formats.png"), format="webp")
+
+    # ASSERT
+    assert path == os.path.join(tmp_folder, "formats.webp")
+    assert Steganography(path).decode() == "saved as webp"
+
+
+def test_presets_trade_size():
+    # ARRANGE
+    pixels = np.zeros((200, 200, 3), dtype=np.uint8)
+    pixels[::2] = 255
+    s = Steganography(Image.fromarray(pixels))
+    s.encode("smaller")
+
+    # ACT
+    fastest = s.to_bytes("PNG", "fastest")
+    smallest = s.to_bytes("PNG", "smallest")
+
+    # ASSERT
+    assert len(smallest) <= len(fastest)
+
+
+def test_save_rgba_as_webp(rgb_image):
+    # ARRANGE
+    image = rgb_image.convert("RGBA")
+    image.putalpha(0)
+    s = Steganography(image)
+    s.encode("transparent")
+
+    # ACT
+    result = Steganography(s.to_bytes("webp")).decode()
+
+    # ASSERT
+    assert result == "transparent"
+
+
+def test_save_rgba_as_webp_without_exact(rgb_image, monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(formats, "_webp_keeps_transparent_pixels", lambda: False)
+    s = Steganography(rgb_image.convert("RGBA"))
+    s.encode("transparent")
+
+    # ACT / ASSERT
+    assert check_format("webp", "RGB") == "WEBP"
+    with pytest.raises(ValueError):
+        s.to_bytes("webp")
@@ -0,0 +1,189 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import frames
+
+
+@pytest.fixture
+def animation(cover):
+    images = [cover((20, 30, 3), seed=idx) for idx in range(4)]
+    file = io.BytesIO()
+    images[0].save(file, format="GIF", save_all=True, append_images=images[1:])
+    return file.getvalue()
+
+
+def test_capacity(animation):
+    # ARRANGE / ACT
+    result = frames.capacity(animation, bits_per_channel=2)
+
+    # ASSERT
+    assert result == 4 * (427 - 20)
+
+
+@pytest.mark.parametrize("extension", ["tiff", "png"])
+def test_encode_and_decode(tmp_folder, animation, extension):
+    # ARRANGE
+    data = np.random.default_rng(1).bytes(500)
+    path = os.path.join(tmp_folder, f"frames.{extension}")
+
+    # ACT
+    frames.encode(animation, path, data)
+    result = frames.decode(path)
+
+    # ASSERT
+    assert result == data
+    assert Image.open(path).n_frames == 4
+
+
+def test_encode_only_first_frames(animation):
+    # ARRANGE
+    file = io.BytesIO()
+    original = Image.open(io.BytesIO(animation))
+    original.seek(3)
+    last_frame = np.array(original.convert("RGB"))
+
+    # ACT
+    frames.encode(animation, file, b"Sample text", format="TIFF")
+
+    # ASSERT
+    image = Image.open(io.BytesIO(file.getvalue()))
+    image.seek(3)
+    assert np.array_equal(np.array(image), last_frame)
+    assert frames.decode(file.getvalue()) == b"Sample text"
+
+
+def test_encode_too_large(animation):
+    # ARRANGE
+    file = io.BytesIO()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        frames.encode(animation, file, bytes(5000), format="TIFF")
+    assert file.getvalue() == b""
+
+
+@pytest.mark.parametrize("output, format", [("frames.gif", None), ("frames", None)])
+def test_encode_unsupported_format(animation, output, format):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        frames.encode(animation, output, b"Sample text", format=format)
+
+
+@pytest.mark.parametrize(
+    "mode, format",
+    [
+        ("L", "TIFF"),
+        ("L", "PNG"),
+        ("LA", "TIFF"),
+        ("LA", "PNG"),
+        ("RGBA", "TIFF"),
+        ("RGBA", "PNG"),
+        ("I;16", "TIFF"),
+        ("I;16B", "TIFF"),
+    ],
+)
+def test_encode_keeps_mode(cover, mode, format):
+    # ARRANGE
+    images = [cover((20, 30, 4), mode, seed=idx) for idx in range(3)]
+    source = io.BytesIO()
+    images[0].save(source, format="TIFF", save_all=True, append_images=images[1:])
+    file = io.BytesIO()
+
+    # ACT
+    frames.encode(source.getvalue(), file, b"Sample text", format=format)
+
+    # ASSERT
+    image = Image.open(io.BytesIO(file.getvalue()))
+    image.seek(2)
+    assert image.mode == mode
+    assert np.array_equal(np.array(image), np.array(images[2]))
+    assert frames.decode(file.getvalue()) == b"Sample text"
+
+
+def test_encode_16_bits_opened_as_mode_i(cover):
+    # ARRANGE
+    images = [cover((20, 30), "I;16", seed=idx) for idx in range(3)]
+    pages = [image.convert("I") for image in images]
+    source = io.BytesIO()
+    pages[0].save(source, format="TIFF", save_all=True, append_images=pages[1:])
+    file = io.BytesIO()
+
+    # ACT
+    frames.encode(source.getvalue(), file, b"a", format="TIFF")
+
+    # ASSERT
+    image = Image.open(io.BytesIO(file.getvalue()))
+    image.seek(2)
+    assert image.mode == "I;16"
+    assert np.array_equal(np.array(image), np.array(images[2]))
+    assert frames.decode(file.getvalue()) == b"a"
+    assert frames.capacity(source.getvalue()) == frames.capacity(file.getvalue())
+
+
+def test_encode_png_holds_every_frame(cover):
+    # ARRANGE
+    images = [cover((20, 30, 3), "L"), cover((20, 30, 3), seed=1)]
+    source = io.BytesIO()
+    images[0].save(source, format="TIFF", save_all=True, append_images=images[1:])
+    file = io.BytesIO()
+
+    # ACT
+    frames.encode(source.getvalue(), file, b"Sample text", format="PNG")
+
+    # ASSERT
+    image = Image.open(io.BytesIO(file.getvalue()))
+    image.seek(1)
+    assert image.mode == "RGB"
+    assert np.array_equal(np.array(image), np.array(images[1]))
+    assert frames.decode(file.getvalue()) == b"Sample text"
+    assert frames.capacity(source.getvalue(), format="PNG") == frames.capacity(
+        file.getvalue()
+    )
+
+
+@pytest.mark.parametrize(
+    "mode, format", [("CMYK", "TIFF"), ("F", "TIFF"), ("I;16", "PNG")]
+)
+def test_encode_unsupported_frames(cover, mode, format):
+    # ARRANGE
+    images = [cover((20, 30, 4), mode, seed=idx) for idx in range(2)]
+    source = io.BytesIO()
+    images[0].save(source, format="TIFF", save_all=True, append_images=images[1:])
+    file = io.BytesIO()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        frames.capacity(source.getvalue(), format=format)
+    with pytest.raises(ValueError):
+        frames.encode(source.getvalue(), file, b"Sample text", format=format)
+    assert file.getvalue() == b""
+
+
+def test_encode_keeps_durations(cover):
+    # ARRANGE
+    images = [cover((20, 30, 4), seed=idx) for idx in range(2)]
+    source = io.BytesIO()
+    images[0].save(
+        source,
+        format="PNG",
+        save_all=True,
+        append_images=images[1:],
+        duration=[100, 300],
+    )
+    file = io.BytesIO()
+
+    # ACT
+    frames.encode(source.getvalue(), file, b"Sample text", format="PNG")
+
+    # ASSERT
+    image = Image.open(io.BytesIO(file.getvalue()))
+    durations = []
+    for index in range(image.n_frames):
+        image.seek(index)
+        durations.append(image.info["duration"])
+    assert image.mode == "RGBA"
+    assert durations == [100, 300]
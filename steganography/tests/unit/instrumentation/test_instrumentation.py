@@ -0,0 +1,139 @@
+import io
+import os
+import time
+
+import pytest
+
+from steganography import Steganography
+from steganography import instrumentation
+from steganography.instrumentation import StageEvent
+
+
+def stages(events, operation):
+    return [event.stage for event in events if event.operation == operation]
+
+
+def test_encode_decode_and_save_stages(cover, tmp_folder):
+    # ARRANGE
+    with instrumentation.record() as events:
+        s = Steganography(cover(), compression="zlib")
+
+        # ACT
+        s.encode("a" * 100)
+        path = s.save(os.path.join(tmp_folder, "instrumented.png"))
+        s.decode(path)
+
+    # ASSERT
+    assert stages(events, "open") == ["total"]
+    assert stages(events, "encode") == [
+        "compress",
+        "load",
+        "embed",
+        "to_image",
+        "total",
+    ]
+    assert stages(events, "decode") == [
+        "open",
+        "header",
+        "extract",
+        "decompress",
+        "total",
+    ]
+    assert stages(events, "save") == ["total"]
+
+    totals = {event.operation: event for event in events if event.stage == "total"}
+    assert totals["encode"].pixels == 1200
+    assert totals["encode"].bytes == 100
+    assert totals["decode"].bytes == 100
+    assert totals["save"].bytes == os.path.getsize(path)
+    assert all(event.duration >= 0 for event in events)
+
+
+def test_legacy_decode_stages(cover):
+    # ARRANGE
+    s = Steganography(cover(), legacy=True)
+    s.encode("legacy")
+
+    # ACT
+    with instrumentation.record() as events:
+        s.decode()
+
+    # ASSERT
+    assert stages(events, "decode") == ["open", "header", "read_until", "total"]
+    assert events[-1].bytes == len("legacy")
+
+
+def test_hooks(cover):
+    # ARRANGE
+    events = []
+    instrumentation.add_hook(events.append)
+
+    # ACT
+    s = Steganography(cover())
+    instrumentation.remove_hook(events.append)
+    s.encode("not recorded")
+
+    # ASSERT
+    assert [event.operation for event in events] == ["open"]
+
+
+def test_remove_unknown_hook():
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        instrumentation.remove_hook(print)
+
+
+def test_stage_reported_when_it_raises():
+    # ARRANGE
+    with instrumentation.record() as events:
+        # ACT
+        with pytest.raises(RuntimeError):
+            with instrumentation.operation("custom", pixels=4):
+                with instrumentation.measure("failing", bytes=2):
+                    raise RuntimeError
+
+    # ASSERT
+    assert [event[:2] for event in events] == [
+        ("custom", "failing"),
+        ("custom", "total"),
+    ]
+    assert events[0].bytes == 2
+    assert events[1].pixels == 4
+
+
+def test_measure_without_hooks():
+    # ACT
+    with instrumentation.measure("unrecorded", bytes=1) as measurement:
+        measurement.bytes = 2
+
+    # ASSERT
+    assert measurement.bytes == 2
+
+
+def test_stage_event_defaults():
+    # ACT
+    event = StageEvent("encode", "embed", 0.5)
+
+    # ASSERT
+    assert (event.pixels, event.bytes) == (0, 0)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile():
+    # ACT
+    with instrumentation.profile(interval=0.001) as profile:
+        busy(0.1)
+
+    file = io.StringIO()
+    profile.dump(file)
+
+    # ASSERT
+    stack, count = profile.hot_paths(1)[0]
+    assert stack.endswith("test_instrumentation:busy")
+    assert count > 0
+    assert file.getvalue().splitlines()[0] == f"{stack} {count}"
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import modes
+
+
+def test_normalize_16_bits_in_mode_i(cover):
+    # ARRANGE
+    pixels = np.array(cover((20, 30), "I;16"))
+    image = Image.fromarray(pixels).convert("I")
+
+    # ACT
+    result = modes.normalize(image)
+
+    # ASSERT
+    assert result.mode == "I;16"
+    assert np.array_equal(np.array(result), pixels)
+
+
+@pytest.mark.parametrize("value", [-1, 1 << 16])
+def test_normalize_32_bits_in_mode_i(value):
+    # ARRANGE
+    image = Image.new("I", (3, 2), value)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        modes.normalize(image)
+
+
+def test_normalize_other_modes():
+    # ARRANGE
+    image = Image.new("RGB", (3, 2))
+
+    # ACT
+    result = modes.normalize(image)
+
+    # ASSERT
+    assert result is image
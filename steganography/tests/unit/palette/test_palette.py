@@ -0,0 +1,29 @@
+import pytest
+
+from steganography import palette
+
+
+def test_spread():
+    # ARRANGE
+    colors = [10, 20, 30, 40, 50, 60, 10, 20, 30, 70, 80, 90]
+    counts = [5, 0, 2, 1] + [0] * 252
+
+    # ACT
+    table, result = palette.spread(colors, counts, bits_per_channel=2)
+
+    # ASSERT
+    assert table[:4] == bytes([0, 0, 0, 4])
+    assert result[:12] == [10, 20, 30] * 4
+    assert result[12:24] == [70, 80, 90] * 4
+    assert len(result) == 768
+
+
+@pytest.mark.parametrize("bits_per_channel, colors", [(1, 129), (4, 17)])
+def test_spread_too_many_colors(bits_per_channel, colors):
+    # ARRANGE
+    rgb = [channel for index in range(256) for channel in (index, 0, 0)]
+    counts = [1] * colors + [0] * (256 - colors)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        palette.spread(rgb, counts, bits_per_channel)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from steganography import parallel, payload
+
+
+@pytest.fixture
+def pixels(cover):
+    return cover((37, 29, 3), array=True)
+
+
+@pytest.mark.parametrize("bits_per_channel", [1, 3])
+def test_extract(pixels, bits_per_channel):
+    # ARRANGE
+    data = np.random.default_rng(1).bytes(300)
+    payload.embed(pixels, data, bits_per_channel=bits_per_channel)
+    header = payload.read_header(pixels)
+
+    # ACT
+    result = parallel.extract(pixels, header, workers=2, min_pixels=0)
+
+    # ASSERT
+    assert result == data
+
+
+def test_extract_corrupted(pixels):
+    # ARRANGE
+    header = payload.Header(length=10**6)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        parallel.extract(pixels, header, workers=2, min_pixels=0)
+
+
+def test_split():
+    # ARRANGE / ACT
+    result = parallel._split(30, 1000, 8)
+
+    # ASSERT
+    assert result[0][0] == 30
+    assert result[-1][1] == 1000
+    assert all(stop - start == 128 for start, stop in result[:-1])
+    assert all(a[1] == b[0] for a, b in zip(result, result[1:]))
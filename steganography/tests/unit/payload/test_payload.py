@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from steganography import engine, payload
+
+
+@pytest.fixture
+def pixels():
+    return np.zeros((20, 20, 3), dtype=np.uint8)
+
+
+def test_header_pack_and_unpack():
+    # ARRANGE
+    header = payload.Header(length=1234, flags=1)
+
+    # ACT
+    result = payload.Header.unpack(header.pack())
+
+    # ASSERT
+    assert result == header
+    assert result.version == payload.VERSION
+
+
+def test_header_unpack_without_magic():
+    # ARRANGE
+    data = b"not a header"
+
+    # ACT
+    result = payload.Header.unpack(data)
+
+    # ASSERT
+    assert result is None
+
+
+def test_header_unpack_with_unsupported_version():
+    # ARRANGE
+    data = payload.Header(length=1, version=99).pack()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        payload.Header.unpack(data)
+
+
+def test_header_pixels():
+    # ARRANGE / ACT / ASSERT
+    assert payload.header_pixels(3) == 30
+    assert payload.header_pixels(4) == 22
+
+
+def test_embed_and_extract(pixels):
+    # ARRANGE
+    data = b"data with the legacy \\end marker inside"
+
+    # ACT
+    payload.embed(pixels, data)
+    header = payload.read_header(pixels)
+    result = payload.extract(pixels, header)
+
+    # ASSERT
+    assert header.length == len(data)
+    assert result == data
+
+
+def test_embed_writes_data_after_header(pixels):
+    # ARRANGE
+    data = b"\xff"
+    start = payload.header_pixels(3)
+
+    # ACT
+    payload.embed(pixels, data)
+
+    # ASSERT
+    assert engine.extract(pixels, start, start + 3).tolist()[:8] == [1] * 8
+
+
+def test_embed_if_data_doesnt_fit(pixels):
+    # ARRANGE
+    data = bytes(200)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        payload.embed(pixels, data)
+
+
+def test_read_header_without_header(pixels):
+    # ARRANGE
+    engine.embed(pixels, engine.unpack_bits(b"legacy\\end"))
+
+    # ACT
+    result = payload.read_header(pixels)
+
+    # ASSERT
+    assert result is None
+
+
+def test_read_header_if_image_is_too_small():
+    # ARRANGE
+    pixels = np.zeros((2, 2, 3), dtype=np.uint8)
+
+    # ACT
+    result = payload.read_header(pixels)
+
+    # ASSERT
+    assert result is None
+
+
+def test_extract_if_length_is_larger_than_image(pixels):
+    # ARRANGE
+    header = payload.Header(length=1000)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        payload.extract(pixels, header)
+
+
+def test_embed_and_extract_with_bits_per_channel(pixels):
+    # ARRANGE
+    data = bytes(range(100))
+
+    # ACT
+    payload.embed(pixels, data, bits_per_channel=3)
+    header = payload.read_header(pixels)
+    result = payload.extract(pixels, header)
+
+    # ASSERT
+    assert header.bits_per_channel == 3
+    assert result == data
+
+
+def test_embed_with_unsupported_bits_per_channel(pixels):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        payload.embed(pixels, b"data", bits_per_channel=5)
+
+
+def test_payload_pixels():
+    # ARRANGE / ACT / ASSERT
+    assert payload.payload_pixels(3, 3, 1) == 8
+    assert payload.payload_pixels(3, 3, 4) == 2
+
+
+def test_capacity(pixels):
+    # ARRANGE
+    length = payload.capacity(20, 20, 3, bits_per_channel=2)
+
+    # ACT
+    payload.embed(pixels, bytes(length), bits_per_channel=2)
+
+    # ASSERT
+    with pytest.raises(ValueError):
+        payload.embed(pixels, bytes(length + 1), bits_per_channel=2)
+
+
+def test_capacity_if_image_is_smaller_than_header():
+    # ARRANGE / ACT / ASSERT
+    assert payload.capacity(2, 2, 3) == 0
@@ -0,0 +1,147 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import Steganography, engine, payload
+from steganography.probe import has_payload, probe
+
+
+SHAPE = (300, 200, 3)
+
+
+def encoded(image, format="PNG", **options):
+    s = Steganography(image, **options)
+    s.encode("probe " * 5)
+    return s.to_bytes(format)
+
+
+def as_bytes(image, format="PNG", **options):
+    file = io.BytesIO()
+    image.save(file, format, **options)
+    return file.getvalue()
+
+
+@pytest.mark.parametrize("format", ["PNG", "TIFF", "BMP", "WEBP"])
+@pytest.mark.parametrize("shape", [(300, 200, 3), (5, 400, 3), (2, 80, 3)])
+def test_probe(cover, format, shape):
+    # ARRANGE
+    image = cover(shape)
+    data = encoded(image, format, bits_per_channel=2, compression="zlib")
+
+    # ACT
+    result = probe(data)
+
+    # ASSERT
+    assert result == payload.read_header(np.array(Image.open(io.BytesIO(data))))
+    assert result.bits_per_channel == 2
+    assert result.flags & payload.FLAG_ZLIB
+    assert probe(as_bytes(image, format)) is None
+
+
+@pytest.mark.parametrize("mode", ["L", "LA", "P", "RGBA"])
+def test_probe_modes(cover, mode):
+    # ARRANGE
+    image = cover(SHAPE, mode)
+
+    # ACT / ASSERT
+    assert has_payload(encoded(image))
+    assert not has_payload(image)
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"compression": "tiff_lzw"}, {"compression": "packbits"}]
+)
+def test_probe_tiff_compression(cover, options):
+    # ARRANGE
+    s = Steganography(cover(SHAPE))
+    s.encode("probe me")
+
+    # ACT
+    result = probe(as_bytes(s.encoded_image, "TIFF", **options))
+
+    # ASSERT
+    assert result.length == len("probe me")
+
+
+def test_probe_interlaced_png(cover):
+    # ARRANGE
+    s = Steganography(cover(SHAPE))
+    s.encode("probe me")
+
+    # ACT
+    result = probe(as_bytes(s.encoded_image, "PNG", interlace=True))
+
+    # ASSERT
+    assert result.length == len("probe me")
+
+
+def test_probe_reads_only_the_top_of_png(cover):
+    # ARRANGE
+    data = encoded(cover((1000, 300, 3)))
+    truncated = data[: len(data) // 4]
+
+    # ACT
+    result = probe(truncated)
+
+    # ASSERT
+    assert result.length == len("probe " * 5)
+    with pytest.raises(OSError):
+        Image.open(io.BytesIO(truncated)).load()
+
+
+def test_probe_path_and_pil_image(cover, tmp_folder):
+    # ARRANGE
+    s = Steganography(cover(SHAPE))
+    s.encode("probe me")
+    path = s.save(f"{tmp_folder}/probe.png")
+
+    # ACT / ASSERT
+    assert probe(path).length == len("probe me")
+    assert probe(s.encoded_image).length == len("probe me")
+    assert s.encoded_image.size == (200, 300)
+
+
+def test_probe_leaves_opened_image_untouched(cover):
+    # ARRANGE
+    image = Image.open(io.BytesIO(encoded(cover(SHAPE))))
+
+    # ACT
+    result = probe(image)
+
+    # ASSERT
+    assert result.length == len("probe " * 5)
+    assert image.size == (200, 300)
+    assert Steganography(image).decode() == "probe " * 5
+
+
+def test_probe_lossy_format_without_decoding(cover):
+    # ARRANGE
+    data = as_bytes(cover(SHAPE), "JPEG")
+
+    # ACT / ASSERT
+    assert probe(data) is None
+
+
+def test_probe_legacy_and_unsupported_modes(cover):
+    # ARRANGE
+    legacy = Steganography(cover(SHAPE), legacy=True)
+    legacy.encode("legacy")
+
+    # ACT / ASSERT
+    assert probe(legacy.encoded_image) is None
+    assert probe(cover(SHAPE, "1")) is None
+    assert probe(cover(SHAPE, "CMYK")) is None
+
+
+def test_probe_corrupted_length_raises(cover):
+    # ARRANGE
+    pixels = np.array(cover((20, 20, 3)))
+    payload.embed(pixels, b"data")
+    header = payload.Header(10_000, 0, 1).pack()
+    engine.embed(pixels, engine.unpack_bits(header))
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="larger than the image"):
+        probe(Image.fromarray(pixels))
@@ -0,0 +1,124 @@
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from steganography import Steganography, payload, pure
+
+
+SHAPE = (37, 23, 3)
+
+
+@pytest.mark.parametrize("mode", ["L", "LA", "P", "RGB", "RGBA", "I;16", "I;16B"])
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 3, 4])
+def test_embed_same_pixels_as_numpy(cover, mode, bits_per_channel):
+    # ARRANGE
+    image = cover(SHAPE, mode)
+    s = Steganography(image, bits_per_channel=bits_per_channel)
+    data = np.random.default_rng(1).bytes(s.capacity() - 3)
+    s.encode_bytes(data)
+
+    # ACT
+    result = pure.embed(image, data, bits_per_channel=bits_per_channel)
+
+    # ASSERT
+    assert result.mode == s.encoded_image.mode
+    assert result.tobytes() == s.encoded_image.tobytes()
+    assert result.getpalette() == s.encoded_image.getpalette()
+    assert pure.read(result) == (payload.Header(len(data), 0, bits_per_channel), data)
+    assert image.tobytes() == cover(SHAPE, mode).tobytes()
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_legacy(cover, mode):
+    # ARRANGE
+    image = cover(SHAPE, mode)
+    s = Steganography(image, legacy=True)
+    s.encode("legacy")
+
+    # ACT
+    result = pure.embed(image, b"legacy", legacy=True)
+
+    # ASSERT
+    assert result.tobytes() == s.encoded_image.tobytes()
+    assert pure.read(result) == (None, b"legacy")
+    assert pure.read(image)[1] == Steganography(image).decode_bytes()
+
+
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 3, 4])
+def test_split_and_join(bits_per_channel):
+    # ARRANGE
+    data = bytes(range(256)) + b"\x01"
+
+    # ACT
+    values = pure.split(data, bits_per_channel)
+    result = pure.join(values, bits_per_channel)
+
+    # ASSERT
+    assert len(values) == -(-len(data) * 8 // bits_per_channel)
+    assert max(values) < 1 << bits_per_channel
+    assert result == data
+
+
+def test_split_most_significant_first():
+    # ACT / ASSERT
+    assert pure.split(b"\xa0") == bytes([1, 0, 1, 0, 0, 0, 0, 0])
+    assert pure.split(b"\xa0", 3) == bytes([5, 0, 0])
+
+
+def test_embed_too_large(cover):
+    # ARRANGE
+    image = cover(SHAPE)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        pure.embed(image, bytes(1000))
+
+
+def test_read_shard(cover):
+    # ARRANGE
+    image = pure.embed(cover(SHAPE), b"shard", payload.FLAG_SHARD)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        pure.read(image)
+
+
+def test_steganography_without_numpy(tmp_folder):
+    # ARRANGE
+    script = textwrap.dedent(
+        f"""
+        import os
+        import sys
+
+        sys.modules["numpy"] = None
+
+        from PIL import Image
+
+        from steganography import Steganography
+
+        image = Image.new("RGB", (40, 30), (10, 20, 30))
+        s = Steganography(image, bits_per_channel=2, compression="zlib")
+        s.encode("without numpy")
+        path = s.save(os.path.join({tmp_folder!r}, "without_numpy.png"))
+        print(Steganography(path).decode())
+
+        try:
+            Steganography(path, cache=True)
+        except ImportError:
+            print("no cache")
+
+        loaded = [name for name, module in sys.modules.items() if module]
+        assert not [name for name in loaded if name.startswith("numpy")]
+        """
+    )
+
+    # ACT
+    result = subprocess.run(
+        [sys.executable, "-c", script], stdout=subprocess.PIPE, check=True
+    )
+
+    # ASSERT
+    assert result.stdout.decode().split("\n") == ["without numpy", "no cache", ""]
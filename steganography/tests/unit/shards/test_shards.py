@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+
+from steganography import Steganography, shards
+
+
+@pytest.fixture
+def covers(cover, tmp_folder):
+    paths = []
+    for idx, size in enumerate([(30, 20), (40, 40), (25, 30)]):
+        path = os.path.join(tmp_folder, f"shard_cover{idx}.png")
+        cover((*size, 3), seed=idx).save(path)
+        paths.append(path)
+
+    return paths
+
+
+@pytest.fixture
+def outputs(tmp_folder):
+    return [os.path.join(tmp_folder, f"shard{idx}.png") for idx in range(3)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_encode_and_decode(covers, outputs, workers):
+    # ARRANGE
+    data = np.random.default_rng(9).bytes(1000)
+
+    # ACT
+    paths = shards.encode(data, covers, outputs, workers=workers)
+    result = shards.decode(reversed(paths), workers=workers)
+
+    # ASSERT
+    assert paths == outputs
+    assert result == data
+
+
+def test_encode_and_decode_with_compression(covers, outputs):
+    # ARRANGE
+    data = b"the same log line over and over again\n" * 200
+
+    # ACT
+    paths = shards.encode(data, covers, outputs, workers=1, compression="zlib")
+    result = shards.decode(paths, workers=1)
+
+    # ASSERT
+    assert result == data
+
+
+def test_encode_too_large(covers, outputs):
+    # ARRANGE
+    data = bytes(10000)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        shards.encode(data, covers, outputs, workers=1)
+
+
+def test_decode_missing_shard(covers, outputs):
+    # ARRANGE
+    paths = shards.encode(bytes(1000), covers, outputs, workers=1)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        shards.decode(paths[1:], workers=1)
+
+
+def test_decode_without_shard(covers):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        shards.decode(covers[:1], workers=1)
+
+
+def test_steganography_decode_shard(covers, outputs):
+    # ARRANGE
+    paths = shards.encode(bytes(1000), covers, outputs, workers=1)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(paths[0]).decode_bytes()
+
+
+def test_split():
+    # ARRANGE
+    data = bytes(range(100))
+
+    # ACT
+    result = shards.split(data, [10, 100, 90])
+
+    # ASSERT
+    assert b"".join(result) == data
+    assert [len(part) for part in result] == [5, 50, 45]
+
+
+def test_join_different_payloads():
+    # ARRANGE
+    parts = [shards.Shard(b"a" * 16, 0, 2, b""), shards.Shard(b"b" * 16, 1, 2, b"")]
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        shards.join(parts)
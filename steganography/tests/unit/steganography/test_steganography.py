@@ -1,8 +1,11 @@
+import io
 import os
 import string
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
+from PIL import Image
 
 from steganography import Steganography
 
@@ -52,384 +55,443 @@ def test_encode_and_decode_without_path_for_decoding(test_image, random_words):
         assert result == word
 
 
-def test_save_successful(test_image, tmp_folder):
+def test_decode_image_it_was_initialized_with(tmp_folder, test_image):
     # ARRANGE
+    tmp_file = os.path.join(tmp_folder, "initialized_with.png")
     s = Steganography(test_image)
-    s.encode("doesnt matter")
-
-    mock_png_path = os.path.join(tmp_folder, "save_sucess.png")
-    s._path_as_png = MagicMock(return_value=mock_png_path)
+    s.encode("message")
+    s.save(tmp_file)
 
     # ACT
-    s.save(mock_png_path)
+    result = Steganography(tmp_file).decode()
 
     # ASSERT
-    assert os.path.exists(mock_png_path)
+    assert result == "message"
 
 
-def test_save_not_successful(test_image, tmp_folder):
+def test_encode_and_decode_with_end_inside_message(test_image):
     # ARRANGE
+    message = r"a message with \end in the middle"
     s = Steganography(test_image)
 
-    mock_png_path = os.path.join(tmp_folder, "save_not_sucessful.png")
-    s._path_as_png = MagicMock()
-
     # ACT
-    s.save(mock_png_path)
+    s.encode(message)
+    result = s.decode()
 
     # ASSERT
-    assert not os.path.exists(mock_png_path)
-    s._path_as_png.assert_not_called()
+    assert result == message
 
 
-def test_write_to_lsb(test_image):
+def test_encode_and_decode_legacy(tmp_folder, test_image, random_words):
     # ARRANGE
-    mocked_tribit = "110"
-    mocked_rgb_binary = ("10000000", "10000000", "10000000")
+    for idx, word in enumerate(random_words):
+        s = Steganography(test_image, legacy=True)
 
-    expected_result = ["10000001", "10000001", "10000000"]
+        # ACT
+        s.encode(word)
 
-    # ACT
-    result = Steganography(test_image)._write_to_lsb(mocked_tribit, mocked_rgb_binary)
+        tmp_file = os.path.join(tmp_folder, f"legacy{idx}.png")
+        s.save(tmp_file)
 
-    # ASSERT
-    assert result == expected_result
+        result = Steganography(test_image).decode(tmp_file)
 
+        # ASSERT
+        assert result == word
 
-def test_split_every_3_characters_with_12_characters(test_image):
+
+def test_encode_bytes_and_decode_bytes(tmp_folder, test_image, random):
     # ARRANGE
-    mocked_string_to_split = "000111222333444"
-    expected_result = ["000", "111", "222", "333", "444"]
+    data = bytes(random.randrange(256) for _ in range(1000))
+    s = Steganography(test_image)
 
     # ACT
-    result = Steganography(test_image)._split(mocked_string_to_split, 3)
+    s.encode_bytes(data)
+
+    tmp_file = os.path.join(tmp_folder, "bytes.png")
+    s.save(tmp_file)
+
+    result = s.decode_bytes(tmp_file)
 
     # ASSERT
-    assert result == expected_result
+    assert result == data
 
 
-def test_split_every_3_characters_with_8_characters(test_image):
+def test_encode_and_decode_unicode(test_image):
     # ARRANGE
-    mocked_string_to_split = "12345678"
-    expected_result = ["123", "456", "78"]
+    message = "ünïcödé → 隠されたテキスト 🙈"
+    s = Steganography(test_image)
 
     # ACT
-    result = Steganography(test_image)._split(mocked_string_to_split, 3)
+    s.encode(message)
+    result = s.decode()
 
     # ASSERT
-    assert result == expected_result
+    assert result == message
 
 
-def test_split_every_3_characters_with_7_characters(test_image):
+def test_encode_legacy_if_message_is_not_latin_1(test_image):
     # ARRANGE
-    mocked_string_to_split = "1234567"
-    expected_result = ["123", "456", "7"]
+    s = Steganography(test_image, legacy=True)
 
-    # ACT
-    result = Steganography(test_image)._split(mocked_string_to_split, 3)
+    # ACT / ASSERT
+    with pytest.raises(UnicodeEncodeError):
+        s.encode("隠されたテキスト")
 
-    # ASSERT
-    assert result == expected_result
 
+def test_encode_and_decode_with_bits_per_channel(tmp_folder, test_image, random):
+    for bits_per_channel in range(1, 5):
+        # ARRANGE
+        data = bytes(random.randrange(256) for _ in range(1000))
+        s = Steganography(test_image, bits_per_channel=bits_per_channel)
 
-def test_complete_list_missing_1_element(test_image):
-    # ARRANGE
-    to_complete = [1, 2]
-    from_complete = [4, 5, 6]
+        # ACT
+        s.encode_bytes(data)
 
-    expected_result = [1, 2, 6]
+        tmp_file = os.path.join(tmp_folder, f"bits_per_channel{bits_per_channel}.png")
+        s.save(tmp_file)
 
-    # ACT
-    result = Steganography(test_image)._complete_list(to_complete, from_complete)
+        result = Steganography(test_image).decode_bytes(tmp_file)
 
-    # ASSERT
-    assert result == expected_result
+        # ASSERT
+        assert result == data
 
 
-def test_complete_list_missing_2_elements(test_image):
-    # ARRANGE
-    to_complete = [1]
-    from_complete = [4, 5, 6]
+def test_init_with_unsupported_bits_per_channel(test_image):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(test_image, bits_per_channel=0)
 
-    expected_result = [1, 5, 6]
 
-    # ACT
-    result = Steganography(test_image)._complete_list(to_complete, from_complete)
+def test_init_legacy_with_bits_per_channel(test_image):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(test_image, legacy=True, bits_per_channel=2)
 
-    # ASSERT
-    assert result == expected_result
 
+def test_encode_and_decode_with_compression(tmp_folder, test_image):
+    for compression in ("zlib", "lzma", "auto"):
+        # ARRANGE
+        message = "the same log line over and over again\n" * 500
+        s = Steganography(test_image, compression=compression)
 
-def test_complete_list_missing_all_elements(test_image):
-    # ARRANGE
-    to_complete = []
-    from_complete = [4, 5, 6]
+        # ACT
+        s.encode(message)
 
-    expected_result = [4, 5, 6]
+        tmp_file = os.path.join(tmp_folder, f"{compression}.png")
+        s.save(tmp_file)
 
-    # ACT
-    result = Steganography(test_image)._complete_list(to_complete, from_complete)
+        result = Steganography(test_image).decode(tmp_file)
 
-    # ASSERT
-    assert result == expected_result
+        # ASSERT
+        assert result == message
 
 
-def test_complete_list_no_missing_elements(test_image):
+def test_init_legacy_with_compression(test_image):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(test_image, legacy=True, compression="zlib")
+
+
+def test_init_with_unsupported_compression_level(test_image):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(test_image, compression="zlib", compression_level=42)
+
+
+def test_capacity_and_fits(test_image):
     # ARRANGE
-    to_complete = [1, 2, 3]
-    from_complete = [4, 5, 6]
+    s = Steganography(test_image, bits_per_channel=2)
+    capacity = s.capacity()
 
-    expected_result = [1, 2, 3]
+    # ACT / ASSERT
+    assert s.fits(bytes(capacity))
+    assert not s.fits(bytes(capacity + 1))
 
-    # ACT
-    result = Steganography(test_image)._complete_list(to_complete, from_complete)
 
-    # ASSERT
-    assert result == expected_result
+def test_fits_with_compression(test_image):
+    # ARRANGE
+    s = Steganography(test_image, compression="zlib")
+
+    # ACT / ASSERT
+    assert s.fits("a" * (s.capacity() * 10))
 
 
-def test_complete_list_to_complete_gt_from_complete(test_image):
+@pytest.mark.parametrize("legacy", [False, True])
+def test_encode_too_large_fails_before_reading_pixels(test_image, legacy):
     # ARRANGE
-    to_complete = [1, 2, 3, 4]
-    from_complete = [4, 5, 6]
+    s = Steganography(test_image, legacy=legacy)
+    s._original_image.load = MagicMock(side_effect=AssertionError)
 
-    expected_result = [1, 2, 3, 4]
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        s.encode_bytes(bytes(s.capacity() + 1))
+    assert s.encoded_image is None
 
-    # ACT
-    result = Steganography(test_image)._complete_list(to_complete, from_complete)
 
-    # ASSERT
-    assert result == expected_result
+@pytest.fixture
+def rgb_image(cover):
+    return cover((60, 50, 3))
 
 
-def test_path_as_png_if_jpg_file(test_image, tmp_folder):
+@pytest.mark.parametrize("mode", ["L", "LA", "P", "RGB", "RGBA"])
+def test_encode_and_decode_modes(rgb_image, mode):
     # ARRANGE
-    mocked_filepath = os.path.join(tmp_folder, "some_jpg_file.jpg")
-    with open(mocked_filepath, "w") as f:
-        f.write("")
-
-    expected_result = os.path.join(tmp_folder, "some_jpg_file.png")
+    image = rgb_image.convert(mode, palette=Image.ADAPTIVE, colors=16)
+    s = Steganography(image, bits_per_channel=2)
 
     # ACT
-    result = Steganography(test_image)._path_as_png(mocked_filepath)
+    s.encode("Sample text")
+    result = Image.open(io.BytesIO(s.to_bytes()))
 
     # ASSERT
-    assert result == expected_result
+    assert result.mode == mode
+    assert Steganography(result).decode() == "Sample text"
 
 
-def test_path_as_png_if_two_extensions(test_image, tmp_folder):
+@pytest.mark.parametrize("bits_per_channel", [1, 2, 3, 4])
+def test_encode_palette_keeps_colors(rgb_image, bits_per_channel):
     # ARRANGE
-    mocked_filepath = os.path.join(tmp_folder, "some_targz_file.tar.gz")
-    with open(mocked_filepath, "w") as f:
-        f.write("")
-
-    expected_result = os.path.join(tmp_folder, "some_targz_file.png")
+    image = rgb_image.convert("P", palette=Image.ADAPTIVE, colors=16)
+    s = Steganography(image, bits_per_channel=bits_per_channel)
+    data = np.random.default_rng(1).bytes(s.capacity())
 
     # ACT
-    result = Steganography(test_image)._path_as_png(mocked_filepath)
+    s.encode_bytes(data)
 
     # ASSERT
-    assert result == expected_result
+    result = s.encoded_image
+    assert np.array_equal(
+        np.array(result.convert("RGB")), np.array(image.convert("RGB"))
+    )
+    assert not np.array_equal(np.array(result), np.array(image))
+    assert Steganography(s.to_bytes()).decode_bytes() == data
 
 
-def test_path_as_png_if_empty_path(test_image):
+def test_encode_palette_with_too_many_colors(rgb_image):
     # ARRANGE
-    mocked_filepath = ""
+    image = rgb_image.convert("P", palette=Image.ADAPTIVE, colors=64)
+    s = Steganography(image, bits_per_channel=3)
 
     # ACT / ASSERT
-    with pytest.raises(ValueError):
-        Steganography(test_image)._path_as_png(mocked_filepath)
+    with pytest.raises(ValueError, match="RGB"):
+        s.encode("Sample text")
+    assert s.encoded_image is None
 
 
-def test_path_as_png_if_file_exists_but_no_extension(test_image, tmp_folder):
+@pytest.mark.parametrize("mode", ["I;16", "I;16B"])
+def test_encode_and_decode_16_bits(cover, mode):
     # ARRANGE
-    mocked_filepath = os.path.join(tmp_folder, "some_file_without_extension")
-    with open(mocked_filepath, "w") as f:
-        f.write("")
-
-    expected_result = os.path.join(tmp_folder, "some_file_without_extension.png")
+    image = cover((60, 50), mode)
+    pixels = np.array(image).astype(int)
+    s = Steganography(image)
 
     # ACT
-    result = Steganography(test_image)._path_as_png(mocked_filepath)
+    s.encode("Sample text")
+    result = np.array(s.encoded_image)
 
     # ASSERT
-    assert result == expected_result
-
-
-def test_path_as_png_if_directory_exists(test_image, tmp_folder):
-    # ARRANGE / ACT / ASSERT
-    with pytest.raises(IsADirectoryError):
-        Steganography(test_image)._path_as_png(tmp_folder)
+    assert np.abs(result.astype(int) - pixels).max() == 1
+    assert (result >> 8 == pixels >> 8).all()
+    assert Steganography(s.to_bytes()).decode() == "Sample text"
 
 
-def test_path_as_png_when_path_does_not_exist_and_is_directory(test_image):
+@pytest.mark.parametrize("format", [None, "TIFF"])
+def test_encode_and_decode_16_bits_opened_as_mode_i(cover, format):
     # ARRANGE
-    mocked_filepath = "/some/path/"
+    pixels = np.array(cover((60, 50), "I;16")).astype(int)
+    image = cover((60, 50), "I;16").convert("I")
+    if format:
+        file = io.BytesIO()
+        image.save(file, format)
+        image = Image.open(file)
+    s = Steganography(image)
 
-    # ACT / ASSERT
-    with pytest.raises(IsADirectoryError):
-        Steganography(test_image)._path_as_png(mocked_filepath)
+    # ACT
+    s.encode("Sample text")
+    result = np.array(s.encoded_image)
+
+    # ASSERT
+    assert s.encoded_image.mode == "I;16"
+    assert np.abs(result.astype(int) - pixels).max() == 1
+    assert Steganography(s.to_bytes()).decode() == "Sample text"
 
 
-def test_path_as_png_when_path_does_not_exist_and_could_be_file_or_directory(
-    test_image, capfd
-):
+def test_encode_16_bits_if_arrays_become_mode_i(cover, monkeypatch):
     # ARRANGE
-    mocked_filepath = "/some/path"
-    expected_result = "/some/path.png"
+    pixels = np.array(cover((60, 50), "I;16"))
+    fromarray = Image.fromarray
+    monkeypatch.setattr(Image, "fromarray", lambda array: fromarray(array).convert("I"))
+    s = Steganography(fromarray(pixels))
 
     # ACT
-    result = Steganography(test_image)._path_as_png(mocked_filepath)
-    output, _ = capfd.readouterr()
+    s.encode("Sample text")
 
     # ASSERT
-    assert result == expected_result
-    assert "Assuming it's a file" in output
+    assert s.encoded_image.mode == "I;16"
+    assert s.decode() == "Sample text"
 
 
-def test_str_to_binary_string_if_no_text_passed(test_image):
+@pytest.mark.parametrize("mode", ["1", "F", "CMYK"])
+def test_encode_unsupported_mode(rgb_image, mode):
     # ARRANGE
-    mocked_string = ""
+    s = Steganography(rgb_image.convert(mode))
 
     # ACT / ASSERT
     with pytest.raises(ValueError):
-        Steganography(test_image)._str_to_binary_string(mocked_string)
+        s.encode("Sample text")
 
 
-def test_str_to_binary_string(test_image):
+def test_save_successful(test_image, tmp_folder):
     # ARRANGE
-    mocked_string = "This is a test string that is being tested in this test."
-    expected_result = (
-        "01010100011010000110100101110011001000000110100101110011001000000110000100100"
-        + "000011101000110010101110011011101000010000001110011011101000111001001101001"
-        + "011011100110011100100000011101000110100001100001011101000010000001101001011"
-        + "100110010000001100010011001010110100101101110011001110010000001110100011001"
-        + "010111001101110100011001010110010000100000011010010110111000100000011101000"
-        + "11010000110100101110011001000000111010001100101011100110111010000101110"
-    )
+    s = Steganography(test_image)
+    s.encode("doesnt matter")
+
+    mock_png_path = os.path.join(tmp_folder, "save_sucess.png")
+    s._path_as_png = MagicMock(return_value=mock_png_path)
 
     # ACT
-    result = Steganography(test_image)._str_to_binary_string(mocked_string)
+    s.save(mock_png_path)
 
     # ASSERT
-    assert result == expected_result
+    assert os.path.exists(mock_png_path)
 
 
-def test_binary_string_to_str(test_image):
+def test_save_to_file_object(test_image):
     # ARRANGE
-    mocked_binary_string = (
-        "01010100011010000110100101110011001000000110100101110011001000000110000100100"
-        + "000011101000110010101110011011101000010000001110011011101000111001001101001"
-        + "011011100110011100100000011101000110100001100001011101000010000001101001011"
-        + "100110010000001100010011001010110100101101110011001110010000001110100011001"
-        + "010111001101110100011001010110010000100000011010010110111000100000011101000"
-        + "11010000110100101110011001000000111010001100101011100110111010000101110"
-    )
-    expected_result = "This is a test string that is being tested in this test."
+    s = Steganography(test_image)
+    s.encode("saved in memory")
+    file = io.BytesIO()
 
     # ACT
-    result = Steganography(test_image)._binary_string_to_str(mocked_binary_string)
+    result = s.save(file)
 
     # ASSERT
-    assert result == expected_result
+    assert result is None
+    assert file.getvalue().startswith(b"\x89PNG")
+    assert Steganography(file).decode() == "saved in memory"
 
 
-def test_binary_string_to_str_if_end_character(test_image):
+def test_encode_and_decode_in_memory(test_image):
     # ARRANGE
-    # This is a test string that is being tested in this test.\end
-    mocked_binary_string = (
-        "01010100011010000110100101110011001000000110100101110011001000000110000100100"
-        + "000011101000110010101110011011101000010000001110011011101000111001001101001"
-        + "011011100110011100100000011101000110100001100001011101000010000001101001011"
-        + "100110010000001100010011001010110100101101110011001110010000001110100011001"
-        + "010111001101110100011001010110010000100000011010010110111000100000011101000"
-        + "110100001101001011100110010000001110100011001010111001101110100001011100101"
-        + "1100011001010110111001100100"
-    )
-    expected_result = "This is a test string that is being tested in this test."
+    with open(test_image, "rb") as file:
+        cover = file.read()
+
+    for source in (cover, io.BytesIO(cover), Image.open(test_image)):
+        s = Steganography(source)
+
+        # ACT
+        s.encode("in memory")
+        result = Steganography(cover).decode(s.to_bytes())
+
+        # ASSERT
+        assert result == "in memory"
+        assert s.decode(s.encoded_image) == "in memory"
+
+
+def test_to_bytes_if_not_encoded(test_image):
+    # ARRANGE
+    s = Steganography(test_image)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        s.to_bytes()
+
+
+def test_save_not_successful(test_image, tmp_folder):
+    # ARRANGE
+    s = Steganography(test_image)
+
+    mock_png_path = os.path.join(tmp_folder, "save_not_sucessful.png")
+    s._path_as_png = MagicMock()
 
     # ACT
-    result = Steganography(test_image)._binary_string_to_str(
-        mocked_binary_string, r"\end"
-    )
+    s.save(mock_png_path)
 
     # ASSERT
-    assert result == expected_result
+    assert not os.path.exists(mock_png_path)
+    s._path_as_png.assert_not_called()
 
 
-def test_binary_string_to_str_if_end_character_and_text_after(test_image):
+def test_path_as_png_if_jpg_file(test_image, tmp_folder):
     # ARRANGE
-    # This is a test string.\endNOW SOME CHARACTERS THAT SHOULD NOT BE SEEN
-    mocked_binary_string = (
-        "01010100011010000110100101110011001000000110100101110011001000000110000100100"
-        + "000011101000110010101110011011101000010000001110011011101000111001001101001"
-        + "011011100110011100101110010111000110010101101110011001000100111001001111010"
-        + "101110010000001010011010011110100110101000101001000000100001101001000010000"
-        + "010101001001000001010000110101010001000101010100100101001100100000010101000"
-        + "100100001000001010101000010000001010011010010000100111101010101010011000100"
-        + "010000100000010011100100111101010100001000000100001001000101001000000101001"
-        + "1010001010100010101001110"
-    )
-    expected_result = "This is a test string."
+    mocked_filepath = os.path.join(tmp_folder, "some_jpg_file.jpg")
+    with open(mocked_filepath, "w") as f:
+        f.write("")
+
+    expected_result = os.path.join(tmp_folder, "some_jpg_file.png")
 
     # ACT
-    result = Steganography(test_image)._binary_string_to_str(
-        mocked_binary_string, r"\end"
-    )
+    result = Steganography(test_image)._path_as_png(mocked_filepath)
 
     # ASSERT
     assert result == expected_result
 
 
-def test_rgb_to_binary(test_image):
+def test_path_as_png_if_two_extensions(test_image, tmp_folder):
     # ARRANGE
-    mocked_rgb = (123, 1, 32)
-    expected_result = ("01111011", "00000001", "00100000")
+    mocked_filepath = os.path.join(tmp_folder, "some_targz_file.tar.gz")
+    with open(mocked_filepath, "w") as f:
+        f.write("")
+
+    expected_result = os.path.join(tmp_folder, "some_targz_file.png")
 
     # ACT
-    result = Steganography(test_image)._rgb_to_binary(mocked_rgb)
+    result = Steganography(test_image)._path_as_png(mocked_filepath)
 
     # ASSERT
     assert result == expected_result
 
 
-def test_rgb_to_binary_if_invalid_rgb_length(test_image):
+def test_path_as_png_if_empty_path(test_image):
     # ARRANGE
-    mocked_rgb = (123, 1)
+    mocked_filepath = ""
 
     # ACT / ASSERT
     with pytest.raises(ValueError):
-        Steganography(test_image)._rgb_to_binary(mocked_rgb)
+        Steganography(test_image)._path_as_png(mocked_filepath)
 
 
-def test_binary_to_rgb(test_image):
+def test_path_as_png_if_file_exists_but_no_extension(test_image, tmp_folder):
     # ARRANGE
-    mocked_binary_rgb = ("01111011", "00000001", "00100000")
-    expected_result = (123, 1, 32)
+    mocked_filepath = os.path.join(tmp_folder, "some_file_without_extension")
+    with open(mocked_filepath, "w") as f:
+        f.write("")
+
+    expected_result = os.path.join(tmp_folder, "some_file_without_extension.png")
 
     # ACT
-    result = Steganography(test_image)._binary_to_rgb(mocked_binary_rgb)
+    result = Steganography(test_image)._path_as_png(mocked_filepath)
 
     # ASSERT
     assert result == expected_result
 
 
-def test_binary_to_rgb_if_unpacking(test_image):
-    # ARRANGE
-    mocked_binary_rgb = ["01111011", "00000001", "00100000"]
-    expected_result = (123, 1, 32)
+def test_path_as_png_if_directory_exists(test_image, tmp_folder):
+    # ARRANGE / ACT / ASSERT
+    with pytest.raises(IsADirectoryError):
+        Steganography(test_image)._path_as_png(tmp_folder)
 
-    # ACT
-    result = Steganography(test_image)._binary_to_rgb(*mocked_binary_rgb)
 
-    # ASSERT
-    assert result == expected_result
+def test_path_as_png_when_path_does_not_exist_and_is_directory(test_image):
+    # ARRANGE
+    mocked_filepath = "/some/path/"
+
+    # ACT / ASSERT
+    with pytest.raises(IsADirectoryError):
+        Steganography(test_image)._path_as_png(mocked_filepath)
 
 
-def test_binary_to_rgb_if_invalid_arguments(test_image):
+def test_path_as_png_when_path_does_not_exist_and_could_be_file_or_directory(
+    test_image, capfd
+):
     # ARRANGE
-    mocked_binary_rgb = ["01111011", "00000001"]
+    mocked_filepath = "/some/path"
+    expected_result = "/some/path.png"
 
-    # ACT / ASSERT
-    with pytest.raises(ValueError):
-        Steganography(test_image)._binary_to_rgb(*mocked_binary_rgb)
+    # ACT
+    result = Steganography(test_image)._path_as_png(mocked_filepath)
+    output, _ = capfd.readouterr()
+
+    # ASSERT
+    assert result == expected_result
+    assert "Assuming it's a file" in output
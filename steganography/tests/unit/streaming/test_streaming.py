@@ -0,0 +1,100 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import Steganography, streaming
+
+
+@pytest.fixture
+def pixels(cover):
+    return cover((45, 30, 3), array=True)
+
+
+def test_encode_same_pixels_as_steganography(pixels):
+    # ARRANGE
+    image = Image.fromarray(pixels)
+    data = b"Sample text " * 10
+    s = Steganography(image, bits_per_channel=2)
+    s.encode_bytes(data)
+    file = io.BytesIO()
+
+    # ACT
+    streaming.encode(image, file, data, band_rows=4, bits_per_channel=2)
+
+    # ASSERT
+    result = Image.open(io.BytesIO(file.getvalue()))
+    assert np.array_equal(np.asarray(result), np.asarray(s.encoded_image))
+
+
+@pytest.mark.parametrize("channels", [1, 2, 3, 4])
+def test_encode_and_decode_array(cover, tmp_folder, channels):
+    # ARRANGE
+    pixels = cover((40, 25, channels), array=True, seed=1)
+    original = pixels.copy()
+    path = os.path.join(tmp_folder, f"streaming{channels}.png")
+
+    # ACT
+    streaming.encode(pixels, path, b"Sample text", compression="zlib")
+    result = streaming.decode(path)
+
+    # ASSERT
+    assert result == b"Sample text"
+    assert np.array_equal(pixels, original)
+
+
+def test_encode_and_decode_legacy(pixels):
+    # ARRANGE
+    file = io.BytesIO()
+
+    # ACT
+    streaming.encode(pixels, file, b"Sample text", legacy=True)
+    result = streaming.decode(file.getvalue())
+
+    # ASSERT
+    assert result == b"Sample text"
+
+
+def test_encode_too_large(pixels):
+    # ARRANGE
+    file = io.BytesIO()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        streaming.encode(pixels, file, bytes(10000))
+    assert file.getvalue() == b""
+
+
+def test_encode_unsupported_mode(pixels):
+    # ARRANGE
+    image = Image.fromarray(pixels).convert("P")
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        streaming.encode(image, io.BytesIO(), b"Sample text")
+
+
+@pytest.mark.parametrize(
+    "array",
+    [np.zeros((40, 25, 3), dtype=np.uint16), np.zeros((40, 25, 5), dtype=np.uint8)],
+)
+def test_encode_unsupported_array(array):
+    # ARRANGE
+    file = io.BytesIO()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        streaming.encode(array, file, b"Sample text")
+    assert file.getvalue() == b""
+
+
+def test_png_writer_missing_rows():
+    # ARRANGE
+    writer = streaming.PngWriter(io.BytesIO(), width=2, height=3, channels=3)
+    writer.write(np.zeros((2, 2, 3), dtype=np.uint8))
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        writer.close()
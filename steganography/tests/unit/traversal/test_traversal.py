@@ -0,0 +1,217 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from steganography import Steganography, engine, payload, pure, traversal
+
+SHAPE = (37, 23, 3)
+
+
+@pytest.mark.parametrize("order", traversal.ORDERS)
+@pytest.mark.parametrize("start", [0, 1, 30, 40])
+def test_positions_visit_every_pixel_after_start_once(order, start):
+    # ARRANGE
+    height, width, _ = SHAPE
+    count = height * width - start
+
+    # ACT
+    result = traversal.positions(
+        traversal.ORDERS.index(order), SHAPE, start, count, "key"
+    )
+
+    # ASSERT
+    assert sorted(result) == list(range(start, height * width))
+
+
+@pytest.mark.parametrize("order", traversal.ORDERS)
+def test_position_list_same_as_positions(order):
+    # ARRANGE
+    index = traversal.ORDERS.index(order)
+
+    # ACT
+    result = traversal.position_list(index, SHAPE, 30, 500, b"key")
+
+    # ASSERT
+    assert result == traversal.positions(index, SHAPE, 30, 500, b"key").tolist()
+
+
+def test_row_positions():
+    # ACT
+    result = traversal.positions(traversal.ROW, (3, 4, 1), 2, 6)
+
+    # ASSERT
+    assert result.tolist() == [3, 6, 9, 4, 7, 10]
+
+
+@pytest.mark.parametrize("shape", [SHAPE, (5, 40, 1), (1, 100, 3)])
+@pytest.mark.parametrize("start", [0, 1, 30, 88])
+def test_row_runs_visit_rows_in_order_after_start(shape, start):
+    # ARRANGE
+    height, width, _ = shape
+    row_major = [x * height + y for y in range(height) for x in range(width)]
+    expected = [index for index in row_major if index >= start]
+
+    for count in (len(expected), len(expected) // 3):
+        # ACT
+        runs = traversal.row_runs(shape, start, count)
+
+        # ASSERT
+        result = [i % width * height + i // width for run in runs for i in range(*run)]
+        assert result == expected[:count]
+        assert len(runs) <= min(start, height) + 1
+
+
+def test_scatter_positions_depend_on_key_and_are_cached():
+    # ACT
+    first = traversal.positions(traversal.SCATTER, SHAPE, 30, 100, "key")
+    again = traversal.positions(traversal.SCATTER, SHAPE, 30, 100, b"key")
+    other = traversal.positions(traversal.SCATTER, SHAPE, 30, 100, "other")
+
+    # ASSERT
+    assert first.tolist() == again.tolist()
+    assert first.tolist() != other.tolist()
+    assert first.tolist() != list(range(30, 130))
+    assert traversal._scatter.cache_info().hits >= 1
+
+
+def test_scatter_prefix_is_stable():
+    # ACT
+    short = traversal.positions(traversal.SCATTER, SHAPE, 30, 10, "key")
+    long = traversal.positions(traversal.SCATTER, SHAPE, 30, 100, "key")
+
+    # ASSERT
+    assert short.tolist() == long[:10].tolist()
+
+
+@pytest.mark.parametrize(
+    "order, key", [("diagonal", None), ("scatter", None), ("scatter", "")]
+)
+def test_check_order_raises(order, key):
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        traversal.check_order(order, key)
+
+
+@pytest.mark.parametrize("order", traversal.ORDERS)
+@pytest.mark.parametrize("mode", ["L", "P", "RGB", "RGBA"])
+@pytest.mark.parametrize("bits_per_channel", [1, 3])
+def test_encode_and_decode(cover, order, mode, bits_per_channel):
+    # ARRANGE
+    s = Steganography(
+        cover(SHAPE, mode), bits_per_channel=bits_per_channel, order=order, key="key"
+    )
+    data = np.random.default_rng(1).bytes(s.capacity())
+
+    # ACT
+    s.encode_bytes(data)
+
+    # ASSERT
+    assert s.decode_bytes() == data
+    assert pure.read(s.encoded_image, key="key")[1] == data
+    assert (
+        pure.embed(
+            cover(SHAPE, mode),
+            data,
+            0,
+            bits_per_channel=bits_per_channel,
+            order=order,
+            key="key",
+        ).tobytes()
+        == s.encoded_image.tobytes()
+    )
+
+
+@pytest.mark.parametrize("order", traversal.ORDERS)
+def test_order_is_stored_in_header(cover, order):
+    # ARRANGE
+    s = Steganography(cover(SHAPE), compression="zlib", order=order, key="key")
+    s.encode("message " * 10)
+
+    # ACT
+    header = payload.read_header(np.array(s.encoded_image))
+
+    # ASSERT
+    assert header.order == traversal.ORDERS.index(order)
+    assert header.flags & payload.FLAG_ZLIB
+    assert Steganography(s.encoded_image, key="key").decode() == "message " * 10
+
+
+def test_row_order_writes_first_rows(cover):
+    # ARRANGE
+    s = Steganography(cover(SHAPE), order="row")
+
+    # ACT
+    s.encode("short")
+
+    # ASSERT
+    changed = np.argwhere(np.array(s.encoded_image) != np.array(cover(SHAPE)))
+    outside_header = changed[changed[:, 1] > 0]
+    assert outside_header[:, 0].max() < 2
+    assert outside_header[:, 1].max() > 2
+
+
+def test_scatter_needs_the_key(cover):
+    # ARRANGE
+    s = Steganography(cover(SHAPE), order="scatter", key="key")
+    s.encode("secret")
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="key is needed"):
+        Steganography(s.encoded_image).decode()
+    assert Steganography(s.encoded_image, key="other").decode_bytes() != b"secret"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"order": "scatter"},
+        {"order": "row", "legacy": True},
+        {"order": "spiral"},
+    ],
+)
+def test_invalid_options_raise(cover, options):
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        Steganography(cover(SHAPE), **options)
+
+
+def test_unknown_order_in_header_raises():
+    # ARRANGE
+    header = payload.Header(10, 3 << payload.ORDER_SHIFT).pack()
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="order"):
+        payload.Header.unpack(header)
+
+
+@pytest.mark.parametrize("bits_per_channel", [1, 2])
+def test_embed_runs_into_pixels_that_arent_contiguous(cover, bits_per_channel):
+    # ARRANGE
+    pixels = np.asfortranarray(np.array(cover(SHAPE)))
+    expected = np.array(cover(SHAPE))
+    bits = np.random.default_rng(1).integers(0, 2, 1000, dtype=np.uint8)
+    runs = traversal.row_runs(SHAPE, 30, 200)
+    positions = traversal.positions(traversal.ROW, SHAPE, 30, 200)
+
+    # ACT
+    engine.embed_runs(pixels, bits, runs, bits_per_channel)
+
+    # ASSERT
+    engine.embed_at(expected, bits, positions, bits_per_channel)
+    assert np.array_equal(pixels, expected)
+    assert engine.extract_runs(
+        engine.ImagePixels(Image.fromarray(pixels)), runs
+    ).tolist() == (engine.extract_at(expected, positions).tolist())
+
+
+def test_extract_at_reads_only_region_of_image_pixels(cover):
+    # ARRANGE
+    image = cover(SHAPE)
+    positions = np.array([40, 3, 41])
+
+    # ACT
+    result = engine.extract_at(engine.ImagePixels(image), positions, 2)
+
+    # ASSERT
+    expected = engine.extract_at(np.array(image), positions, 2)
+    assert result.tolist() == expected.tolist()
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+import pytest
+
+from steganography import Steganography
+from steganography.writer import AsyncWriter, default_writer
+
+
+def test_save_async(cover, tmp_folder):
+    # ARRANGE
+    paths = []
+    with AsyncWriter(max_workers=2) as writer:
+        for idx in range(4):
+            s = Steganography(cover())
+            s.encode(f"message {idx}")
+
+            # ACT
+            path = os.path.join(tmp_folder, f"async{idx}.png")
+            paths.append(s.save_async(path, writer=writer))
+
+    # ASSERT
+    for idx, future in enumerate(paths):
+        assert future.done()
+        assert Steganography(future.result()).decode() == f"message {idx}"
+
+
+def test_save_async_with_format(cover, tmp_folder):
+    # ARRANGE
+    s = Steganography(cover())
+    s.encode("webp")
+    writer = AsyncWriter(max_workers=1)
+
+    # ACT
+    future = s.save_async(os.path.join(tmp_folder, "async.png"), "WEBP", writer=writer)
+    writer.close()
+
+    # ASSERT
+    assert future.result().endswith("async.webp")
+    assert Steganography(future.result()).decode() == "webp"
+
+
+def test_save_async_if_not_encoded(cover):
+    # ARRANGE
+    s = Steganography(cover())
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        s.save_async("not_encoded.png")
+
+
+def test_save_async_lossy_format(cover):
+    # ARRANGE
+    s = Steganography(cover())
+    s.encode("a")
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        s.save_async("lossy.jpg", "JPEG")
+
+
+def test_callbacks_in_submission_order():
+    # ARRANGE
+    order = []
+    writer = AsyncWriter(max_workers=4)
+
+    # ACT
+    for idx in range(8):
+        delay = (8 - idx) / 100
+        writer.submit(
+            time.sleep, delay, callback=lambda future, idx=idx: order.append(idx)
+        )
+    writer.flush()
+
+    # ASSERT
+    assert order == list(range(8))
+    writer.close()
+
+
+def test_submit_blocks_when_full():
+    # ARRANGE
+    release = threading.Event()
+    writer = AsyncWriter(max_workers=1, max_pending=2)
+    writer.submit(release.wait)
+    writer.submit(release.wait)
+
+    # ACT
+    submitter = threading.Thread(target=writer.submit, args=(release.wait,))
+    submitter.start()
+    submitter.join(0.1)
+    blocked = submitter.is_alive()
+    release.set()
+    submitter.join()
+    writer.close()
+
+    # ASSERT
+    assert blocked
+
+
+def test_flush_timeout():
+    # ARRANGE
+    release = threading.Event()
+    writer = AsyncWriter(max_workers=1)
+    writer.submit(release.wait)
+
+    # ACT / ASSERT
+    with pytest.raises(TimeoutError):
+        writer.flush(timeout=0.01)
+
+    release.set()
+    writer.close()
+
+
+def test_flush_raises_callback_error():
+    # ARRANGE
+    results = []
+    writer = AsyncWriter(max_workers=1)
+
+    def fail(future):
+        raise RuntimeError("callback failed")
+
+    # ACT
+    writer.submit(int, "1", callback=fail)
+    writer.submit(int, "2", callback=lambda future: results.append(future.result()))
+
+    # ASSERT
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    assert results == [2]
+    writer.flush()
+    writer.close()
+
+
+def test_errors_stay_in_futures():
+    # ARRANGE
+    with AsyncWriter(max_workers=1) as writer:
+        # ACT
+        future = writer.submit(int, "not a number")
+
+    # ASSERT
+    with pytest.raises(ValueError):
+        future.result()
+
+
+def test_invalid_limits():
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        AsyncWriter(max_workers=-1)
+
+
+def test_default_writer():
+    # ACT / ASSERT
+    assert default_writer() is default_writer()
@@ -0,0 +1,272 @@
+"""Orders in which the pixels holding a payload are visited.
+
+The header is always written to the first pixels in column-major order, so it
+can be read before the order is known, and records the order of the payload:
+
+- "column": column by column, the order every version has used.
+- "row": row by row, the order Pillow and NumPy lay pixels out in memory.
+- "scatter": pseudo-random order derived from a key, spreading the payload
+  across the whole image. The same key is needed to decode it.
+
+Pixels are identified by their column-major index, x * height + y. The row
+order is a few runs of pixels that are consecutive in memory, the rest of each
+row holding the header and then every row after them, so both engines read and
+write it in bulk, one run at a time. The scatter order is a keyed Feistel
+permutation of every pixel after the header, with cycle walking, so the
+position of each pixel of the payload is computed on its own: a permutation of
+the whole image is never generated, and NumPy and pure Python compute the same
+positions. Positions are cached per key, image size and payload size, so
+payloads of the same size in images of the same size don't compute them again.
+"""
+import functools
+import hashlib
+from typing import List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pure computes positions one at a time without NumPy
+    np = None
+
+ORDERS = ("column", "row", "scatter")
+COLUMN, ROW, SCATTER = range(len(ORDERS))
+
+CACHE_SIZE = 32
+
+_ROUNDS = 4
+_MASK = (1 << 64) - 1
+
+Key = Union[str, bytes]
+
+
+def check_order(order: str, key: Optional[Key] = None) -> int:
+    """Checks if order is supported and has a key when it needs one.
+
+    Args:
+        order (str): One of ORDERS.
+        key (Optional[Key], optional): Key of the scatter order. Defaults to
+        None.
+
+    Raises:
+        ValueError: When order is unknown or is "scatter" without a key.
+
+    Returns:
+        int: Index of order in ORDERS, as stored in the header.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+    if order == "scatter" and not key:
+        raise ValueError("The scatter order needs a key")
+
+    return ORDERS.index(order)
+
+
+def positions(
+    order: int, shape: Tuple[int, int, int], start: int, count: int, key: Key = None
+) -> "np.ndarray":
+    """Returns the pixels holding a payload, in the order it is written.
+
+    Args:
+        order (int): Index in ORDERS.
+        shape (Tuple[int, int, int]): Shape of the pixels, (height, width,
+        channels).
+        start (int): Pixels before start, which hold the header, are skipped.
+        count (int): Number of pixels holding the payload.
+        key (Key, optional): Key of the scatter order. Defaults to None.
+
+    Raises:
+        ValueError: When order is "scatter" and key is missing.
+
+    Returns:
+        np.ndarray: Column-major index of each pixel.
+    """
+    height, width, _ = shape
+    if order == COLUMN:
+        return np.arange(start, start + count)
+    if order == ROW:
+        runs = row_runs(shape, start, count)
+        y, x = np.divmod(np.concatenate([np.arange(*run) for run in runs]), width)
+        return x * height + y
+
+    return _scatter(_key(key), height * width - start, count) + start
+
+
+def position_list(
+    order: int, shape: Tuple[int, int, int], start: int, count: int, key: Key = None
+) -> List[int]:
+    """Same as positions, without NumPy.
+
+    Args:
+        order, shape, start, count, key: Same as in positions.
+
+    Raises:
+        ValueError: When order is "scatter" and key is missing.
+
+    Returns:
+        List[int]: Column-major index of each pixel.
+    """
+    height, width, _ = shape
+    if order == COLUMN:
+        return list(range(start, start + count))
+    if order == ROW:
+        runs = row_runs(shape, start, count)
+        return [i % width * height + i // width for run in runs for i in range(*run)]
+
+    size = height * width - start
+    return [index + start for index in _scatter_list(_key(key), size, count)]
+
+
+def row_runs(
+    shape: Tuple[int, int, int], start: int, count: int
+) -> List[Tuple[int, int]]:
+    """Returns the pixels holding a payload in the "row" order, as runs.
+
+    Args:
+        shape (Tuple[int, int, int]): Shape of the pixels, (height, width,
+        channels).
+        start (int): Pixels before start in column-major order, which hold
+        the header, are skipped.
+        count (int): Number of pixels holding the payload.
+
+    Returns:
+        List[Tuple[int, int]]: Row-major index of the first pixel of each run
+        and index after its last pixel, in the order the payload is written.
+    """
+    height, width, _ = shape
+    header_rows = min(start, height)
+    # Rows holding the header start after the header pixels of the row
+    spans = [
+        (y * width + min(-(-(start - y) // height), width), (y + 1) * width)
+        for y in range(header_rows)
+    ]
+    spans.append((header_rows * width, height * width))
+
+    runs = []
+    for first, stop in spans:
+        stop = min(stop, first + count)
+        if stop <= first:
+            continue
+        count -= stop - first
+        if runs and runs[-1][1] == first:
+            first = runs.pop()[0]
+        runs.append((first, stop))
+
+    return runs
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _scatter(key: bytes, size: int, count: int) -> "np.ndarray":
+    """Returns the first count positions of the keyed permutation of size.
+
+    Args:
+        key (bytes): Key, as returned by _key.
+        size (int): Number of positions permuted.
+        count (int): Number of positions returned.
+
+    Returns:
+        np.ndarray: Read-only array of positions in [0, size).
+    """
+    keys, half = _rounds(key, size)
+    result = _permute(np.arange(count, dtype=np.uint64), keys, half)
+
+    outside = result >= size
+    while outside.any():
+        result[outside] = _permute(result[outside], keys, half)
+        outside = result >= size
+
+    result = result.astype(np.int64)
+    result.setflags(write=False)
+    return result
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _scatter_list(key: bytes, size: int, count: int) -> Tuple[int, ...]:
+    """Same as _scatter, without NumPy.
+
+    Args:
+        key, size, count: Same as in _scatter.
+
+    Returns:
+        Tuple[int, ...]: Positions in [0, size).
+    """
+    keys, half = _rounds(key, size)
+    result = []
+    for index in range(count):
+        index = _permute(index, keys, half)
+        while index >= size:
+            index = _permute(index, keys, half)
+        result.append(index)
+
+    return tuple(result)
+
+
+def _key(key: Optional[Key]) -> bytes:
+    """Returns key as bytes.
+
+    Args:
+        key (Optional[Key]): Key of the scatter order.
+
+    Raises:
+        ValueError: When key is missing.
+
+    Returns:
+        bytes: Key encoded as UTF-8 if it was a str.
+    """
+    if not key:
+        raise ValueError("Payload was written in scatter order, a key is needed")
+
+    return key.encode("utf-8") if isinstance(key, str) else bytes(key)
+
+
+def _rounds(key: bytes, size: int) -> Tuple[Tuple[int, ...], int]:
+    """Returns the round keys and the bits of each half of the Feistel network.
+
+    Args:
+        key (bytes): Key of the scatter order.
+        size (int): Number of positions permuted.
+
+    Returns:
+        Tuple[Tuple[int, ...], int]: One 64 bit key for each round, and the
+        bits of each half, which hold at least size positions together.
+    """
+    digest = hashlib.blake2b(key, digest_size=8 * _ROUNDS, person=b"traversal").digest()
+    keys = tuple(
+        int.from_bytes(digest[index : index + 8], "big")
+        for index in range(0, len(digest), 8)
+    )
+    half = max(-(-(size - 1).bit_length() // 2), 1)
+    return keys, half
+
+
+def _permute(values, keys: Tuple[int, ...], half: int):
+    """Applies the Feistel network to values.
+
+    Args:
+        values (Union[int, np.ndarray]): Position or uint64 array of them, below
+        2 ** (2 * half).
+        keys (Tuple[int, ...]): Round keys.
+        half (int): Bits of each half.
+
+    Returns:
+        Union[int, np.ndarray]: Permuted values, below 2 ** (2 * half).
+    """
+    mask = (1 << half) - 1
+    left, right = values >> half, values & mask
+    for key in keys:
+        left, right = right, left ^ (_mix(right ^ key) & mask)
+
+    return left << half | right
+
+
+def _mix(value):
+    """Mixes the bits of 64 bit values, as the splitmix64 finalizer does.
+
+    Args:
+        value (Union[int, np.ndarray]): Value or uint64 array of them.
+
+    Returns:
+        Union[int, np.ndarray]: Mixed values.
+    """
+    value = (value * 0x9E3779B97F4A7C15) & _MASK
+    value ^= value >> 29
+    value = (value * 0xBF58476D1CE4E5B9) & _MASK
+    return value ^ (value >> 32)
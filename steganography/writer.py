@@ -0,0 +1,172 @@
+"""Save encoded images in the background while the next ones are encoded.
+
+An AsyncWriter runs saves on a small pool of threads, so compressing and
+writing an image overlaps with encoding the next one. At most max_pending saves
+are in flight at a time: submitting more blocks until one finishes, which
+bounds the encoded images held in memory. Callbacks run in the order saves
+were submitted, whatever order they finish in.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+Callback = Callable[[Future], None]
+
+
+class AsyncWriter:
+    """Bounded pool of threads saving images in the background"""
+
+    def __init__(self, max_workers: int = None, max_pending: int = None) -> None:
+        """Initialize the class
+
+        Args:
+            max_workers (int, optional): Threads saving at a time. Defaults to
+            the number of CPUs.
+            max_pending (int, optional): Saves submitted and not finished yet
+            before submit blocks. Defaults to twice max_workers.
+
+        Raises:
+            ValueError: When max_workers or max_pending are lower than 1.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        max_pending = max_pending or 2 * max_workers
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._executor = ThreadPoolExecutor(max_workers, "steganography-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._condition = threading.Condition()
+        self._delivering = threading.Lock()
+        self._submitted = 0
+        self._delivered = 0
+        self._finished = {}
+        self._callbacks = {}
+        self._error = None
+
+    def submit(
+        self, function: Callable, *args, callback: Callback = None, **kwargs
+    ) -> Future:
+        """Runs function in the background, blocking while the pool is full.
+
+        Args:
+            function (Callable): Function that saves an image.
+            *args: Positional arguments passed to function.
+            callback (Callback, optional): Called with the future once it is
+            done and the callbacks of every earlier submission have run.
+            Defaults to None.
+            **kwargs: Keyword arguments passed to function.
+
+        Returns:
+            Future: Future of function's result.
+        """
+        self._slots.acquire()
+        with self._condition:
+            index = self._submitted
+            self._submitted += 1
+            self._callbacks[index] = callback
+
+        try:
+            future = self._executor.submit(function, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            self._done(index, None)
+            raise
+
+        future.add_done_callback(lambda future: self._done(index, future))
+        return future
+
+    def flush(self, timeout: float = None) -> None:
+        """Waits until every save submitted so far finished and its callback ran.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to waiting
+            forever.
+
+        Raises:
+            TimeoutError: When the saves didn't finish within timeout.
+            Exception: The first error raised by a callback since the last
+            flush.
+        """
+        with self._condition:
+            submitted = self._submitted
+            if not self._condition.wait_for(
+                lambda: self._delivered >= submitted, timeout
+            ):
+                raise TimeoutError(f"{submitted - self._delivered} saves are pending")
+
+            error, self._error = self._error, None
+
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Flushes and stops the threads. Nothing can be submitted after."""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self) -> "AsyncWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _done(self, index: int, future: Optional[Future]) -> None:
+        """Frees a slot and runs every callback that is next in order.
+
+        Args:
+            index (int): Submission order of the finished save.
+            future (Optional[Future]): Its future, None if it was never
+            submitted.
+        """
+        if future is not None:
+            self._slots.release()
+
+        with self._condition:
+            self._finished[index] = future
+
+        # Only one thread runs callbacks at a time, so they run in order
+        # even when saves finish at the same time.
+        with self._delivering:
+            while True:
+                with self._condition:
+                    if self._delivered not in self._finished:
+                        return
+
+                    future = self._finished.pop(self._delivered)
+                    callback = self._callbacks.pop(self._delivered)
+
+                try:
+                    if callback is not None and future is not None:
+                        callback(future)
+                except Exception as error:
+                    with self._condition:
+                        self._error = self._error or error
+
+                with self._condition:
+                    self._delivered += 1
+                    self._condition.notify_all()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_writer() -> AsyncWriter:
+    """Returns the process-wide writer, creating it the first time.
+
+    Returns:
+        AsyncWriter: Writer used by Steganography.save_async by default.
+    """
+    global _default
+
+    with _default_lock:
+        if _default is None:
+            _default = AsyncWriter()
+
+        return _default